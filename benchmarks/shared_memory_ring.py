@@ -0,0 +1,211 @@
+"""
+Benchmark of the ingestion of array-valued events through a shared memory ring,
+compared to the msgpack-numpy path used with Kafka.
+
+A reference producer process writes a run with waveform events, and this process
+reads them, copying each array once into a column store (as the aggregator does).
+The producer can also be used on its own, to feed a running application started
+with ``--shared-memory NAME``:
+
+    python benchmarks/shared_memory_ring.py --produce NAME
+
+For the Kafka path, if a broker is given with ``--bootstrap``, the events go through
+it. Otherwise, only the serialization and copies of that path are measured, which is
+a lower bound of its cost.
+
+Usage: python benchmarks/shared_memory_ring.py [--events N] [--points N]
+    [--bootstrap HOST:PORT]
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+import uuid
+
+import msgpack_numpy as msgpack
+import numpy as np
+
+from sophys_live_view.utils.shared_memory_ring import (
+    SharedMemoryRingReader,
+    SharedMemoryRingWriter,
+)
+
+
+def make_documents(events: int, points: int):
+    """Documents of a run with `events` events of a `points`-long waveform detector."""
+    start_uid = str(uuid.uuid4())
+    descriptor_uid = str(uuid.uuid4())
+    yield "start", {"uid": start_uid, "time": time.time(), "detectors": ["waveform"]}
+    yield (
+        "descriptor",
+        {
+            "uid": descriptor_uid,
+            "run_start": start_uid,
+            "name": "primary",
+            "data_keys": {"waveform": {"dtype": "array", "shape": [points]}},
+            "configuration": {},
+        },
+    )
+
+    rng = np.random.default_rng(0)
+    waveform = rng.random(points)
+    for seq_num in range(1, events + 1):
+        yield (
+            "event",
+            {
+                "uid": str(uuid.uuid4()),
+                "descriptor": descriptor_uid,
+                "seq_num": seq_num,
+                "time": time.time(),
+                "data": {"waveform": waveform},
+                "timestamps": {"waveform": time.time()},
+            },
+        )
+    yield "stop", {"run_start": start_uid, "num_events": {"primary": events}}
+
+
+def reference_producer(name: str, events: int, points: int):
+    """Write a run to a new shared memory ring, as a RunEngine callback would."""
+    with SharedMemoryRingWriter(name, timeout=None) as writer:
+        for document_type, document in make_documents(events, points):
+            writer(document_type, document)
+
+        # NOTE: Keep the segment until the reader released everything.
+        writer.wait_until_released()
+
+
+def consume_shared_memory(events: int, points: int) -> float:
+    name = f"benchmark_{uuid.uuid4().hex[:8]}"
+    column = _column_store(events, points)
+
+    # NOTE: Not a multiprocessing child, since those share the resource tracker of
+    # this process, unlike an actual producer.
+    producer = subprocess.Popen(
+        [
+            sys.executable,
+            __file__,
+            "--produce",
+            name,
+            f"--events={events}",
+            f"--points={points}",
+        ]
+    )
+
+    try:
+        while True:
+            try:
+                reader = SharedMemoryRingReader(name)
+                break
+            except FileNotFoundError:
+                time.sleep(0.01)
+
+        received_events = 0
+        started = None
+        done = False
+        while not done:
+            for document_type, document in reader.read():
+                if started is None:
+                    started = time.perf_counter()
+                if document_type == "event":
+                    column[received_events] = np.expand_dims(
+                        document["data"]["waveform"], 0
+                    )
+                    received_events += 1
+                done = document_type == "stop"
+        elapsed = time.perf_counter() - started
+
+        reader.close()
+        producer.wait()
+    finally:
+        producer.kill()
+    return elapsed
+
+
+def _column_store(events: int, points: int) -> np.ndarray:
+    column = np.empty((events, points))
+    # NOTE: Fault the pages in beforehand, so that it isn't measured.
+    column.fill(0)
+    return column
+
+
+def consume_serialized(events: int, points: int) -> float:
+    column = _column_store(events, points)
+    received_events = 0
+    started = time.perf_counter()
+    for document in make_documents(events, points):
+        # NOTE: The copy made by the broker client when receiving the message.
+        message = bytes(msgpack.packb(document))
+        document_type, document = msgpack.unpackb(message)
+        if document_type == "event":
+            column[received_events] = np.array([document["data"]["waveform"]])
+            received_events += 1
+    return time.perf_counter() - started
+
+
+def consume_kafka(events: int, points: int, bootstrap: str) -> float:
+    from kafka import KafkaConsumer, KafkaProducer
+
+    topic = f"benchmark_{uuid.uuid4().hex[:8]}"
+    producer = KafkaProducer(
+        bootstrap_servers=[bootstrap],
+        value_serializer=msgpack.packb,
+        max_request_size=64 * 1024 * 1024,
+    )
+    for document in make_documents(events, points):
+        producer.send(topic, document)
+    producer.flush()
+
+    consumer = KafkaConsumer(
+        topic,
+        bootstrap_servers=[bootstrap],
+        auto_offset_reset="earliest",
+        value_deserializer=msgpack.unpackb,
+        fetch_max_bytes=64 * 1024 * 1024,
+    )
+
+    column = _column_store(events, points)
+    received_events = 0
+    started = time.perf_counter()
+    done = False
+    while not done:
+        for messages in consumer.poll(timeout_ms=1000).values():
+            for message in messages:
+                document_type, document = message.value
+                if document_type == "event":
+                    column[received_events] = np.array([document["data"]["waveform"]])
+                    received_events += 1
+                done = document_type == "stop"
+    elapsed = time.perf_counter() - started
+
+    consumer.close()
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--bootstrap", default=None)
+    parser.add_argument("--produce", default=None, metavar="NAME")
+    args = parser.parse_args()
+
+    if args.produce is not None:
+        reference_producer(args.produce, args.events, args.points)
+        sys.exit(0)
+
+    size = args.events * args.points * 8 / 1024**2
+    print(f"{args.events} events of {args.points} points ({size:.0f} MiB)")
+
+    elapsed = consume_shared_memory(args.events, args.points)
+    print(f"Shared memory ring: {elapsed:.3f} s ({size / elapsed:.0f} MiB/s)")
+
+    if args.bootstrap is not None:
+        elapsed = consume_kafka(args.events, args.points, args.bootstrap)
+        print(f"Kafka: {elapsed:.3f} s ({size / elapsed:.0f} MiB/s)")
+    else:
+        elapsed = consume_serialized(args.events, args.points)
+        print(
+            f"msgpack-numpy (Kafka path without the broker): {elapsed:.3f} s "
+            f"({size / elapsed:.0f} MiB/s)"
+        )
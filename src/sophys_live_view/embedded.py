@@ -0,0 +1,46 @@
+from qtpy.QtWidgets import QApplication
+
+from .utils.in_process_data_source import InProcessDataSource
+from .widgets.main_window import SophysLiveView
+
+_application = None
+
+
+def subscribe(
+    run_engine, show_stats_by_default=False, *, float32_detectors=False
+) -> SophysLiveView:
+    """
+    Show a live view of the runs of a RunEngine in this same process.
+
+    The view receives documents directly from the RunEngine, without going through
+    Kafka, and stops receiving them once it's closed. A Qt event loop must be
+    running for it to update, e.g. with ``%gui qt`` in IPython.
+
+    Parameters
+    ----------
+    run_engine : RunEngine
+        RunEngine whose documents will be shown.
+    show_stats_by_default : bool, optional
+        Show curve statistics by default on 1D plots. Defaults to False.
+    float32_detectors : bool, optional
+        Store floating-point detector data with single precision, when their
+        precision allows it. Defaults to False.
+
+    Returns
+    -------
+    SophysLiveView
+        The window of the view, already shown.
+    """
+    global _application
+    if QApplication.instance() is None:
+        _application = QApplication([])
+
+    data_source = InProcessDataSource()
+    token = run_engine.subscribe(data_source)
+    data_source.finished.connect(lambda: run_engine.unsubscribe(token))
+
+    live_view = SophysLiveView(
+        [data_source], show_stats_by_default, float32_detectors=float32_detectors
+    )
+    live_view.show()
+    return live_view
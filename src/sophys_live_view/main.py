@@ -1,9 +1,13 @@
+# NOTE: Imported first, so that startup times include the other imports.
+from .utils.startup_timing import startup_timer  # noqa: I001
+
 import argparse
+import logging
 import sys
 
 from qtpy.QtWidgets import QApplication
 
-from .utils.kafka_data_source import KafkaDataSource
+from .utils.session_snapshot import DEFAULT_SNAPSHOT_PATH
 from .widgets.main_window import SophysLiveView
 
 
@@ -12,8 +16,14 @@ def entrypoint():
     parser.add_argument(
         "-t",
         "--topic",
-        default="test_bluesky_raw_docs",
-        help="Kafka topic to subscribe to (default: test_bluesky_raw_docs).",
+        action="append",
+        dest="topics",
+        help="Kafka topic to subscribe to. Can be repeated to subscribe to multiple topics (default: test_bluesky_raw_docs).",
+    )
+    parser.add_argument(
+        "--topic-pattern",
+        default=None,
+        help="Subscribe to all Kafka topics fully matching this regular expression, in addition to the ones given by --topic.",
     )
     parser.add_argument(
         "-b",
@@ -27,11 +37,65 @@ def entrypoint():
         type=float,
         help="Retrieve X hours before the current time from Kafka.",
     )
+    parser.add_argument(
+        "--decode-workers",
+        default=0,
+        type=int,
+        help="Number of worker processes for decoding Kafka messages (default: 0, decode them in the consumer thread).",
+    )
+    parser.add_argument(
+        "--checkpoint-file",
+        default=None,
+        help="File to periodically save the consumed Kafka offsets to (default: ~/.cache/sophys_live_view/kafka_checkpoint.json). Set to an empty string to disable checkpoints.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume from the offsets in the checkpoint file, repopulating the runs shown by the previous session.",
+    )
+    parser.add_argument(
+        "--document-log",
+        default=None,
+        help="Tail this local document log (written by a DocumentLogWriter on the RunEngine side) instead of consuming from Kafka.",
+    )
+    parser.add_argument(
+        "--shared-memory",
+        default=None,
+        help="Read documents from the shared memory ring with this name (written by a SharedMemoryRingWriter on the RunEngine side) instead of consuming from Kafka.",
+    )
+    parser.add_argument(
+        "--session-snapshot",
+        default=None,
+        help="Directory to save the session to on exit, and restore it from on the next start (default: ~/.cache/sophys_live_view/session). Set to an empty string to disable it.",
+    )
+    parser.add_argument(
+        "--session-snapshot-max-runs",
+        default=200,
+        type=int,
+        help="Number of most recent runs saved to the session snapshot, besides the bookmarked ones (default: 200).",
+    )
     parser.add_argument(
         "--show-stats-by-default",
         action="store_true",
         help="Show curve statistics by default on 1D plots.",
     )
+    parser.add_argument(
+        "--float32-detectors",
+        action="store_true",
+        help="Store floating-point detector data with single precision, when their precision allows it, to reduce memory usage.",
+    )
+    parser.add_argument(
+        "--many-runs-threshold",
+        default=50,
+        type=int,
+        help="Number of selected runs above which the 1D plot shows a single waterfall or density image, instead of one curve per run (default: 50).",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="WARNING",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Level of the messages logged to the terminal (default: WARNING). With INFO, startup times are reported too.",
+    )
     parser.add_argument(
         "--profile", action="store_true", help="Profile this application with py-spy."
     )
@@ -43,6 +107,13 @@ def entrypoint():
 
     args = parser.parse_args()
 
+    logging.basicConfig(level=args.log_level)
+
+    if args.topics is None:
+        args.topics = (
+            [] if args.topic_pattern is not None else ["test_bluesky_raw_docs"]
+        )
+
     if args.profile:
         import os
         import subprocess
@@ -52,12 +123,47 @@ def entrypoint():
     def __inner():
         app = QApplication(sys.argv)
 
-        kafka_data_source = KafkaDataSource(
-            args.topic, [args.bootstrap], hour_offset=args.hour_offset
+        # NOTE: Only the backend of the data source being used is imported.
+        if args.document_log is not None:
+            from .utils.file_tail_data_source import FileTailDataSource
+
+            data_source = FileTailDataSource(args.document_log)
+        elif args.shared_memory is not None:
+            from .utils.shared_memory_data_source import SharedMemoryDataSource
+
+            data_source = SharedMemoryDataSource(args.shared_memory)
+        else:
+            from .utils.kafka_checkpoint import DEFAULT_CHECKPOINT_PATH
+            from .utils.kafka_data_source import KafkaDataSource
+
+            checkpoint_file = args.checkpoint_file
+            if checkpoint_file is None:
+                checkpoint_file = DEFAULT_CHECKPOINT_PATH
+
+            data_source = KafkaDataSource(
+                args.topics,
+                [args.bootstrap],
+                hour_offset=args.hour_offset,
+                decode_workers=args.decode_workers,
+                topic_pattern=args.topic_pattern,
+                checkpoint_path=checkpoint_file or None,
+                resume=args.resume,
+            )
+
+        session_snapshot = args.session_snapshot
+        if session_snapshot is None:
+            session_snapshot = DEFAULT_SNAPSHOT_PATH
+
+        main_window = SophysLiveView(
+            [data_source],
+            args.show_stats_by_default,
+            float32_detectors=args.float32_detectors,
+            many_runs_threshold=args.many_runs_threshold,
+            session_snapshot_path=session_snapshot or None,
+            session_snapshot_max_runs=args.session_snapshot_max_runs,
         )
-
-        main_window = SophysLiveView([kafka_data_source], args.show_stats_by_default)
         main_window.show()
+        startup_timer.mark("window created")
 
         return app.exec_()
 
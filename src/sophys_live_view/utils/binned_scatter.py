@@ -0,0 +1,168 @@
+import typing
+
+import numpy as np
+
+Limits = tuple[tuple[float, float], tuple[float, float]]
+
+
+class BinnedScatter:
+    """
+    Fixed-resolution image of scattered (x, y, value) points, with the mean value of the
+    points falling in each bin.
+
+    Points are accumulated incrementally: each update only bins the points received
+    since the last one, so it costs time proportional to the number of new points, not
+    to the total number of points.
+
+    Parameters
+    ----------
+    resolution : tuple[int, int], optional
+        Number of (rows, columns) of the image. Defaults to (256, 256).
+    limits : tuple[tuple[float, float], tuple[float, float]], optional
+        Fixed ((x min, x max), (y min, y max)) region to bin, ignoring points outside
+        of it. If not provided, the region grows to fit all points, in which case all
+        points are binned again whenever it grows.
+    """
+
+    # NOTE: Grow the region by this fraction of its size, so that points slowly moving
+    # outwards (e.g. in a live scan) don't cause all points to be binned every time.
+    GROWTH_MARGIN = 0.25
+
+    def __init__(
+        self, resolution: tuple[int, int] = (256, 256), limits: Limits | None = None
+    ):
+        self._resolution = resolution
+        self._fixed_limits = limits is not None
+        self._limits = limits
+
+        self._sum = np.zeros(resolution)
+        self._count = np.zeros(resolution, dtype=np.int64)
+        self._binned_points = 0
+        self._generation = None
+
+    @property
+    def limits(self) -> Limits | None:
+        """Region being binned, or None if no points were binned yet."""
+        return self._limits
+
+    @property
+    def binned_points(self) -> int:
+        """Number of points, valid or not, consumed so far."""
+        return self._binned_points
+
+    @property
+    def origin(self) -> tuple[float, float]:
+        (x_min, _), (y_min, _) = self._limits
+        return (x_min, y_min)
+
+    @property
+    def scale(self) -> tuple[float, float]:
+        (x_min, x_max), (y_min, y_max) = self._limits
+        rows, columns = self._resolution
+        return ((x_max - x_min) / columns, (y_max - y_min) / rows)
+
+    def update(
+        self,
+        x: np.ndarray,
+        y: np.ndarray,
+        values: np.ndarray,
+        generation: typing.Hashable = None,
+    ):
+        """
+        Bin the points of the (x, y, values) arrays that weren't binned yet.
+
+        The arrays are expected to only grow between calls, while `generation` stays
+        the same. If they get shorter, or `generation` changes (i.e. the data changed
+        other than by having points appended), all points are binned again.
+        """
+        length = min(len(x), len(y), len(values))
+        if length < self._binned_points or generation != self._generation:
+            self._reset()
+        self._generation = generation
+
+        new_x = np.asarray(x[self._binned_points : length], dtype=float)
+        new_y = np.asarray(y[self._binned_points : length], dtype=float)
+        new_values = np.asarray(values[self._binned_points : length], dtype=float)
+
+        if not self._fixed_limits and not self._contains(new_x, new_y):
+            self._grow_limits(x[:length], y[:length])
+            self._reset()
+            new_x = np.asarray(x[:length], dtype=float)
+            new_y = np.asarray(y[:length], dtype=float)
+            new_values = np.asarray(values[:length], dtype=float)
+
+        self._accumulate(new_x, new_y, new_values)
+        self._binned_points = length
+
+    def image(self) -> np.ndarray:
+        """Get the mean value in each bin, with NaN for bins without any point."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self._count > 0, self._sum / self._count, np.nan)
+
+    def _reset(self):
+        self._sum.fill(0)
+        self._count.fill(0)
+        self._binned_points = 0
+
+    def _contains(self, x: np.ndarray, y: np.ndarray) -> bool:
+        valid = np.isfinite(x) & np.isfinite(y)
+        if not np.any(valid):
+            return True
+        if self._limits is None:
+            return False
+
+        (x_min, x_max), (y_min, y_max) = self._limits
+        x = x[valid]
+        y = y[valid]
+        return bool(
+            x.min() >= x_min
+            and x.max() <= x_max
+            and y.min() >= y_min
+            and y.max() <= y_max
+        )
+
+    def _grow_limits(self, x: np.ndarray, y: np.ndarray):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        valid = np.isfinite(x) & np.isfinite(y)
+
+        new_limits = list()
+        for axis, data in enumerate((x[valid], y[valid])):
+            data_min, data_max = float(data.min()), float(data.max())
+            if self._limits is not None:
+                current_min, current_max = self._limits[axis]
+                data_min = min(data_min, current_min)
+                data_max = max(data_max, current_max)
+
+            span = data_max - data_min
+            if span == 0:
+                span = max(abs(data_min), 1.0)
+            new_limits.append(
+                (
+                    data_min - span * self.GROWTH_MARGIN,
+                    data_max + span * self.GROWTH_MARGIN,
+                )
+            )
+
+        self._limits = tuple(new_limits)
+
+    def _accumulate(self, x: np.ndarray, y: np.ndarray, values: np.ndarray):
+        if self._limits is None:
+            return
+
+        (x_min, x_max), (y_min, y_max) = self._limits
+        rows, columns = self._resolution
+
+        valid = np.isfinite(x) & np.isfinite(y) & np.isfinite(values)
+        valid &= (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
+        if not np.any(valid):
+            return
+
+        # NOTE: Points exactly on the upper limits go to the last bin.
+        columns_index = ((x[valid] - x_min) * (columns / (x_max - x_min))).astype(int)
+        rows_index = ((y[valid] - y_min) * (rows / (y_max - y_min))).astype(int)
+        np.minimum(columns_index, columns - 1, out=columns_index)
+        np.minimum(rows_index, rows - 1, out=rows_index)
+
+        np.add.at(self._sum, (rows_index, columns_index), values[valid])
+        np.add.at(self._count, (rows_index, columns_index), 1)
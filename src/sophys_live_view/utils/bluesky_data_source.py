@@ -1,6 +1,9 @@
 from abc import abstractmethod
 from collections import defaultdict
 from functools import partial
+import heapq
+import itertools
+import logging
 import typing
 
 from event_model import DocumentRouter, Event, EventDescriptor, RunStart, RunStop
@@ -10,7 +13,200 @@ from .data_source import DataSource
 
 
 class DocumentParser(DocumentRouter):
+    """
+    Parse Bluesky documents into the information used by the application.
+
+    Documents are handed to the `on_*` methods in start -> descriptor -> events ->
+    stop order for each run, even if they're received out of order (e.g. when a run's
+    documents are spread across Kafka partitions):
+
+    - Descriptors are held until the start document of their run is received.
+    - Events are held until their descriptor is received, and then handed in
+      `seq_num` order.
+    - Stop documents are held until all events declared in their `num_events` are
+      handed.
+
+    Held documents whose missing documents may never arrive can be handed anyway with
+    `flush_pending_documents`, e.g. after all the available documents were received.
+    Documents of runs whose start never arrives (e.g. when reading from the middle of
+    a run) are dropped by it instead.
+    """
+
+    def __init__(self):
+        DocumentRouter.__init__(self)
+
+        # NOTE: State of runs that started and didn't stop yet.
+        self._started_runs = set()
+        self._run_descriptors = defaultdict(list)
+        self._descriptor_runs = dict()
+        self._descriptor_names = dict()
+
+        self._pending_descriptors = defaultdict(list)
+        self._pending_events = defaultdict(list)
+        self._pending_stops = dict()
+
+        self._next_seq_nums = dict()
+        self._out_of_order_events = defaultdict(list)
+        self._event_counts = defaultdict(lambda: defaultdict(int))
+
+        self._document_counter = itertools.count()
+        # NOTE: Keys of the documents missing their start or descriptor at the last
+        # flush, dropped if still missing it at the next one.
+        self._orphan_keys = set()
+
+        self._parser_logger = logging.getLogger("sophys.live_view.document_parser")
+
     def start(self, doc: RunStart):
+        self._parse_start(doc)
+
+        start_uid = doc["uid"]
+        self._started_runs.add(start_uid)
+        for descriptor in self._pending_descriptors.pop(start_uid, []):
+            self.descriptor(descriptor)
+
+        self._hand_stop_maybe(start_uid)
+
+    def descriptor(self, doc: EventDescriptor):
+        start_uid = doc["run_start"]
+        if start_uid not in self._started_runs:
+            self._pending_descriptors[start_uid].append(self._held_document(doc))
+            return
+
+        self._parse_descriptor(doc)
+
+        descriptor_uid = doc["uid"]
+        self._run_descriptors[start_uid].append(descriptor_uid)
+        self._descriptor_runs[descriptor_uid] = start_uid
+        self._descriptor_names[descriptor_uid] = doc.get("name", "primary")
+        self._next_seq_nums.setdefault(descriptor_uid, 1)
+        for event in self._pending_events.pop(descriptor_uid, []):
+            self.event(event)
+
+        self._hand_stop_maybe(start_uid)
+
+    def event(self, doc: Event):
+        descriptor_uid = doc["descriptor"]
+        if descriptor_uid not in self._descriptor_runs:
+            self._pending_events[descriptor_uid].append(self._held_document(doc))
+            return
+
+        seq_num = doc["seq_num"]
+        next_seq_num = self._next_seq_nums[descriptor_uid]
+        if seq_num > next_seq_num:
+            heapq.heappush(
+                self._out_of_order_events[descriptor_uid],
+                (seq_num, next(self._document_counter), self._held_document(doc)),
+            )
+            return
+
+        self._hand_event(doc)
+
+        out_of_order_events = self._out_of_order_events.get(descriptor_uid, None)
+        while (
+            out_of_order_events
+            and out_of_order_events[0][0] <= self._next_seq_nums[descriptor_uid]
+        ):
+            self._hand_event(heapq.heappop(out_of_order_events)[2])
+        if out_of_order_events is not None and len(out_of_order_events) == 0:
+            del self._out_of_order_events[descriptor_uid]
+
+        self._hand_stop_maybe(self._descriptor_runs[descriptor_uid])
+
+    def stop(self, doc: RunStop):
+        self._pending_stops[doc["run_start"]] = doc
+        self._hand_stop_maybe(doc["run_start"])
+
+    def flush_pending_documents(self, *, discard_orphans: bool = False):
+        """
+        Hand the held events and stop documents of started runs, skipping the events
+        that are missing, instead of waiting for them.
+
+        Documents whose run start (or descriptor) is still missing are dropped if they
+        were already missing it at the previous flush, or right away if
+        `discard_orphans` is True (e.g. when no more documents will be received).
+        """
+        for descriptor_uid in list(self._out_of_order_events.keys()):
+            out_of_order_events = self._out_of_order_events.pop(descriptor_uid)
+            while out_of_order_events:
+                self._hand_event(heapq.heappop(out_of_order_events)[2])
+
+        for start_uid in list(self._pending_stops.keys()):
+            if start_uid in self._started_runs:
+                self._hand_stop(self._pending_stops.pop(start_uid))
+
+        orphan_keys = set()
+        dropped_documents = 0
+        for pending_documents in (
+            self._pending_descriptors,
+            self._pending_events,
+            self._pending_stops,
+        ):
+            for key in list(pending_documents.keys()):
+                if discard_orphans or key in self._orphan_keys:
+                    documents = pending_documents.pop(key)
+                    dropped_documents += (
+                        len(documents) if isinstance(documents, list) else 1
+                    )
+                else:
+                    orphan_keys.add(key)
+        self._orphan_keys = orphan_keys
+
+        if dropped_documents != 0:
+            self._parser_logger.warning(
+                "Dropped %d documents of runs whose start was never received.",
+                dropped_documents,
+            )
+
+    def _held_document(self, doc: dict) -> dict:
+        """
+        Get the document to hold until it can be handed. Subclasses whose documents
+        refer to memory that must be released soon (e.g. shared memory) copy it here.
+        """
+        return doc
+
+    def _hand_event(self, doc: Event):
+        descriptor_uid = doc["descriptor"]
+        self._next_seq_nums[descriptor_uid] = max(
+            self._next_seq_nums[descriptor_uid], doc["seq_num"] + 1
+        )
+
+        start_uid = self._descriptor_runs[descriptor_uid]
+        self._event_counts[start_uid][self._descriptor_names[descriptor_uid]] += 1
+
+        self._parse_event(doc)
+
+    def _hand_stop_maybe(self, start_uid: str):
+        stop = self._pending_stops.get(start_uid, None)
+        if stop is None or start_uid not in self._started_runs:
+            return
+
+        event_counts = self._event_counts[start_uid]
+        for stream_name, event_count in (stop.get("num_events", None) or {}).items():
+            if event_counts[stream_name] < event_count:
+                return
+
+        del self._pending_stops[start_uid]
+        self._hand_stop(stop)
+
+    def _hand_stop(self, doc: RunStop):
+        start_uid = doc["run_start"]
+
+        for descriptor_uid in self._run_descriptors.pop(start_uid, []):
+            # NOTE: Events missing for good, which will be skipped.
+            out_of_order_events = self._out_of_order_events.pop(descriptor_uid, [])
+            while out_of_order_events:
+                self._hand_event(heapq.heappop(out_of_order_events)[2])
+
+            del self._descriptor_runs[descriptor_uid]
+            del self._descriptor_names[descriptor_uid]
+            del self._next_seq_nums[descriptor_uid]
+
+        self._started_runs.discard(start_uid)
+        self._event_counts.pop(start_uid, None)
+
+        self._parse_stop(doc)
+
+    def _parse_start(self, doc: RunStart):
         display_name = str(doc.get("metadata_save_file_identifier", "unknown"))
         if display_name == "unknown":
             display_name = "scan " + str(doc.get("scan_id", "unknown"))
@@ -22,7 +218,7 @@ class DocumentParser(DocumentRouter):
 
         self.on_new_run_started(display_name, doc)
 
-    def descriptor(self, doc: EventDescriptor):
+    def _parse_descriptor(self, doc: EventDescriptor):
         start_uid = doc["run_start"]
         descriptor_uid = doc["uid"]
         descriptor_name = doc["name"]
@@ -46,9 +242,10 @@ class DocumentParser(DocumentRouter):
             fields,
             fields_name_map,
             extra_metadata,
+            doc["data_keys"],
         )
 
-    def event(self, doc: Event):
+    def _parse_event(self, doc: Event):
         descriptor_uid = doc["descriptor"]
         values = doc["data"]
         timestamp = doc["time"]
@@ -56,7 +253,7 @@ class DocumentParser(DocumentRouter):
 
         self.on_new_event(descriptor_uid, values, timestamp, seq_num)
 
-    def stop(self, doc: RunStop):
+    def _parse_stop(self, doc: RunStop):
         self.on_run_ended(doc["run_start"])
 
     @abstractmethod
@@ -72,6 +269,7 @@ class DocumentParser(DocumentRouter):
         fields: set[str],
         fields_name_map: dict[str, str],
         extra_metadata: dict[str, dict[str, typing.Any]],
+        data_keys: dict[str, dict[str, typing.Any]],
     ):
         pass
 
@@ -89,7 +287,7 @@ class DocumentParser(DocumentRouter):
 class BlueskyDataSource(DataSource, DocumentParser):
     def __init__(self):
         DataSource.__init__(self)
-        DocumentRouter.__init__(self)
+        DocumentParser.__init__(self)
 
         self._run_metadata = dict()
         self._descriptors = dict()
@@ -111,6 +309,7 @@ class BlueskyDataSource(DataSource, DocumentParser):
         fields: set[str],
         fields_name_map: dict[str, str],
         extra_metadata: dict[str, dict[str, typing.Any]],
+        data_keys: dict[str, dict[str, typing.Any]],
     ):
         # TODO: Support other streams
         if descriptor_name != "primary":
@@ -133,6 +332,16 @@ class BlueskyDataSource(DataSource, DocumentParser):
 
         metadata = self._run_metadata[start_uid]["metadata"]
         metadata["configuration"] = extra_metadata
+        metadata["data_keys"] = {
+            field: {
+                key: value
+                for key, value in field_info.items()
+                if key in ("dtype", "dtype_numpy", "precision", "shape")
+            }
+            for field, field_info in data_keys.items()
+        }
+        metadata["data_keys"]["time"] = {"dtype": "number", "shape": []}
+        metadata["data_keys"]["seq_num"] = {"dtype": "integer", "shape": []}
 
         self._descriptors[descriptor_uid] = start_uid
 
@@ -153,7 +362,11 @@ class BlueskyDataSource(DataSource, DocumentParser):
         if start_uid is None:
             return
 
-        received_data = {key: np.array([val]) for key, val in values.items()}
+        # NOTE: Arrays are wrapped without copying them, since they're only read
+        # until the aggregator copies them into its own storage.
+        received_data = {
+            key: np.expand_dims(np.asarray(val), 0) for key, val in values.items()
+        }
 
         start_metadata = self._run_metadata[start_uid]["metadata"]
         metadata = defaultdict(lambda: dict())
@@ -0,0 +1,289 @@
+from collections.abc import Sequence
+from dataclasses import dataclass
+import typing
+import warnings
+
+import numpy as np
+
+from .reference_resampling import ResampledReferenceCache
+
+# NOTE: Input key of the list of runs, for expressions using `runs`.
+_RUNS_INPUT = (None, None)
+
+
+def mean(values, axis: int = 0) -> np.ndarray:
+    """
+    Average of many arrays (e.g. ``mean(runs[-5:].det)``), ignoring missing values.
+
+    Positions missing (NaN) in all arrays are NaN in the result.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanmean(np.asarray(values, dtype=float), axis=axis)
+
+
+class RunSignals:
+    """Signals of a single run in a custom signal expression, as attributes or items."""
+
+    def __init__(self, uid: str, get_signal: typing.Callable[[str, str], np.ndarray]):
+        self._uid = uid
+        self._get_signal = get_signal
+
+    @property
+    def uid(self) -> str:
+        return self._uid
+
+    def __getattr__(self, signal_name: str) -> np.ndarray:
+        if signal_name.startswith("_"):
+            raise AttributeError(signal_name)
+        return self[signal_name]
+
+    def __getitem__(self, signal_name: str) -> np.ndarray:
+        return self._get_signal(self._uid, signal_name)
+
+
+class RunCollection(Sequence):
+    """
+    Runs available to custom signal expressions, as ``runs``, in the order they
+    were received.
+
+    Indexing with an integer gives the signals of a single run (e.g. ``runs[0].det``),
+    and with a string the run with that SubUID or display name. Slicing gives another
+    collection, whose signals are arrays with one row per run (e.g. ``runs[-5:].det``).
+
+    Parameters
+    ----------
+    runs : list of (str, str)
+        SubUID and display name of each run.
+    get_signal : callable
+        Get the data of a signal of a run, by SubUID and signal name.
+    """
+
+    def __init__(
+        self,
+        runs: list[tuple[str, str]],
+        get_signal: typing.Callable[[str, str], np.ndarray],
+    ):
+        self._runs = runs
+        self._get_signal = get_signal
+
+    def __len__(self) -> int:
+        return len(self._runs)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return RunCollection(self._runs[key], self._get_signal)
+
+        if isinstance(key, str):
+            for uid, display_name in self._runs:
+                if key in (uid, display_name):
+                    return RunSignals(uid, self._get_signal)
+            raise KeyError(key)
+
+        return RunSignals(self._runs[key][0], self._get_signal)
+
+    def __getattr__(self, signal_name: str) -> np.ndarray:
+        if signal_name.startswith("_"):
+            raise AttributeError(signal_name)
+        return np.array(
+            [self._get_signal(uid, signal_name) for uid, _ in self._runs],
+            dtype=float,
+            ndmin=2,
+        )
+
+
+@dataclass
+class _CachedResult:
+    expression: str
+    # NOTE: Version of each (uid, signal) the expression read.
+    inputs: dict
+    value: typing.Any
+
+
+class _Environment(dict):
+    """Evaluation environment resolving unknown names (e.g. signals) on demand."""
+
+    def __init__(self, base: dict, resolve: typing.Callable[[str], typing.Any]):
+        super().__init__(base)
+        self._resolve = resolve
+
+    def __missing__(self, name: str):
+        value = self._resolve(name)
+        self[name] = value
+        return value
+
+
+class CustomSignalEvaluator:
+    """
+    Evaluate custom signal expressions of runs, caching their results.
+
+    Besides the signals of its own run, an expression can read signals of other runs
+    through ``runs`` (see `RunCollection`). Those are aligned to the run the custom
+    signal belongs to, by linearly interpolating them over its first motor, or over
+    the point index when the runs don't share it. Points outside of the other run's
+    range, and signals the other run doesn't have, are NaN.
+
+    Every signal an expression reads is recorded with its data version, and the
+    result is reused while none of them changes. Aligned signals are cached as well,
+    so that when one of many input runs changes (e.g. averaging repeated scans while
+    the last one is live), only that run is aligned again.
+
+    Parameters
+    ----------
+    environment : dict
+        Names available to all expressions (e.g. numpy functions).
+    get_data : callable
+        Get the data of a signal of a run, by SubUID and signal name, or None.
+    get_data_version : callable
+        Get the data version of a signal of a run, by SubUID and signal name.
+    get_runs : callable
+        Get the SubUID and display name of all runs, in the order they were received.
+    get_alignment_signal : callable
+        Get the signal other runs are aligned over for a run, or None to use the
+        point index.
+    """
+
+    def __init__(
+        self,
+        environment: dict,
+        get_data: typing.Callable[[str, str], np.ndarray | None],
+        get_data_version: typing.Callable[[str, str], typing.Hashable],
+        get_runs: typing.Callable[[], list[tuple[str, str]]],
+        get_alignment_signal: typing.Callable[[str], str | None],
+    ):
+        self._environment = environment
+        self._get_data = get_data
+        self._get_data_version = get_data_version
+        self._get_runs = get_runs
+        self._get_alignment_signal = get_alignment_signal
+
+        self._results = dict()
+        self._resampled_cache = ResampledReferenceCache()
+        # NOTE: Custom signals being evaluated, to not evaluate them again while
+        # their inputs are ingested.
+        self._evaluating = set()
+
+    def evaluate(self, uid: str, name: str, expression: str) -> tuple[typing.Any, bool]:
+        """
+        Evaluate the custom signal `name` of the run `uid`.
+
+        Returns the value, and whether it changed since the last evaluation. Exceptions
+        raised by the expression are propagated.
+        """
+        key = (uid, name)
+        cached = self._results.get(key, None)
+        if (
+            cached is not None
+            and cached.expression == expression
+            and self._inputs_unchanged(cached.inputs)
+        ):
+            return cached.value, False
+
+        inputs = dict()
+
+        def resolve(signal_name: str):
+            if signal_name == "runs":
+                runs = self._get_runs()
+                inputs[_RUNS_INPUT] = tuple(run_uid for run_uid, _ in runs)
+                return RunCollection(runs, get_aligned)
+
+            # NOTE: Names that aren't signals of the run (e.g. builtins, like `abs`)
+            # are left for Python to resolve, so they aren't recorded as inputs.
+            data = self._get_data(uid, signal_name)
+            if data is None:
+                raise KeyError(signal_name)
+            inputs[(uid, signal_name)] = self._get_data_version(uid, signal_name)
+            return data
+
+        def get_aligned(run_uid: str, signal_name: str) -> np.ndarray:
+            return self._aligned(inputs, uid, run_uid, signal_name)
+
+        self._evaluating.add(key)
+        try:
+            value = eval(expression, {}, _Environment(self._environment, resolve))
+        finally:
+            self._evaluating.discard(key)
+
+        self._results[key] = _CachedResult(expression, inputs, value)
+        return value, True
+
+    def dependents(self, uid: str) -> list[tuple[str, str]]:
+        """
+        Get the (uid, name) of custom signals whose result may have changed because
+        of a change in the run `uid`, or because it's a new run.
+        """
+        dependents = list()
+        for key, cached in self._results.items():
+            if key in self._evaluating:
+                continue
+            if uid not in cached.inputs.get(_RUNS_INPUT, (uid,)) or any(
+                input_uid == uid for input_uid, _ in cached.inputs
+            ):
+                dependents.append(key)
+        return dependents
+
+    def discard(self, uid: str, name: str):
+        self._results.pop((uid, name), None)
+
+    def _inputs_unchanged(self, inputs: dict) -> bool:
+        for input_key, version in inputs.items():
+            if input_key == _RUNS_INPUT:
+                current = tuple(run_uid for run_uid, _ in self._get_runs())
+            else:
+                current = self._get_data_version(*input_key)
+            if current != version:
+                return False
+        return True
+
+    def _read(self, inputs: dict, uid: str, signal_name: str) -> np.ndarray | None:
+        inputs[(uid, signal_name)] = self._get_data_version(uid, signal_name)
+        return self._get_data(uid, signal_name)
+
+    def _aligned(
+        self, inputs: dict, target_uid: str, uid: str, signal_name: str
+    ) -> np.ndarray:
+        """Get a signal of the run `uid`, aligned to the run `target_uid`."""
+        values = self._read(inputs, uid, signal_name)
+        if uid == target_uid and values is not None:
+            return values
+
+        x_signal = self._get_alignment_signal(target_uid)
+        x, target_x = None, None
+        if x_signal is not None:
+            target_x = self._read(inputs, target_uid, x_signal)
+            x = self._read(inputs, uid, x_signal)
+        if target_x is None or x is None:
+            # NOTE: Without a common axis, align over the point index instead, up to
+            # the length of the signal in the target run, or of its first motor if it
+            # doesn't have the signal.
+            target_values = self._read(inputs, target_uid, signal_name)
+            if target_values is not None:
+                target_length = len(target_values)
+            elif target_x is not None:
+                target_length = len(target_x)
+            else:
+                raise KeyError(signal_name)
+            x_signal = None
+            target_x = np.arange(target_length)
+            if values is not None:
+                x = np.arange(len(values))
+
+        if values is None:
+            return np.full(len(target_x), np.nan)
+        if np.ndim(values) != 1 or np.ndim(x) != 1:
+            # NOTE: Grid signals aren't interpolated, only used as they are.
+            return values
+
+        length = min(len(x), len(values))
+        return self._resampled_cache.resample(
+            (uid, signal_name, x_signal),
+            (
+                self._get_data_version(uid, signal_name),
+                self._get_data_version(uid, x_signal) if x_signal else length,
+            ),
+            x[:length],
+            values[:length],
+            (target_uid, x_signal),
+            self._get_data_version(target_uid, x_signal) if x_signal else len(target_x),
+            target_x,
+        )
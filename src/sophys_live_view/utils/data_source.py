@@ -16,10 +16,20 @@ class DataSource(QThread):
     go_to_last_automatically = Signal(bool)  # Whether to auto-update the display or not
     loading_status = Signal(str, float)  # status message, completion percentage
 
+    # Whether this DataSource ends by itself once all of its data is loaded (e.g. a
+    # file), instead of streaming data for as long as it's open.
+    is_finite = False
+
     def start_thread(self):
         """Start processing this DataSource."""
         QThread.start(self)
 
     def close_thread(self):
-        """Stop processing this DataSource."""
-        QThread.terminate(self)
+        """
+        Ask this DataSource to stop processing.
+
+        The DataSource is expected to check `isInterruptionRequested` regularly and
+        return from `run` when it's set. Subclasses with other ways of stopping (e.g.
+        closing a connection) override this method instead.
+        """
+        self.requestInterruption()
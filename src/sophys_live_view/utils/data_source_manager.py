@@ -1,8 +1,10 @@
-from threading import Lock
+from collections import deque
+import logging
+from threading import Condition
 import time
 import uuid
 
-from qtpy.QtCore import QThread, Signal
+from qtpy.QtCore import Qt, QThread, Signal
 
 from .data_source import DataSource
 
@@ -13,11 +15,17 @@ class DataSourceManager(QThread):
 
     This entity is responsible for managing the lifecycle of DataSources once
     they're added to it, and proxying signal emittions with some data injection taking place.
+    Streams are identified by their SubUID, so a stream provided by more than one data
+    source is only proxied from the first one to provide it.
+
+    Data sources are started as soon as they're added. Finite data sources (e.g. files)
+    are the exception: only a limited number of them load at the same time, and the
+    others wait in a queue for them to finish.
 
     Parameters
     ----------
-    polling_time: float, optional
-        The polling time, in seconds, for new data sources. Defaults to 200ms.
+    max_finite_sources: int, optional
+        The maximum number of finite data sources loading at the same time. Defaults to 2.
     """
 
     # Here, we have a UID referent to the DataSource from which the data originates from,
@@ -36,33 +44,54 @@ class DataSourceManager(QThread):
         str, str, float
     )  # uid, status message, completion percentage
 
-    def __init__(self, polling_time: float = 0.2):
+    def __init__(self, max_finite_sources: int = 2):
         super().__init__()
 
-        self._polling_time = polling_time
+        self._max_finite_sources = max_finite_sources
 
         self._data_sources = dict()
-        self._data_sources_lock = Lock()
+        self._data_sources_condition = Condition()
 
-        self._unvisited_data_sources = set()
+        self._unvisited_data_sources = deque()
+        self._queued_finite_sources = deque()
+        self._running_finite_sources = set()
         self._visited_data_sources = set()
 
+        # NOTE: Data source providing each SubUID. The same run provided by another
+        # data source (e.g. restored from a snapshot and received again) is ignored.
+        self._stream_owners = dict()
+
+        self._stopping = False
+
+        self._logger = logging.getLogger("sophys.live_view.data_source_manager")
+
     def add_data_source(self, data_source: DataSource):
-        with self._data_sources_lock:
+        with self._data_sources_condition:
             data_source_uid = str(uuid.uuid4())
             self._data_sources[data_source_uid] = data_source
 
             def new_data_stream_wrapper(uid, *args):
+                owner = self._stream_owners.setdefault(uid, data_source_uid)
+                if owner != data_source_uid:
+                    self._logger.debug(
+                        "Ignoring stream %s, already provided by another data source.",
+                        uid,
+                    )
+                    return
                 self.new_data_stream.emit(data_source_uid, uid, *args)
 
             data_source.new_data_stream.connect(new_data_stream_wrapper)
 
             def new_data_received_wrapper(uid, *args):
+                if self._stream_owners.get(uid, data_source_uid) != data_source_uid:
+                    return
                 self.new_data_received.emit(data_source_uid, uid, *args)
 
             data_source.new_data_received.connect(new_data_received_wrapper)
 
             def data_stream_closed_wrapper(uid, *args):
+                if self._stream_owners.get(uid, data_source_uid) != data_source_uid:
+                    return
                 self.data_stream_closed.emit(data_source_uid, uid, *args)
 
             data_source.data_stream_closed.connect(data_stream_closed_wrapper)
@@ -79,30 +108,86 @@ class DataSourceManager(QThread):
 
             data_source.loading_status.connect(loading_status_wrapper)
 
-            self._unvisited_data_sources.add(data_source_uid)
+            if data_source.is_finite:
+                # NOTE: Called directly from the data source thread when it finishes,
+                # so that queued sources start even without an event loop running.
+                def finished_wrapper():
+                    with self._data_sources_condition:
+                        self._running_finite_sources.discard(data_source_uid)
+                        self._data_sources_condition.notify_all()
+
+                data_source.finished.connect(
+                    finished_wrapper, Qt.ConnectionType.DirectConnection
+                )
+
+            self._unvisited_data_sources.append(data_source_uid)
+            self._data_sources_condition.notify_all()
+
+    def _next_data_source(self) -> str | None:
+        """Pop the next data source that can be started, if any."""
+        if len(self._unvisited_data_sources) != 0:
+            data_source_uid = self._unvisited_data_sources.popleft()
+            if not self._data_sources[data_source_uid].is_finite:
+                return data_source_uid
+            self._queued_finite_sources.append(data_source_uid)
+
+        if (
+            len(self._queued_finite_sources) != 0
+            and len(self._running_finite_sources) < self._max_finite_sources
+        ):
+            data_source_uid = self._queued_finite_sources.popleft()
+            self._running_finite_sources.add(data_source_uid)
+            return data_source_uid
+
+        return None
 
     def run(self):
-        # Here we should pull from data sources which do not provide us with asynchronous data.
+        while True:
+            with self._data_sources_condition:
+                data_source_uid = None
+                while not self._stopping:
+                    data_source_uid = self._next_data_source()
+                    if data_source_uid is not None:
+                        break
+                    if len(self._unvisited_data_sources) == 0:
+                        self._data_sources_condition.wait()
+
+                if self._stopping:
+                    return
 
-        while not self.isInterruptionRequested():
-            with self._data_sources_lock:
-                if len(self._unvisited_data_sources) == 0:
-                    time.sleep(self._polling_time)
-
-                    continue
-
-                data_source_uid = self._unvisited_data_sources.pop()
                 data_source = self._data_sources[data_source_uid]
-
                 data_source.start_thread()
 
                 self._visited_data_sources.add(data_source_uid)
 
-    def stop(self):
-        self.requestInterruption()
+    def stop(self, timeout: float = 5.0):
+        """
+        Stop all data sources, waiting up to `timeout` seconds for them to finish.
+
+        Data sources are asked to stop, and are only terminated forcefully if they
+        don't stop in time.
+        """
+        with self._data_sources_condition:
+            self._stopping = True
+            self._data_sources_condition.notify_all()
+
+            data_sources = list(self._data_sources.values())
+
+        for data_source in data_sources:
+            data_source.close_thread()
+
+        # NOTE: Waiting without the lock, since finishing data sources take it.
+        deadline = time.monotonic() + timeout
+        for data_source in data_sources:
+            remaining_time = max(deadline - time.monotonic(), 0)
+            if data_source.wait(int(remaining_time * 1000)):
+                continue
+
+            self._logger.warning(
+                "Data source %s didn't stop in time. Terminating it.",
+                type(data_source).__name__,
+            )
+            data_source.terminate()
+            data_source.wait()
 
-        with self._data_sources_lock:
-            for data_source in self._data_sources.values():
-                data_source.close_thread()
-            for data_source in self._data_sources.values():
-                data_source.wait()
+        self.wait(int(max(deadline - time.monotonic(), 0) * 1000))
@@ -0,0 +1,77 @@
+"""
+Append-only log of Bluesky documents on local disk.
+
+Each record of the log is a (name, document) pair packed with msgpack-numpy, preceded
+by its size as a 4-byte little-endian unsigned integer.
+
+NOTE: This module is meant to be used on the RunEngine side too, so it must not
+import Qt.
+"""
+
+import os
+import struct
+
+import msgpack_numpy as msgpack
+
+RECORD_HEADER = struct.Struct("<I")
+
+
+def pack_document(name: str, document: dict) -> bytes:
+    """Pack a document into a complete log record."""
+    payload = msgpack.packb((name, document))
+    return RECORD_HEADER.pack(len(payload)) + payload
+
+
+def read_records(buffer, offset: int = 0) -> tuple[list[bytes], int]:
+    """
+    Get the payloads of the complete records in `buffer` starting at `offset`.
+
+    Returns the payloads and the offset right after the last complete record, from
+    where reading should continue once more data is available.
+    """
+    payloads = list()
+    size = len(buffer)
+    while offset + RECORD_HEADER.size <= size:
+        (payload_size,) = RECORD_HEADER.unpack_from(buffer, offset)
+        end = offset + RECORD_HEADER.size + payload_size
+        if end > size:
+            # NOTE: The record is still being written.
+            break
+
+        payloads.append(bytes(buffer[offset + RECORD_HEADER.size : end]))
+        offset = end
+    return payloads, offset
+
+
+class DocumentLogWriter:
+    """
+    RunEngine callback appending every document it receives to a document log.
+
+    For instance, ``RE.subscribe(DocumentLogWriter("/tmp/documents.log"))``.
+
+    Each record is written with a single unbuffered write, so that readers tailing
+    the log never see records out of order, and can rely on the size prefix to know
+    whether a record is complete.
+
+    Parameters
+    ----------
+    file_path : str or PathLike
+        Path of the log. Documents are appended to it if it already exists.
+    """
+
+    def __init__(self, file_path: str | os.PathLike):
+        self._file = open(file_path, "ab", buffering=0)
+
+    def __call__(self, name: str, document: dict):
+        record = memoryview(pack_document(name, document))
+        while len(record) > 0:
+            record = record[self._file.write(record) :]
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,115 @@
+import numpy as np
+
+# NOTE: float32 has ~7 significant decimal digits, so values displayed with more
+# decimal places than this are kept in float64.
+FLOAT32_MAX_PRECISION = 6
+
+
+class DtypePolicy:
+    """
+    Storage dtypes for signals, based on the `data_keys` entries of their descriptors.
+
+    - Integer signals (and `seq_num`) are stored as integers, instead of being upcast
+      to float64. The numpy dtype of the data key is used if available, and int64 is
+      used otherwise.
+    - Boolean signals are stored as booleans.
+    - Floating-point signals are stored as float64, or optionally as float32 for
+      detectors whose displayed precision fits in it (see ``float32_detectors``).
+    - Signals without a (known) scalar numeric dtype have no storage dtype, and are
+      stored as whatever dtype numpy infers for them.
+
+    Parameters
+    ----------
+    float32_detectors : bool, optional
+        Whether to store floating-point detector data as float32. Defaults to False.
+    """
+
+    def __init__(self, float32_detectors: bool = False):
+        self.float32_detectors = float32_detectors
+
+    def storage_dtype(
+        self, data_key: dict | None, *, is_detector: bool = False
+    ) -> np.dtype | None:
+        """Get the dtype to store a signal with the given `data_keys` entry, if any."""
+        if data_key is None or len(data_key.get("shape", None) or []) != 0:
+            return None
+
+        dtype = None
+        if "dtype_numpy" in data_key:
+            try:
+                dtype = np.dtype(data_key["dtype_numpy"])
+            except TypeError:
+                dtype = None
+            if dtype is not None and not (
+                np.issubdtype(dtype, np.number) or dtype == np.bool_
+            ):
+                return None
+
+        if dtype is None:
+            match data_key.get("dtype", None):
+                case "integer":
+                    dtype = np.dtype(np.int64)
+                case "boolean":
+                    dtype = np.dtype(np.bool_)
+                case "number":
+                    dtype = np.dtype(np.float64)
+                case _:
+                    return None
+
+        if (
+            self.float32_detectors
+            and is_detector
+            and np.issubdtype(dtype, np.floating)
+            and dtype.itemsize > 4
+        ):
+            precision = data_key.get("precision", None)
+            if isinstance(precision, int) and precision <= FLOAT32_MAX_PRECISION:
+                dtype = np.dtype(np.float32)
+
+        return dtype
+
+    @staticmethod
+    def needs_validity_mask(dtype: np.dtype | None) -> bool:
+        """Whether missing values of this dtype can't be represented with NaN."""
+        return dtype is not None and not np.issubdtype(dtype, np.inexact)
+
+    @staticmethod
+    def can_store(values: np.ndarray, dtype: np.dtype) -> bool:
+        """
+        Whether `values` can be stored with `dtype` without losing information, other
+        than the reduced precision of a float32 storage.
+        """
+        if np.can_cast(values.dtype, dtype, casting="safe"):
+            return True
+
+        if np.issubdtype(dtype, np.floating):
+            return values.dtype == np.bool_ or any(
+                np.issubdtype(values.dtype, kind) for kind in (np.integer, np.floating)
+            )
+
+        if np.issubdtype(dtype, np.integer) and np.issubdtype(values.dtype, np.integer):
+            if len(values) == 0:
+                return True
+            limits = np.iinfo(dtype)
+            return values.min() >= limits.min and values.max() <= limits.max
+
+        return False
+
+    @classmethod
+    def append(
+        cls, stored: np.ndarray | None, values, dtype: np.dtype | None
+    ) -> np.ndarray:
+        """
+        Append new values to the stored ones, keeping the storage dtype when possible.
+
+        If the new values can't be stored with that dtype (e.g. a float value arriving
+        for an integer signal), the whole storage is promoted instead of losing
+        information.
+        """
+        values = np.ravel(values)
+        if stored is None:
+            stored = np.empty(0, dtype=dtype if dtype is not None else values.dtype)
+
+        if cls.can_store(values, stored.dtype):
+            values = values.astype(stored.dtype, copy=False)
+        return np.concatenate((stored, values))
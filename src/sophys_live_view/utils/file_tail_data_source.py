@@ -0,0 +1,111 @@
+import logging
+import mmap
+import os
+import pathlib
+import time
+
+import msgpack_numpy as msgpack
+
+from .bluesky_data_source import BlueskyDataSource
+from .document_log import read_records
+
+
+class FileTailDataSource(BlueskyDataSource):
+    def __init__(self, file_path: str | os.PathLike, poll_interval: float = 0.005):
+        """
+        Data source tailing a document log on local disk (see `DocumentLogWriter`).
+
+        The documents already in the log are loaded first, and then new ones are read
+        as they're appended to it, without going through a broker.
+
+        Parameters
+        ----------
+        file_path : str or PathLike
+            Path of the log. If it doesn't exist yet, it is waited for.
+        poll_interval : float, optional
+            Time, in seconds, to wait before checking the log again when there's no
+            new data in it. Defaults to 5 ms.
+        """
+        super().__init__()
+
+        self._file_path = pathlib.Path(file_path)
+        self._poll_interval = poll_interval
+
+        self._offset = 0
+
+        self._logger = logging.getLogger("sophys.live_view.data_source.file_tail")
+
+        self._closed = False
+
+    def run(self):
+        _file = self._wait_for_file()
+        if _file is None:
+            return
+
+        with _file:
+            preload_size = os.fstat(_file.fileno()).st_size
+            preloading = preload_size > 0
+            if preloading:
+                self.go_to_last_automatically.emit(False)
+                self.loading_status.emit("Loading documents from log...", 0.0)
+
+            while not self._closed:
+                read_any = self._read_new_records(_file)
+
+                if preloading and self._offset >= preload_size:
+                    preloading = False
+                    self.flush_pending_documents(discard_orphans=True)
+                    self.go_to_last_automatically.emit(True)
+                    self.loading_status.emit("Loading documents from log...", 100.0)
+                elif preloading:
+                    self.loading_status.emit(
+                        "Loading documents from log...",
+                        100 * self._offset / preload_size,
+                    )
+
+                if not read_any:
+                    time.sleep(self._poll_interval)
+
+    def _wait_for_file(self):
+        while not self._closed:
+            try:
+                return open(self._file_path, "rb")
+            except FileNotFoundError:
+                time.sleep(self._poll_interval)
+        return None
+
+    def _read_new_records(self, _file) -> bool:
+        size = os.fstat(_file.fileno()).st_size
+        if size < self._offset:
+            self._logger.warning(
+                "Document log '%s' was truncated. Reading it from the start.",
+                self._file_path,
+            )
+            self._offset = 0
+        if size == self._offset:
+            return False
+
+        # NOTE: The file is mapped again each time it grows, since a mapping can't
+        # see past the size the file had when it was created.
+        with mmap.mmap(_file.fileno(), size, access=mmap.ACCESS_READ) as buffer:
+            payloads, offset = read_records(buffer, self._offset)
+
+        for payload in payloads:
+            if self._closed:
+                break
+
+            try:
+                document_type, document = msgpack.unpackb(payload)
+            except Exception:
+                self._logger.exception("Failed to decode document from log.")
+                continue
+
+            self._logger.debug("Received new document: %s", document_type)
+            self(document_type, document)
+
+        read_any = offset != self._offset
+        self._offset = offset
+        return read_any
+
+    def close_thread(self):
+        self._closed = True
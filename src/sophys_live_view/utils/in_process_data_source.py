@@ -0,0 +1,51 @@
+import logging
+import queue
+
+from event_model import DocumentRouter
+
+from .bluesky_data_source import BlueskyDataSource
+
+
+class InProcessDataSource(BlueskyDataSource):
+    def __init__(self):
+        """
+        Data source receiving documents from a RunEngine in the same process.
+
+        It's a RunEngine callback, i.e. ``RE.subscribe(data_source)``. Documents are
+        only put in a queue by the RunEngine thread, and are parsed in this data
+        source's own thread, without serializing them, so that it adds as little
+        latency as possible to the acquisition.
+        """
+        super().__init__()
+
+        self._documents = queue.SimpleQueue()
+
+        self._logger = logging.getLogger("sophys.live_view.data_source.in_process")
+
+        self._closed = False
+
+    def __call__(self, name: str, document: dict):
+        """Receive a document from the RunEngine. Safe to call from any thread."""
+        if self._closed:
+            return
+
+        # NOTE: The start document is used as the run metadata, which is modified
+        # afterwards, so it must not be the one shared with the other callbacks.
+        if name == "start":
+            document = dict(document)
+        self._documents.put((name, document))
+
+    def run(self):
+        self.go_to_last_automatically.emit(True)
+
+        while not self._closed:
+            try:
+                document_type, document = self._documents.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            self._logger.debug("Received new document: %s", document_type)
+            DocumentRouter.__call__(self, document_type, document)
+
+    def close_thread(self):
+        self._closed = True
@@ -5,6 +5,8 @@ from .bluesky_data_source import BlueskyDataSource
 
 
 class JSONDataSource(BlueskyDataSource):
+    is_finite = True
+
     def __init__(self, file_path: str):
         super().__init__()
 
@@ -18,6 +20,9 @@ class JSONDataSource(BlueskyDataSource):
             file_contents = json.load(_f)
 
         for document_type, document in file_contents:
+            if self.isInterruptionRequested():
+                return
             self(document_type, document)
+        self.flush_pending_documents(discard_orphans=True)
 
         self.loading_status.emit("Loading JSON file...", 100.0)
@@ -0,0 +1,129 @@
+from dataclasses import dataclass
+import json
+import logging
+import os
+import pathlib
+import tempfile
+import typing
+
+if typing.TYPE_CHECKING:
+    from kafka import TopicPartition
+
+DEFAULT_CHECKPOINT_PATH = (
+    pathlib.Path(os.environ.get("XDG_CACHE_HOME", pathlib.Path.home() / ".cache"))
+    / "sophys_live_view"
+    / "kafka_checkpoint.json"
+)
+
+_CHECKPOINT_FORMAT_VERSION = 1
+
+_logger = logging.getLogger("sophys.live_view.kafka_checkpoint")
+
+
+@dataclass(frozen=True)
+class PartitionCheckpoint:
+    """
+    Where consumption of a topic partition was at when the checkpoint was made.
+
+    Attributes
+    ----------
+    processed_offset : int
+        Offset of the next message to process, i.e. all previous messages were
+        processed.
+    oldest_run_offset : int
+        Offset of the first message, in this partition, of the oldest run being
+        displayed, whether it stopped or not. Seeking to it repopulates all runs that
+        were being displayed.
+    """
+
+    processed_offset: int
+    oldest_run_offset: int
+
+
+class CheckpointFile:
+    """
+    JSON file with the consumer checkpoints of each topic partition.
+
+    The file is replaced atomically when saving, so that a crash while writing it
+    never leaves a corrupted checkpoint behind. Checkpoints of partitions not being
+    saved (e.g. of topics consumed by another instance) are kept.
+    """
+
+    def __init__(self, path: str | os.PathLike = DEFAULT_CHECKPOINT_PATH):
+        self._path = pathlib.Path(path)
+
+    @property
+    def path(self) -> pathlib.Path:
+        return self._path
+
+    def load(self) -> dict["TopicPartition", PartitionCheckpoint]:
+        """Read the checkpoints in the file, or an empty dict if it can't be read."""
+        from kafka import TopicPartition
+
+        try:
+            with open(self._path) as _f:
+                contents = json.load(_f)
+        except FileNotFoundError:
+            return dict()
+        except (OSError, ValueError):
+            _logger.exception("Failed to read checkpoint file '%s'.", self._path)
+            return dict()
+
+        if contents.get("version", None) != _CHECKPOINT_FORMAT_VERSION:
+            _logger.warning(
+                "Ignoring checkpoint file '%s' with an unknown format.", self._path
+            )
+            return dict()
+
+        checkpoints = dict()
+        for topic, partitions in contents.get("partitions", {}).items():
+            for partition, checkpoint in partitions.items():
+                try:
+                    checkpoints[TopicPartition(topic, int(partition))] = (
+                        PartitionCheckpoint(
+                            int(checkpoint["processed_offset"]),
+                            int(checkpoint["oldest_run_offset"]),
+                        )
+                    )
+                except (KeyError, TypeError, ValueError):
+                    _logger.warning(
+                        "Ignoring invalid checkpoint of partition %s of '%s'.",
+                        partition,
+                        topic,
+                    )
+        return checkpoints
+
+    def save(self, checkpoints: dict["TopicPartition", PartitionCheckpoint]):
+        """Write the checkpoints to the file, keeping the ones of other partitions."""
+        all_checkpoints = self.load()
+        all_checkpoints.update(checkpoints)
+
+        partitions = dict()
+        for topic_partition, checkpoint in sorted(all_checkpoints.items()):
+            partitions.setdefault(topic_partition.topic, dict())[
+                str(topic_partition.partition)
+            ] = {
+                "processed_offset": checkpoint.processed_offset,
+                "oldest_run_offset": checkpoint.oldest_run_offset,
+            }
+
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+
+        # NOTE: Write to a temporary file in the same directory, so that it can be
+        # atomically renamed over the previous checkpoint.
+        file_descriptor, temporary_path = tempfile.mkstemp(
+            prefix=f".{self._path.name}.", dir=self._path.parent
+        )
+        try:
+            with os.fdopen(file_descriptor, "w") as _f:
+                json.dump(
+                    {"version": _CHECKPOINT_FORMAT_VERSION, "partitions": partitions},
+                    _f,
+                    indent=2,
+                )
+                _f.flush()
+                os.fsync(_f.fileno())
+            os.replace(temporary_path, self._path)
+        except BaseException:
+            pathlib.Path(temporary_path).unlink(missing_ok=True)
+            raise
@@ -1,44 +1,168 @@
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 import logging
+import os
+import re
+import time
 import typing
 
-from kafka import KafkaConsumer, TopicPartition
-import msgpack_numpy as msgpack
-
 from .bluesky_data_source import BlueskyDataSource
+from .kafka_checkpoint import CheckpointFile, PartitionCheckpoint
+
+# NOTE: The Kafka client is only imported when consuming starts, off the startup path.
+if typing.TYPE_CHECKING:
+    from kafka import KafkaConsumer, TopicPartition
 
 
 class KafkaDataSource(BlueskyDataSource):
+    # NOTE: Time, in seconds, between checkpoints of the consumed offsets.
+    CHECKPOINT_INTERVAL = 5.0
+    # NOTE: Minimum time, in seconds, between flushes of the pending documents while
+    # there are no new messages.
+    FLUSH_INTERVAL = 1.0
+
     def __init__(
         self,
-        topic_name: str,
+        topic_names: list[str] | str,
         bootstrap_servers: list[str],
         hour_offset: typing.Optional[int] = None,
+        decode_workers: int = 0,
+        *,
+        topic_pattern: str | None = None,
+        checkpoint_path: str | os.PathLike | None = None,
+        resume: bool = False,
     ):
+        """
+        Parameters
+        ----------
+        topic_names : list[str] or str
+            Topics to subscribe to, all with a single consumer.
+        decode_workers : int, optional
+            Number of worker processes for decoding messages. If 0 (the default),
+            messages are decoded in this thread.
+        topic_pattern : str, optional
+            Regular expression for subscribing to all topics fully matching it, in
+            addition to `topic_names`. Topics created later are subscribed to as well.
+        checkpoint_path : str or PathLike, optional
+            File to periodically checkpoint the consumed offsets of each partition to.
+            If not provided, no checkpoints are made.
+        resume : bool, optional
+            Whether to start consuming from the offsets in the checkpoint file, which
+            repopulates the runs displayed by the previous session. Partitions without
+            a checkpoint start as they would otherwise. Defaults to False.
+        """
         super().__init__()
 
-        self._topic_name = topic_name
+        if isinstance(topic_names, str):
+            topic_names = [topic_names]
+        self._topic_names = list(topic_names)
+        self._topic_pattern = (
+            re.compile(topic_pattern) if topic_pattern is not None else None
+        )
         self._bootstrap_servers = bootstrap_servers
         self._hour_offset = hour_offset
+        self._decode_workers = decode_workers
+
+        self._checkpoint_file = (
+            CheckpointFile(checkpoint_path) if checkpoint_path is not None else None
+        )
+        self._resume = resume
+        self._last_checkpoint = None
+        self._last_checkpoint_time = 0.0
+        self._last_flush_time = 0.0
+
+        # NOTE: Runs whose start was handed on, which stay displayed even after they
+        # stop, and the offset of the first of their messages in each partition.
+        self._displayed_runs = set()
+        self._oldest_run_offsets = dict()
+        # NOTE: Offset of the first message of each run (or of each descriptor, for
+        # events) not displayed yet in each partition, in case its start arrives later.
+        self._first_run_offsets = defaultdict(dict)
+        # NOTE: Run of each descriptor received, until the run ends.
+        self._descriptor_starts = dict()
+
+        self._start_offsets = dict()
+        self._end_offsets = dict()
+        self._processed_offsets = dict()
+        self._sent_completed_status = False
+
+        # NOTE: Progress is aggregated over all partitions that have messages to preload.
+        self._preloading_partitions = set()
+        self._preload_total = 0
+        self._preload_done = 0
+
+        self._current_topic = None
 
         self._logger = logging.getLogger("sophys.live_view.data_source.kafka")
 
         self._closed = False
 
+    def _resolve_topics(self, consumer: "KafkaConsumer") -> list[str]:
+        topics = list(self._topic_names)
+        if self._topic_pattern is not None:
+            topics.extend(
+                topic
+                for topic in sorted(consumer.topics())
+                if self._topic_pattern.fullmatch(topic) and topic not in topics
+            )
+        return topics
+
+    @staticmethod
+    def _topic_partitions(
+        consumer: "KafkaConsumer", topics: list[str]
+    ) -> list["TopicPartition"]:
+        from kafka import TopicPartition
+
+        return [
+            TopicPartition(topic, p)
+            for topic in topics
+            for p in sorted(consumer.partitions_for_topic(topic) or ())
+        ]
+
+    def _subscribe_to_new_topics(self, consumer: "KafkaConsumer"):
+        """Subscribe to topics matching the topic pattern created since the last check."""
+        assigned_partitions = consumer.assignment()
+        new_partitions = [
+            p
+            for p in self._topic_partitions(consumer, self._resolve_topics(consumer))
+            if p not in assigned_partitions
+        ]
+        if len(new_partitions) == 0:
+            return
+
+        self._logger.info(
+            "Subscribing to new topics: %s",
+            sorted(set(p.topic for p in new_partitions)),
+        )
+        consumer.assign(list(assigned_partitions) + new_partitions)
+        consumer.seek_to_beginning(*new_partitions)
+
     def run(self):
+        from kafka import KafkaConsumer
+        import msgpack_numpy as msgpack
+
+        from .parallel_decoding import OrderedDecoder
+
+        decoder = None
+        if self._decode_workers > 0:
+            decoder = OrderedDecoder(self._decode_workers)
+
         consumer = KafkaConsumer(
-            self._topic_name,
             bootstrap_servers=self._bootstrap_servers,
-            value_deserializer=msgpack.unpackb,
-            consumer_timeout_ms=250,
+            # NOTE: With decoding workers, the raw bytes are handed to them instead.
+            value_deserializer=msgpack.unpackb if decoder is None else None,
         )
 
-        all_partitions = [
-            TopicPartition(self._topic_name, p)
-            for p in consumer.partitions_for_topic(self._topic_name)
-        ]
+        all_partitions = self._topic_partitions(
+            consumer, self._resolve_topics(consumer)
+        )
+        consumer.assign(all_partitions)
+
+        end_offsets = consumer.end_offsets(all_partitions)
+        self._end_offsets = dict(end_offsets)
+        # NOTE: Without seeking, consumption starts at the end of each partition.
+        self._start_offsets = dict(end_offsets)
 
-        start_offset = 0
         if self._hour_offset:
             now = datetime.now(timezone.utc)
             hour_offset = int(
@@ -51,43 +175,270 @@ class KafkaDataSource(BlueskyDataSource):
             for partition, offset_ts in timestamp_offsets.items():
                 if offset_ts is not None:
                     consumer.seek(partition, offset_ts.offset)
-                    start_offset = offset_ts.offset
+                    self._start_offsets[partition] = offset_ts.offset
 
-        end_offsets = consumer.end_offsets(all_partitions)
-        current_offset = list(end_offsets.values())[0]
+        if self._resume:
+            self._seek_to_checkpoints(consumer, all_partitions)
 
-        sent_completed_status = False
-        while not self._closed:
-            for message in consumer:
-                if self._closed:
-                    break
+        self._start_preloading()
 
-                self._logger.debug("Received new message: %s", str(message))
+        try:
+            while not self._closed:
+                # NOTE: The consumer fetches from all assigned partitions concurrently,
+                # and returns the messages grouped by partition.
+                records = consumer.poll(timeout_ms=250)
 
-                done_preloading = message.offset + 1 >= current_offset
-                self.go_to_last_automatically.emit(done_preloading)
+                for topic_partition, messages in records.items():
+                    for message in messages:
+                        if self._closed:
+                            break
 
-                document_type, document = message.value
+                        self._logger.debug("Received new message: %s", str(message))
 
-                if not sent_completed_status and document_type in (
-                    "start",
-                    "event",
-                    "stop",
-                ):
-                    if done_preloading:
-                        completion_percent = 100.0
-                        sent_completed_status = True
-                    else:
-                        completion_percent = (
-                            100
-                            * (message.offset - start_offset + 1)
-                            / (current_offset - start_offset)
+                        if decoder is None:
+                            self._handle_message(
+                                topic_partition, message.offset, message.value
+                            )
+                            continue
+
+                        decoder.submit(
+                            topic_partition,
+                            (topic_partition, message.offset),
+                            message.value,
                         )
-                    self.loading_status.emit(
-                        "Loading runs from Kafka...", completion_percent
+
+                if decoder is not None:
+                    # NOTE: Wait for the remaining messages when there's nothing new.
+                    for (partition, offset), value in decoder.ready(
+                        wait=decoder.is_full() or len(records) == 0
+                    ):
+                        self._handle_message(partition, offset, value)
+
+                if (
+                    len(records) == 0
+                    and not self._closed
+                    and time.monotonic() - self._last_flush_time > self.FLUSH_INTERVAL
+                ):
+                    # NOTE: Everything available was received, so whatever documents
+                    # are still missing won't arrive anytime soon.
+                    self._last_flush_time = time.monotonic()
+                    self.flush_pending_documents()
+
+                    if self._topic_pattern is not None:
+                        self._subscribe_to_new_topics(consumer)
+
+                if time.monotonic() - self._last_checkpoint_time > (
+                    self.CHECKPOINT_INTERVAL
+                ):
+                    self._save_checkpoint()
+        finally:
+            if decoder is not None:
+                decoder.close()
+
+            self._save_checkpoint()
+
+    def _seek_to_checkpoints(
+        self, consumer: "KafkaConsumer", partitions: list["TopicPartition"]
+    ):
+        """Seek the partitions with a checkpoint to the start of their oldest run."""
+        if self._checkpoint_file is None:
+            self._logger.warning("Can't resume without a checkpoint file.")
+            return
+
+        checkpoints = self._checkpoint_file.load()
+        partitions = [p for p in partitions if p in checkpoints]
+        if len(partitions) == 0:
+            self._logger.warning(
+                "No checkpoints found in '%s'. Not resuming.",
+                self._checkpoint_file.path,
+            )
+            return
+
+        beginning_offsets = consumer.beginning_offsets(partitions)
+        for partition in partitions:
+            checkpoint = checkpoints[partition]
+            offset = min(checkpoint.oldest_run_offset, checkpoint.processed_offset)
+
+            # NOTE: Messages may have been deleted by the retention policy since then.
+            if offset < beginning_offsets[partition]:
+                self._logger.warning(
+                    "Messages of %s since the checkpoint were partially deleted. "
+                    "Resuming from the oldest available one.",
+                    str(partition),
+                )
+                offset = beginning_offsets[partition]
+            offset = min(offset, self._end_offsets[partition])
+
+            consumer.seek(partition, offset)
+            self._start_offsets[partition] = offset
+
+        self._logger.info(
+            "Resuming %d partitions from '%s'.",
+            len(partitions),
+            self._checkpoint_file.path,
+        )
+
+    def _run_of(self, run_key: tuple[str, str]) -> str | None:
+        kind, uid = run_key
+        if kind == "descriptor":
+            return self._descriptor_starts.get(uid, None)
+        return uid
+
+    @staticmethod
+    def _run_key(document_type: str, document: dict) -> tuple[str, str] | None:
+        match document_type:
+            case "start":
+                return ("run", document["uid"])
+            case "descriptor" | "stop":
+                return ("run", document["run_start"])
+            case "event" | "event_page":
+                return ("descriptor", document["descriptor"])
+        return None
+
+    def _track_run_offset(
+        self, topic_partition: "TopicPartition", offset: int, run_key: tuple[str, str]
+    ):
+        if self._run_of(run_key) in self._displayed_runs:
+            self._oldest_run_offsets.setdefault(topic_partition, offset)
+        else:
+            self._first_run_offsets[topic_partition].setdefault(run_key, offset)
+
+    def _run_displayed(self, run_keys: list[tuple[str, str]]):
+        """Count the messages of runs that got displayed towards the oldest run."""
+        for partition, run_offsets in self._first_run_offsets.items():
+            for run_key in run_keys:
+                offset = run_offsets.pop(run_key, None)
+                if offset is not None:
+                    self._oldest_run_offsets[partition] = min(
+                        offset, self._oldest_run_offsets.get(partition, offset)
                     )
 
-                self(document_type, document)
+    def _checkpoints(self) -> dict["TopicPartition", PartitionCheckpoint]:
+        checkpoints = dict()
+        for partition, processed_offset in self._processed_offsets.items():
+            checkpoints[partition] = PartitionCheckpoint(
+                processed_offset,
+                self._oldest_run_offsets.get(partition, processed_offset),
+            )
+        return checkpoints
+
+    def flush_pending_documents(self, *, discard_orphans: bool = False):
+        super().flush_pending_documents(discard_orphans=discard_orphans)
+
+        # NOTE: Documents of runs that were never displayed may have been dropped.
+        pending_keys = set(("run", uid) for uid in self._pending_descriptors)
+        pending_keys.update(("run", uid) for uid in self._pending_stops)
+        pending_keys.update(("descriptor", uid) for uid in self._pending_events)
+        for run_offsets in self._first_run_offsets.values():
+            for run_key in list(run_offsets.keys()):
+                if run_key not in pending_keys:
+                    del run_offsets[run_key]
+        for descriptor_uid, start_uid in list(self._descriptor_starts.items()):
+            if (
+                start_uid not in self._displayed_runs
+                and ("run", start_uid) not in pending_keys
+            ):
+                del self._descriptor_starts[descriptor_uid]
+
+    def _save_checkpoint(self):
+        self._last_checkpoint_time = time.monotonic()
+        if self._checkpoint_file is None:
+            return
+
+        checkpoints = self._checkpoints()
+        if checkpoints == self._last_checkpoint:
+            return
+
+        try:
+            self._checkpoint_file.save(checkpoints)
+        except OSError:
+            self._logger.exception(
+                "Failed to save checkpoint to '%s'.", self._checkpoint_file.path
+            )
+            return
+        self._last_checkpoint = checkpoints
+
+    def _start_preloading(self):
+        self._processed_offsets = dict(self._start_offsets)
+        self._preloading_partitions = set(
+            partition
+            for partition, end_offset in self._end_offsets.items()
+            if end_offset > self._start_offsets.get(partition, end_offset)
+        )
+        self._preload_total = sum(
+            self._end_offsets[p] - self._start_offsets[p]
+            for p in self._preloading_partitions
+        )
+        self._preload_done = 0
+
+    def _handle_message(self, topic_partition: "TopicPartition", offset: int, value):
+        previous_offset = self._processed_offsets.get(topic_partition, offset)
+        self._processed_offsets[topic_partition] = offset + 1
+
+        if topic_partition in self._preloading_partitions:
+            end_offset = self._end_offsets[topic_partition]
+            self._preload_done += min(offset + 1, end_offset) - min(
+                previous_offset, end_offset
+            )
+            if offset + 1 >= end_offset:
+                self._preloading_partitions.discard(topic_partition)
+
+        done_preloading = len(self._preloading_partitions) == 0
+        self.go_to_last_automatically.emit(done_preloading)
+
+        document_type, document = value
+
+        if document_type == "descriptor":
+            self._descriptor_starts[document["uid"]] = document["run_start"]
+        run_key = self._run_key(document_type, document)
+        if run_key is not None:
+            self._track_run_offset(topic_partition, offset, run_key)
+
+        if not self._sent_completed_status and document_type in (
+            "start",
+            "event",
+            "stop",
+        ):
+            if done_preloading:
+                completion_percent = 100.0
+                self._sent_completed_status = True
+            else:
+                completion_percent = 100 * self._preload_done / self._preload_total
+            self.loading_status.emit("Loading runs from Kafka...", completion_percent)
+
+        self._current_topic = topic_partition.topic
+        self(document_type, document)
+
+        if document_type == "start":
+            start_uid = document["uid"]
+            self._displayed_runs.add(start_uid)
+            self._run_displayed(
+                [("run", start_uid)]
+                + [
+                    ("descriptor", descriptor_uid)
+                    for descriptor_uid, run_uid in self._descriptor_starts.items()
+                    if run_uid == start_uid
+                ]
+            )
+        elif (
+            document_type == "descriptor"
+            and document["run_start"] in self._displayed_runs
+        ):
+            self._run_displayed([("descriptor", document["uid"])])
+
+    def on_new_run_started(self, display_name: str, metadata: dict):
+        # NOTE: Tag the run with its topic, so that runs can be filtered by it.
+        if self._current_topic is not None:
+            metadata["topic"] = self._current_topic
+
+        super().on_new_run_started(display_name, metadata)
+
+    def on_run_ended(self, start_uid):
+        for descriptor_uid, run_uid in list(self._descriptor_starts.items()):
+            if run_uid == start_uid:
+                del self._descriptor_starts[descriptor_uid]
+
+        super().on_run_ended(start_uid)
 
     def close_thread(self):
         self._closed = True
@@ -0,0 +1,173 @@
+"""
+Decoding of msgpack-numpy messages in a pool of worker processes.
+
+NOTE: This module is imported by the worker processes, so it must not import Qt.
+"""
+
+from collections import defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+import logging
+import multiprocessing
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import typing
+
+import msgpack_numpy as msgpack
+import numpy as np
+
+# NOTE: Smaller arrays are cheaper to pickle than to pass through shared memory.
+DEFAULT_SHARED_MEMORY_THRESHOLD = 64 * 1024
+
+_logger = logging.getLogger("sophys.live_view.parallel_decoding")
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """Description of a numpy array placed in a shared memory block by a worker."""
+
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+
+def _create_shared_memory(size: int) -> SharedMemory:
+    try:
+        return SharedMemory(create=True, size=size, track=False)
+    except TypeError:
+        # NOTE: Before Python 3.13, the block is always tracked, and the resource tracker
+        # would destroy it when the worker exits, before the main process reads it.
+        shared_memory = SharedMemory(create=True, size=size)
+        resource_tracker.unregister(shared_memory._name, "shared_memory")
+        return shared_memory
+
+
+def _share_arrays(value, threshold: int):
+    if isinstance(value, np.ndarray):
+        if value.nbytes < threshold or value.dtype.hasobject:
+            return value
+
+        shared_memory = _create_shared_memory(value.nbytes)
+        np.ndarray(value.shape, dtype=value.dtype, buffer=shared_memory.buf)[...] = (
+            value
+        )
+        shared_array = SharedArray(shared_memory.name, value.shape, value.dtype.str)
+        shared_memory.close()
+        return shared_array
+    if isinstance(value, dict):
+        return {k: _share_arrays(v, threshold) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_share_arrays(v, threshold) for v in value]
+    if isinstance(value, tuple):
+        return tuple(_share_arrays(v, threshold) for v in value)
+    return value
+
+
+def decode_message(
+    raw_message: bytes, shared_memory_threshold: int = DEFAULT_SHARED_MEMORY_THRESHOLD
+):
+    """
+    Decode a msgpack-numpy message, moving large numpy arrays to shared memory.
+
+    Meant to be run in a worker process. The result must be passed through
+    `attach_shared_arrays` in the receiving process.
+    """
+    return _share_arrays(msgpack.unpackb(raw_message), shared_memory_threshold)
+
+
+def attach_shared_arrays(value):
+    """Replace `SharedArray` descriptions by copies of their arrays, releasing their memory."""
+    if isinstance(value, SharedArray):
+        shared_memory = SharedMemory(name=value.name)
+        try:
+            return np.ndarray(
+                value.shape, dtype=np.dtype(value.dtype), buffer=shared_memory.buf
+            ).copy()
+        finally:
+            shared_memory.close()
+            shared_memory.unlink()
+    if isinstance(value, dict):
+        return {k: attach_shared_arrays(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [attach_shared_arrays(v) for v in value]
+    if isinstance(value, tuple):
+        return tuple(attach_shared_arrays(v) for v in value)
+    return value
+
+
+class OrderedDecoder:
+    """
+    Decode messages in a pool of worker processes, handing them back in order.
+
+    Messages are submitted with an ordering key (e.g. their topic partition), and
+    results are returned in submission order for each key, while messages of
+    different keys don't wait on each other.
+
+    Parameters
+    ----------
+    workers : int
+        Number of worker processes.
+    max_pending : int, optional
+        Number of messages being decoded at once above which `is_full` is True, so
+        that the caller can wait for them. Defaults to 16 times the number of workers.
+    """
+
+    def __init__(self, workers: int, max_pending: int | None = None):
+        # NOTE: Forking a process with running Qt threads is unsafe.
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self._max_pending = max_pending if max_pending is not None else 16 * workers
+
+        self._pending = defaultdict(deque)
+        self._pending_count = 0
+
+    def __len__(self):
+        return self._pending_count
+
+    def is_full(self) -> bool:
+        return self._pending_count >= self._max_pending
+
+    def submit(self, key: typing.Hashable, context, raw_message: bytes):
+        """Submit a raw message for decoding, along with some context returned with it."""
+        future = self._executor.submit(decode_message, raw_message)
+        self._pending[key].append((context, future))
+        self._pending_count += 1
+
+    def ready(
+        self, wait: bool = False
+    ) -> typing.Iterator[tuple[typing.Any, typing.Any]]:
+        """
+        Get the (context, decoded message) of messages that finished decoding, in
+        order for each key. If `wait` is True, wait for all messages to finish.
+
+        Messages that failed to be decoded are logged and skipped.
+        """
+        for key in list(self._pending.keys()):
+            queue = self._pending[key]
+            while len(queue) > 0 and (wait or queue[0][1].done()):
+                context, future = queue.popleft()
+                self._pending_count -= 1
+                try:
+                    message = future.result()
+                except Exception:
+                    _logger.exception("Failed to decode message (%s).", str(context))
+                    continue
+                yield context, attach_shared_arrays(message)
+            if len(queue) == 0:
+                del self._pending[key]
+
+    def close(self):
+        """Stop the workers, releasing the memory of messages that were never handed back."""
+        for queue in self._pending.values():
+            for _, future in queue:
+                future.add_done_callback(self._release_result)
+        self._pending.clear()
+        self._pending_count = 0
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _release_result(future: Future):
+        if not future.cancelled() and future.exception() is None:
+            attach_shared_arrays(future.result())
@@ -0,0 +1,117 @@
+from dataclasses import dataclass
+import typing
+
+import numpy as np
+
+
+@dataclass
+class _PreparedReference:
+    version: typing.Hashable
+    x: np.ndarray
+    y: np.ndarray
+
+
+@dataclass
+class _ResampledReference:
+    reference_version: typing.Hashable
+    x_version: typing.Hashable
+    x: np.ndarray
+    values: np.ndarray
+
+
+class ResampledReferenceCache:
+    """
+    Cache of reference curves linearly resampled onto the X grid of other curves.
+
+    Reference curves are identified by a key, and have a version that must change
+    whenever their data changes. Resampled values are kept per (reference key,
+    target key) pair, and are reused while both versions are unchanged. When only the
+    target X grid changes by having values appended to it (e.g. in a live run), only
+    the new points are resampled.
+
+    Points of the target grid outside the range of the reference are resampled to NaN.
+    """
+
+    def __init__(self):
+        self._prepared_references = dict()
+        self._resampled_references = dict()
+
+    def clear(self):
+        self._prepared_references.clear()
+        self._resampled_references.clear()
+
+    def resample(
+        self,
+        reference_key: typing.Hashable,
+        reference_version: typing.Hashable,
+        reference_x: np.ndarray,
+        reference_y: np.ndarray,
+        target_key: typing.Hashable,
+        x_version: typing.Hashable,
+        x: np.ndarray,
+    ) -> np.ndarray:
+        """Get the reference y(x) resampled onto `x`, reusing cached values when possible."""
+        key = (reference_key, target_key)
+        state = self._resampled_references.get(key, None)
+
+        if state is not None and state.reference_version == reference_version:
+            if state.x_version == x_version:
+                return state.values
+
+            previous_length = len(state.x)
+            if len(x) >= previous_length and np.array_equal(
+                x[:previous_length], state.x, equal_nan=True
+            ):
+                reference = self._prepare_reference(
+                    reference_key, reference_version, reference_x, reference_y
+                )
+                values = np.concatenate(
+                    (state.values, self._interpolate(reference, x[previous_length:]))
+                )
+                self._resampled_references[key] = _ResampledReference(
+                    reference_version, x_version, x, values
+                )
+                return values
+
+        reference = self._prepare_reference(
+            reference_key, reference_version, reference_x, reference_y
+        )
+        values = self._interpolate(reference, x)
+        self._resampled_references[key] = _ResampledReference(
+            reference_version, x_version, x, values
+        )
+        return values
+
+    def _prepare_reference(
+        self,
+        reference_key: typing.Hashable,
+        reference_version: typing.Hashable,
+        reference_x: np.ndarray,
+        reference_y: np.ndarray,
+    ) -> _PreparedReference:
+        reference = self._prepared_references.get(reference_key, None)
+        if reference is not None and reference.version == reference_version:
+            return reference
+
+        reference_x = np.asarray(reference_x, dtype=float)
+        reference_y = np.asarray(reference_y, dtype=float)
+
+        valid = np.isfinite(reference_x) & np.isfinite(reference_y)
+        reference_x = reference_x[valid]
+        reference_y = reference_y[valid]
+
+        # NOTE: np.interp requires increasing X values, which isn't the case for
+        # scans going backwards, or with repeated positions.
+        order = np.argsort(reference_x, kind="stable")
+        reference = _PreparedReference(
+            reference_version, reference_x[order], reference_y[order]
+        )
+        self._prepared_references[reference_key] = reference
+        return reference
+
+    @staticmethod
+    def _interpolate(reference: _PreparedReference, x: np.ndarray) -> np.ndarray:
+        x = np.asarray(x, dtype=float)
+        if len(reference.x) == 0:
+            return np.full(len(x), np.nan)
+        return np.interp(x, reference.x, reference.y, left=np.nan, right=np.nan)
@@ -0,0 +1,268 @@
+import csv
+import itertools
+import json
+import logging
+import os
+import pathlib
+import zipfile
+
+import numpy as np
+from qtpy.QtCore import QThread, Signal
+
+from .session_snapshot import RunSnapshot
+
+EXPORT_FORMATS = {
+    ".csv": "CSV (*.csv)",
+    ".npz": "NumPy (*.npz)",
+    ".h5": "HDF5 (*.h5 *.hdf5)",
+    ".hdf5": "HDF5 (*.h5 *.hdf5)",
+}
+
+
+def flatten_metadata(
+    metadata: dict, prefix: str = ""
+) -> dict[str, bool | int | float | str]:
+    """
+    Flatten nested metadata into a single level, with keys joined by dots.
+
+    Values that aren't numbers nor strings (e.g. lists) are converted to JSON.
+    """
+    flat_metadata = dict()
+    for key, value in metadata.items():
+        key = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat_metadata.update(flatten_metadata(value, f"{key}."))
+        elif isinstance(value, (bool, int, float, str)):
+            flat_metadata[key] = value
+        elif isinstance(value, np.generic):
+            flat_metadata[key] = value.item()
+        else:
+            flat_metadata[key] = json.dumps(
+                value.tolist() if isinstance(value, np.ndarray) else value,
+                default=str,
+            )
+    return flat_metadata
+
+
+def _csv_comment(value) -> str:
+    """Format a value for a CSV comment line, as JSON if it spans many lines."""
+    value = str(value)
+    if "\n" in value or "\r" in value:
+        return json.dumps(value)
+    return value
+
+
+class RunExporter(QThread):
+    """
+    Write the data and metadata of runs to a file, in a separate thread.
+
+    The format is chosen by the file extension (see `EXPORT_FORMATS`). Arrays are
+    written in chunks of `CHUNK_ROWS` rows straight from the given runs, without
+    copying them as a whole, and with the progress reported with `loading_status`:
+
+    - CSV: One file per run (suffixed by the run index when there's more than one),
+      with the flattened metadata as comments (as JSON strings, for values spanning
+      many lines), followed by one column per signal.
+      Signals with more than one value per point (e.g. waveforms) are left out.
+    - NPZ: One ``run_<index>/<signal>`` array per signal, and the flattened metadata
+      as JSON in ``run_<index>/metadata``.
+    - HDF5: One ``run_<index>`` group per run, with a dataset per signal, and the
+      flattened metadata as attributes of the group.
+
+    If the export is interrupted (with `requestInterruption`) or fails, the partially
+    written files are removed.
+    """
+
+    loading_status = Signal(str, float)  # status message, completion percentage
+    export_failed = Signal(str)  # error message
+
+    CHUNK_ROWS = 65536
+
+    def __init__(self, runs: list[RunSnapshot], file_path: str | os.PathLike):
+        super().__init__()
+
+        self._runs = runs
+        self._file_path = pathlib.Path(file_path)
+
+        self._total_bytes = 0
+        self._written_bytes = 0
+        self._last_percentage = -1
+
+        self._logger = logging.getLogger("sophys.live_view.run_export")
+
+    def run(self):
+        writers = {
+            ".csv": self._write_csv,
+            ".npz": self._write_npz,
+            ".h5": self._write_hdf5,
+            ".hdf5": self._write_hdf5,
+        }
+        writer = writers.get(self._file_path.suffix.lower(), None)
+        if writer is None:
+            self.export_failed.emit(
+                f"Unknown export format '{self._file_path.suffix}'."
+            )
+            return
+
+        self._total_bytes = sum(
+            np.asarray(column).nbytes
+            for run in self._runs
+            for column in run.columns.values()
+        )
+        self._report_progress()
+
+        written_paths = list()
+        try:
+            completed = writer(written_paths)
+        except Exception as exception:
+            self._logger.exception("Failed to export runs to '%s'.", self._file_path)
+            self.export_failed.emit(str(exception))
+            completed = False
+
+        if not completed:
+            for path in written_paths:
+                path.unlink(missing_ok=True)
+
+        self.loading_status.emit("Exporting runs...", 100.0)
+
+    def _columns(self, run: RunSnapshot):
+        """Iterate over the columns of a run that can be exported."""
+        for name, column in run.columns.items():
+            column = np.asarray(column)
+            if column.dtype.hasobject:
+                self._logger.warning(
+                    "Not exporting signal '%s' of '%s', of an unsupported type.",
+                    name,
+                    run.display_name,
+                )
+                self._written_bytes += column.nbytes
+                continue
+            yield name, column
+
+    def _chunks(self, array: np.ndarray):
+        """Iterate over the first axis of an array in chunks, reporting the progress."""
+        for start in range(0, max(len(array), 1), self.CHUNK_ROWS):
+            if self.isInterruptionRequested():
+                raise InterruptedError
+            chunk = array[start : start + self.CHUNK_ROWS]
+            yield start, chunk
+
+            self._written_bytes += chunk.nbytes
+            self._report_progress()
+
+    def _report_progress(self):
+        percentage = 100 * self._written_bytes // max(self._total_bytes, 1)
+        if percentage != self._last_percentage and percentage < 100:
+            self._last_percentage = percentage
+            self.loading_status.emit("Exporting runs...", float(percentage))
+
+    def _export_path(self, run_index: int) -> pathlib.Path:
+        if len(self._runs) == 1:
+            return self._file_path
+        return self._file_path.with_name(
+            f"{self._file_path.stem}_{run_index}{self._file_path.suffix}"
+        )
+
+    def _write_csv(self, written_paths: list[pathlib.Path]) -> bool:
+        for run_index, run in enumerate(self._runs):
+            path = self._export_path(run_index)
+            written_paths.append(path)
+
+            columns = dict()
+            skipped = list()
+            for name, column in sorted(self._columns(run), key=lambda item: item[0]):
+                # NOTE: Grid signals are written point by point, like scalar ones.
+                if name in run.validity_masks or "shape" in run.metadata:
+                    column = column.reshape(-1)
+                if column.ndim == 1:
+                    columns[name] = column
+                else:
+                    skipped.append(name)
+                    self._written_bytes += column.nbytes
+
+            with open(path, "w", newline="") as _f:
+                _f.write(f"# {_csv_comment(run.display_name)}\n")
+                for key, value in flatten_metadata(run.metadata).items():
+                    _f.write(f"# {_csv_comment(key)} = {_csv_comment(value)}\n")
+                if len(skipped) != 0:
+                    _f.write(f"# Signals left out: {', '.join(skipped)}\n")
+
+                writer = csv.writer(_f)
+                writer.writerow(
+                    [run.signals_name_map.get(name, name) for name in columns]
+                )
+
+                length = max((len(column) for column in columns.values()), default=0)
+                for start in range(0, length, self.CHUNK_ROWS):
+                    if self.isInterruptionRequested():
+                        return False
+                    stop = start + self.CHUNK_ROWS
+                    chunks = [column[start:stop] for column in columns.values()]
+                    writer.writerows(
+                        itertools.zip_longest(
+                            *(chunk.tolist() for chunk in chunks), fillvalue=""
+                        )
+                    )
+
+                    self._written_bytes += sum(chunk.nbytes for chunk in chunks)
+                    self._report_progress()
+        return True
+
+    def _write_npz(self, written_paths: list[pathlib.Path]) -> bool:
+        written_paths.append(self._file_path)
+
+        with zipfile.ZipFile(self._file_path, "w", allowZip64=True) as npz_file:
+            try:
+                for run_index, run in enumerate(self._runs):
+                    for name, column in self._columns(run):
+                        self._write_npy(npz_file, f"run_{run_index}/{name}", column)
+
+                    self._write_npy(
+                        npz_file,
+                        f"run_{run_index}/metadata",
+                        np.array(json.dumps(flatten_metadata(run.metadata))),
+                    )
+            except InterruptedError:
+                return False
+        return True
+
+    def _write_npy(self, npz_file: zipfile.ZipFile, name: str, array: np.ndarray):
+        with npz_file.open(f"{name}.npy", "w", force_zip64=True) as _f:
+            header = np.lib.format.header_data_from_array_1_0(array)
+            header["fortran_order"] = False
+            np.lib.format.write_array_header_1_0(_f, header)
+
+            if array.ndim == 0:
+                _f.write(array.tobytes())
+                return
+            for _, chunk in self._chunks(array):
+                _f.write(np.ascontiguousarray(chunk).tobytes())
+
+    def _write_hdf5(self, written_paths: list[pathlib.Path]) -> bool:
+        # NOTE: Deferred, since it's only needed for exporting to HDF5.
+        import h5py
+
+        written_paths.append(self._file_path)
+
+        with h5py.File(self._file_path, "w") as hdf5_file:
+            try:
+                for run_index, run in enumerate(self._runs):
+                    group = hdf5_file.create_group(f"run_{run_index}")
+                    group.attrs["display_name"] = run.display_name
+                    for key, value in flatten_metadata(run.metadata).items():
+                        group.attrs[key] = value
+
+                    for name, column in self._columns(run):
+                        if column.dtype.kind == "U":
+                            column = column.astype(h5py.string_dtype())
+                        dataset = group.create_dataset(
+                            name, shape=column.shape, dtype=column.dtype
+                        )
+                        if column.ndim == 0:
+                            dataset[()] = column
+                            continue
+                        for start, chunk in self._chunks(column):
+                            dataset[start : start + len(chunk)] = chunk
+            except InterruptedError:
+                return False
+        return True
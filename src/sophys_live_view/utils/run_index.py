@@ -0,0 +1,281 @@
+import bisect
+from collections import defaultdict
+from dataclasses import dataclass
+import re
+import typing
+
+_ANY_KEY = ""
+
+_QUERY_TERM_REGEX = re.compile(
+    r"^(?P<key>[^:<>=\s]+)(?P<op>:|>=|<=|>|<|=)(?P<value>.+)$"
+)
+_WORD_SPLIT_REGEX = re.compile(r"[^\w.]+")
+
+
+@dataclass(frozen=True)
+class QueryTerm:
+    key: str
+    operator: str
+    value: str
+    numeric_value: float | None = None
+
+
+class RunIndex:
+    """
+    Incrementally maintained inverted index over runs' metadata and signals.
+
+    Each run is identified by an integer row, and is indexed by some of its metadata
+    fields (plan name, sample, scan ID, user-provided scalar fields, ...), and by the
+    signals it provides. Queries are made with a small syntax, composed of
+    whitespace-separated terms that must all match:
+
+    - ``key:value`` - Case-insensitive prefix match of ``value`` on the ``key`` field.
+    - ``key=value`` - Exact match of ``value`` on the ``key`` field.
+    - ``key>value``, ``key>=value``, ``key<value``, ``key<=value`` - Numeric comparisons.
+    - ``value`` - Case-insensitive prefix match of ``value`` on any indexed word.
+
+    Keys are case-insensitive, and some have shorter aliases (see ``KEY_ALIASES``).
+
+    For instance, ``plan:grid_scan det:pilatus scan_id>1200``.
+    """
+
+    KEY_ALIASES = {
+        "plan": "plan_name",
+        "det": "detectors",
+        "detector": "detectors",
+        "motor": "motors",
+        "signal": "signals",
+        "name": "display_name",
+    }
+
+    def __init__(self):
+        self._postings = defaultdict(lambda: defaultdict(set))
+        self._numeric_values = defaultdict(list)
+
+        # NOTE: The sorted views are only rebuilt when queried after a change,
+        # so that indexing lots of runs (e.g. while preloading) stays cheap.
+        self._sorted_tokens = dict()
+        self._unsorted_numeric_keys = set()
+
+        self._row_tokens = dict()
+        self._row_numeric_values = dict()
+
+    def __len__(self):
+        return len(self._row_tokens)
+
+    def add_run(
+        self,
+        row: int,
+        display_name: str,
+        signals: typing.Iterable[str],
+        metadata: dict,
+    ):
+        """Index a new run in the given row, or update the entries of an already indexed one."""
+        if row in self._row_tokens:
+            self.remove_run(row)
+
+        tokens = defaultdict(set)
+        numeric_values = dict()
+
+        tokens["display_name"].add(display_name.lower())
+        tokens["signals"].update(str(s).lower() for s in signals)
+
+        for key, value in metadata.items():
+            key = str(key).lower()
+            if isinstance(value, (list, tuple, set)):
+                if all(self._is_scalar(v) for v in value):
+                    tokens[key].update(str(v).lower() for v in value)
+                continue
+
+            if not self._is_scalar(value):
+                continue
+
+            tokens[key].add(str(value).lower())
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                numeric_values[key] = float(value)
+
+        for key_tokens in list(tokens.values()):
+            for token in key_tokens:
+                tokens[_ANY_KEY].update(w for w in _WORD_SPLIT_REGEX.split(token) if w)
+                tokens[_ANY_KEY].add(token)
+
+        for key, key_tokens in tokens.items():
+            for token in key_tokens:
+                self._add_posting(key, token, row)
+        for key, value in numeric_values.items():
+            self._numeric_values[key].append((value, row))
+            self._unsorted_numeric_keys.add(key)
+
+        self._row_tokens[row] = tokens
+        self._row_numeric_values[row] = numeric_values
+
+    def remove_run(self, row: int):
+        """Remove all entries of a run from the index."""
+        tokens = self._row_tokens.pop(row, None)
+        if tokens is None:
+            return
+
+        for key, key_tokens in tokens.items():
+            for token in key_tokens:
+                rows = self._postings[key][token]
+                rows.discard(row)
+                if len(rows) == 0:
+                    del self._postings[key][token]
+                    self._sorted_tokens.pop(key, None)
+
+        for key, value in self._row_numeric_values.pop(row).items():
+            self._numeric_values[key].remove((value, row))
+
+    def parse_query(self, query: str) -> list[QueryTerm]:
+        """Parse a query string into its terms. Unknown constructs are treated as plain words."""
+        terms = list()
+
+        for raw_term in query.split():
+            match = _QUERY_TERM_REGEX.match(raw_term)
+            if match is None:
+                terms.append(QueryTerm(_ANY_KEY, ":", raw_term.lower()))
+                continue
+
+            key = match.group("key").lower()
+            key = self.KEY_ALIASES.get(key, key)
+            operator = match.group("op")
+            value = match.group("value").lower()
+
+            numeric_value = None
+            try:
+                numeric_value = float(value)
+            except ValueError:
+                if operator not in (":", "="):
+                    # NOTE: A comparison with a non-numeric value can't match anything.
+                    operator = "="
+
+            terms.append(QueryTerm(key, operator, value, numeric_value))
+
+        return terms
+
+    def query(self, query: str | list[QueryTerm]) -> set[int] | None:
+        """
+        Get the set of rows matching the query.
+
+        Returns None if the query is empty, meaning that all rows match.
+        """
+        terms = self.parse_query(query) if isinstance(query, str) else query
+        if len(terms) == 0:
+            return None
+
+        # NOTE: Evaluate the (probably) smaller sets first, so that the intersection is cheaper.
+        results = sorted((self._query_term(term) for term in terms), key=len)
+
+        rows = set(results[0])
+        for result in results[1:]:
+            if len(rows) == 0:
+                break
+            rows.intersection_update(result)
+        return rows
+
+    def row_matches(self, query: str | list[QueryTerm], row: int) -> bool:
+        """Check whether a single already indexed row matches the query, without querying the whole index."""
+        terms = self.parse_query(query) if isinstance(query, str) else query
+
+        tokens = self._row_tokens.get(row, None)
+        if tokens is None:
+            return False
+        numeric_values = self._row_numeric_values[row]
+
+        for term in terms:
+            if term.operator == ":":
+                if not any(t.startswith(term.value) for t in tokens.get(term.key, ())):
+                    return False
+            elif term.operator == "=":
+                if term.value in tokens.get(term.key, ()):
+                    continue
+                value = numeric_values.get(term.key, None)
+                if value is None or value != term.numeric_value:
+                    return False
+            else:
+                value = numeric_values.get(term.key, None)
+                if value is None or not self._compare(value, term):
+                    return False
+
+        return True
+
+    def _query_term(self, term: QueryTerm) -> set[int]:
+        postings = self._postings.get(term.key, None)
+
+        if term.operator == ":":
+            if postings is None:
+                return set()
+
+            sorted_tokens = self._sorted_tokens.get(term.key, None)
+            if sorted_tokens is None:
+                sorted_tokens = sorted(postings.keys())
+                self._sorted_tokens[term.key] = sorted_tokens
+
+            rows = set()
+            start = bisect.bisect_left(sorted_tokens, term.value)
+            for token in sorted_tokens[start:]:
+                if not token.startswith(term.value):
+                    break
+                rows |= postings[token]
+            return rows
+
+        if term.operator == "=":
+            rows = set(postings.get(term.value, ())) if postings is not None else set()
+            if term.numeric_value is not None:
+                rows |= self._numeric_range(term.key, "=", term.numeric_value)
+            return rows
+
+        return self._numeric_range(term.key, term.operator, term.numeric_value)
+
+    def _numeric_range(self, key: str, operator: str, value: float) -> set[int]:
+        values = self._numeric_values.get(key, None)
+        if not values:
+            return set()
+
+        if key in self._unsorted_numeric_keys:
+            values.sort()
+            self._unsorted_numeric_keys.discard(key)
+
+        low_inf = (value, -1)
+        high_inf = (value, float("inf"))
+
+        match operator:
+            case ">":
+                selected = values[bisect.bisect_right(values, high_inf) :]
+            case ">=":
+                selected = values[bisect.bisect_left(values, low_inf) :]
+            case "<":
+                selected = values[: bisect.bisect_left(values, low_inf)]
+            case "<=":
+                selected = values[: bisect.bisect_right(values, high_inf)]
+            case _:
+                selected = values[
+                    bisect.bisect_left(values, low_inf) : bisect.bisect_right(
+                        values, high_inf
+                    )
+                ]
+
+        return set(row for _, row in selected)
+
+    def _add_posting(self, key: str, token: str, row: int):
+        rows = self._postings[key][token]
+        if len(rows) == 0:
+            self._sorted_tokens.pop(key, None)
+        rows.add(row)
+
+    @staticmethod
+    def _compare(value: float, term: QueryTerm) -> bool:
+        match term.operator:
+            case ">":
+                return value > term.numeric_value
+            case ">=":
+                return value >= term.numeric_value
+            case "<":
+                return value < term.numeric_value
+            case "<=":
+                return value <= term.numeric_value
+        return value == term.numeric_value
+
+    @staticmethod
+    def _is_scalar(value) -> bool:
+        return isinstance(value, (str, int, float, bool))
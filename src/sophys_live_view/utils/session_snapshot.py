@@ -0,0 +1,204 @@
+from dataclasses import dataclass, field
+import logging
+import os
+import pathlib
+import shutil
+import tempfile
+
+import numpy as np
+
+DEFAULT_SNAPSHOT_PATH = (
+    pathlib.Path(os.environ.get("XDG_CACHE_HOME", pathlib.Path.home() / ".cache"))
+    / "sophys_live_view"
+    / "session"
+)
+
+_SNAPSHOT_FORMAT_VERSION = 1
+_INDEX_FILE_NAME = "session.msgpack"
+
+_logger = logging.getLogger("sophys.live_view.session_snapshot")
+
+
+@dataclass
+class RunSnapshot:
+    """
+    Everything needed to show a run again, as it was in a previous session.
+
+    Attributes
+    ----------
+    subuid : str
+        The run's SubUID, used to recognize the run when it's received again.
+    display_name, signals, signals_name_map, detectors, motors, metadata
+        Same as the ones of the run's `new_data_stream` signal.
+    columns : dict[str, np.ndarray]
+        Aggregated data of each signal, including custom signals.
+    validity_masks : dict[str, np.ndarray]
+        Which positions of grid signals were filled, for signals that have one.
+    bookmarked : bool
+        Whether the run was bookmarked.
+    axes : dict
+        Signals chosen for each plot axis of the run, by axis name (e.g. "1d_x").
+    custom_signals : dict[str, str]
+        Expression of each custom signal of the run, by name.
+    """
+
+    subuid: str
+    display_name: str
+    signals: set[str]
+    signals_name_map: dict[str, str]
+    detectors: set[str]
+    motors: list[str]
+    metadata: dict
+    columns: dict[str, np.ndarray]
+    validity_masks: dict[str, np.ndarray] = field(default_factory=dict)
+    bookmarked: bool = False
+    axes: dict = field(default_factory=dict)
+    custom_signals: dict[str, str] = field(default_factory=dict)
+
+
+def save_session_snapshot(path: str | os.PathLike, runs: list[RunSnapshot]):
+    """
+    Save runs to a snapshot directory, replacing any previous snapshot there.
+
+    Each array is saved as a separate ``.npy`` file, so that it can be memory-mapped
+    when loading the snapshot, and everything else to a msgpack index file. Custom
+    signals are saved as their expressions only. Runs that can't be serialized are
+    left out of the snapshot.
+    """
+    import msgpack_numpy as msgpack
+
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # NOTE: Written to a temporary directory first, so that a crash while saving
+    # never leaves a partial snapshot behind.
+    temporary_path = pathlib.Path(
+        tempfile.mkdtemp(prefix=f".{path.name}.", dir=path.parent)
+    )
+    try:
+        index_runs = list()
+        for run_index, run in enumerate(runs):
+            try:
+                index_run = _save_run(temporary_path, run_index, run)
+                msgpack.packb(index_run)
+            except (TypeError, ValueError):
+                shutil.rmtree(temporary_path / "arrays" / str(run_index))
+                _logger.warning(
+                    "Leaving run '%s' out of the session snapshot, since it can't be serialized.",
+                    run.display_name,
+                )
+                continue
+            index_runs.append(index_run)
+
+        with open(temporary_path / _INDEX_FILE_NAME, "wb") as _f:
+            _f.write(
+                msgpack.packb({"version": _SNAPSHOT_FORMAT_VERSION, "runs": index_runs})
+            )
+
+        old_path = path.with_name(path.name + ".old")
+        shutil.rmtree(old_path, ignore_errors=True)
+        if path.exists():
+            path.rename(old_path)
+        temporary_path.rename(path)
+    except BaseException:
+        shutil.rmtree(temporary_path, ignore_errors=True)
+        raise
+
+    # NOTE: On POSIX, arrays of the previous snapshot that are still memory-mapped
+    # stay valid after their files are removed.
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def _save_run(directory: pathlib.Path, run_index: int, run: RunSnapshot) -> dict:
+    run_directory = directory / "arrays" / str(run_index)
+    run_directory.mkdir(parents=True)
+
+    def save_arrays(arrays: dict[str, np.ndarray], prefix: str) -> dict[str, str]:
+        files = dict()
+        for array_index, (name, array) in enumerate(arrays.items()):
+            array = np.asarray(array)
+            if array.dtype.hasobject:
+                _logger.debug("Not saving object array '%s' of a run.", name)
+                continue
+
+            file_path = run_directory / f"{prefix}{array_index}.npy"
+            np.save(file_path, array, allow_pickle=False)
+            files[name] = str(file_path.relative_to(directory))
+        return files
+
+    # NOTE: Custom signals are saved as their expressions instead of their data, so
+    # that they're computed again (and kept up to date) when the run is restored.
+    def without_custom_signals(items):
+        return {name: value for name, value in items if name not in run.custom_signals}
+
+    return {
+        "subuid": run.subuid,
+        "display_name": run.display_name,
+        "signals": sorted(run.signals - run.custom_signals.keys()),
+        "signals_name_map": without_custom_signals(run.signals_name_map.items()),
+        "detectors": sorted(run.detectors),
+        "motors": list(run.motors),
+        "metadata": run.metadata,
+        "columns": save_arrays(without_custom_signals(run.columns.items()), "column_"),
+        "validity_masks": save_arrays(
+            without_custom_signals(run.validity_masks.items()), "mask_"
+        ),
+        "bookmarked": run.bookmarked,
+        "axes": run.axes,
+        "custom_signals": run.custom_signals,
+    }
+
+
+def load_session_snapshot(path: str | os.PathLike) -> list[RunSnapshot]:
+    """
+    Load the runs of a snapshot directory, or an empty list if it can't be read.
+
+    Arrays are memory-mapped read-only, so that loading is quick regardless of the
+    amount of data, which is only read from disk when it's accessed.
+    """
+    import msgpack_numpy as msgpack
+
+    path = pathlib.Path(path)
+    try:
+        with open(path / _INDEX_FILE_NAME, "rb") as _f:
+            index = msgpack.unpackb(_f.read(), strict_map_key=False)
+    except FileNotFoundError:
+        return list()
+    except (OSError, ValueError):
+        _logger.exception("Failed to read session snapshot '%s'.", path)
+        return list()
+
+    if not isinstance(index, dict) or index.get("version") != _SNAPSHOT_FORMAT_VERSION:
+        _logger.warning("Ignoring session snapshot '%s' with an unknown format.", path)
+        return list()
+
+    runs = list()
+    for index_run in index.get("runs", []):
+        try:
+            runs.append(
+                RunSnapshot(
+                    subuid=index_run["subuid"],
+                    display_name=index_run["display_name"],
+                    signals=set(index_run["signals"]),
+                    signals_name_map=index_run["signals_name_map"],
+                    detectors=set(index_run["detectors"]),
+                    motors=index_run["motors"],
+                    metadata=index_run["metadata"],
+                    columns={
+                        name: np.load(path / file_name, mmap_mode="r")
+                        for name, file_name in index_run["columns"].items()
+                    },
+                    validity_masks={
+                        name: np.load(path / file_name, mmap_mode="r")
+                        for name, file_name in index_run["validity_masks"].items()
+                    },
+                    bookmarked=index_run["bookmarked"],
+                    axes=index_run["axes"],
+                    custom_signals=index_run.get("custom_signals", {}),
+                )
+            )
+        except (KeyError, TypeError, OSError, ValueError):
+            _logger.warning(
+                "Ignoring invalid run in session snapshot '%s'.", path, exc_info=True
+            )
+    return runs
@@ -0,0 +1,81 @@
+import logging
+import os
+
+from qtpy.QtCore import Signal
+
+from .data_source import DataSource
+from .session_snapshot import load_session_snapshot
+
+
+class SessionSnapshotDataSource(DataSource):
+    is_finite = True
+
+    run_restored = Signal(
+        str, dict
+    )  # subuid, {"bookmarked": bool, "axes": dict, "custom_signals": dict}
+
+    def __init__(self, snapshot_path: str | os.PathLike):
+        """
+        Data source restoring the runs saved in a session snapshot.
+
+        Each run is sent as a single update with all of its data, whose arrays are
+        memory-mapped from the snapshot, so the previous session can be browsed
+        right away. The state of each run that isn't data (e.g. whether it was
+        bookmarked, or the expressions of its custom signals) is sent with the
+        `run_restored` signal.
+
+        Parameters
+        ----------
+        snapshot_path : str or os.PathLike
+            Directory of the snapshot, as saved by `save_session_snapshot`.
+        """
+        super().__init__()
+
+        self._snapshot_path = snapshot_path
+
+        self._logger = logging.getLogger("sophys.live_view.data_source.snapshot")
+
+    def run(self):
+        self.loading_status.emit("Restoring previous session...", 0.0)
+
+        runs = load_session_snapshot(self._snapshot_path)
+        self._logger.info("Restoring %d runs from the previous session.", len(runs))
+
+        for run_index, run in enumerate(runs, start=1):
+            if self.isInterruptionRequested():
+                return
+
+            self.new_data_stream.emit(
+                run.subuid,
+                run.display_name,
+                set(run.signals),
+                dict(run.signals_name_map),
+                set(run.detectors),
+                list(run.motors),
+                run.metadata,
+            )
+
+            restored_metadata = {name: {"restored": True} for name in run.columns}
+            for name, validity_mask in run.validity_masks.items():
+                if name in restored_metadata:
+                    restored_metadata[name]["validity_mask"] = validity_mask
+            self.new_data_received.emit(
+                run.subuid, dict(run.columns), restored_metadata
+            )
+
+            self.run_restored.emit(
+                run.subuid,
+                {
+                    "bookmarked": run.bookmarked,
+                    "axes": dict(run.axes),
+                    "custom_signals": dict(run.custom_signals),
+                },
+            )
+            self.data_stream_closed.emit(run.subuid)
+
+            self.loading_status.emit(
+                "Restoring previous session...", 100.0 * run_index / len(runs)
+            )
+
+        if len(runs) == 0:
+            self.loading_status.emit("Restoring previous session...", 100.0)
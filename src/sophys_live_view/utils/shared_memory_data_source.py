@@ -0,0 +1,98 @@
+import logging
+import time
+
+import numpy as np
+
+from .bluesky_data_source import BlueskyDataSource
+from .shared_memory_ring import SharedMemoryRingReader
+
+
+class SharedMemoryDataSource(BlueskyDataSource):
+    def __init__(self, name: str, poll_interval: float = 0.001):
+        """
+        Data source reading documents from a shared memory ring written by a local
+        producer (see `SharedMemoryRingWriter`).
+
+        Array data of events is handed out as views of the shared memory segment, so
+        it's only copied once, when it's stored by the aggregator. Events that have to
+        be held (e.g. received out of order) are copied instead, so that they don't
+        keep ring space from being released. If the producer closes the ring, a new
+        one with the same name is waited for.
+
+        Parameters
+        ----------
+        name : str
+            Name of the shared memory segment. If it doesn't exist yet, it is
+            waited for.
+        poll_interval : float, optional
+            Time, in seconds, to wait before checking the ring again when there's no
+            new data in it. Defaults to 1 ms.
+        """
+        super().__init__()
+
+        self._name = name
+        self._poll_interval = poll_interval
+
+        self._logger = logging.getLogger("sophys.live_view.data_source.shared_memory")
+
+        self._closed = False
+
+    def run(self):
+        while not self._closed:
+            reader = self._wait_for_ring()
+            if reader is None:
+                return
+
+            self._logger.info("Reading documents from '%s'.", self._name)
+            self.go_to_last_automatically.emit(True)
+
+            try:
+                while not self._closed:
+                    # NOTE: Check it before reading, so that documents written right
+                    # before closing aren't missed.
+                    producer_closed = reader.closed
+
+                    if self._route_new_documents(reader) != 0:
+                        continue
+                    if producer_closed:
+                        break
+                    time.sleep(self._poll_interval)
+            finally:
+                self.flush_pending_documents(discard_orphans=True)
+                reader.close()
+
+    def _held_document(self, doc: dict) -> dict:
+        return _copy_arrays(doc)
+
+    def _wait_for_ring(self) -> SharedMemoryRingReader | None:
+        while not self._closed:
+            try:
+                return SharedMemoryRingReader(self._name)
+            except FileNotFoundError:
+                time.sleep(self._poll_interval)
+        return None
+
+    def _route_new_documents(self, reader: SharedMemoryRingReader) -> int:
+        # NOTE: The documents must not outlive this call, since the ring space of
+        # their arrays is only released once nothing references them.
+        documents = reader.read()
+        for document_type, document in documents:
+            if self._closed:
+                break
+
+            self._logger.debug("Received new document: %s", document_type)
+            self(document_type, document)
+        return len(documents)
+
+    def close_thread(self):
+        self._closed = True
+
+
+def _copy_arrays(value):
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    if isinstance(value, dict):
+        return {k: _copy_arrays(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_arrays(v) for v in value]
+    return value
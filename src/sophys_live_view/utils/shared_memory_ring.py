@@ -0,0 +1,414 @@
+"""
+Ring buffer of Bluesky documents in a shared memory segment, for a local producer.
+
+The segment starts with a header, followed by the ring of records. Each record holds
+a (name, document) pair packed with msgpack-numpy, with its numpy arrays stored
+separately after it, so that readers can use them without copying:
+
+    [record size][payload size][payload][padding][array 0][padding][array 1]...
+
+The header keeps two monotonic byte positions: how much was written by the producer,
+and how much was released by the reader. The producer never overwrites records that
+weren't released, so arrays handed out as views stay valid for as long as they're
+referenced.
+
+NOTE: This module is meant to be used on the producer side too, so it must not
+import Qt.
+"""
+
+from collections import deque
+import logging
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import struct
+import threading
+import time
+import weakref
+
+import msgpack_numpy as msgpack
+import numpy as np
+
+_MAGIC = b"SLVR"
+_FORMAT_VERSION = 1
+
+# NOTE: Records and arrays are aligned to cache lines.
+_ALIGNMENT = 64
+
+# magic, version, capacity, written position, released position, closed
+_HEADER = struct.Struct("<4sIQQQI")
+_WRITTEN_POSITION_OFFSET = 16
+_RELEASED_POSITION_OFFSET = 24
+_CLOSED_OFFSET = 32
+HEADER_SIZE = _ALIGNMENT
+
+# record size, payload size
+_RECORD_HEADER = struct.Struct("<II")
+# NOTE: Marks that the rest of the ring is unused, and the next record is at its start.
+_WRAP_MARKER = 0xFFFFFFFF
+
+_ARRAY_KEY = "__shared_memory_array__"
+
+_logger = logging.getLogger("sophys.live_view.shared_memory_ring")
+
+# NOTE: Segments created by writers of this process, which the resource tracker must
+# keep tracking even if they're also read from this process.
+_created_segments = set()
+
+
+def _align(size: int) -> int:
+    return -(-size // _ALIGNMENT) * _ALIGNMENT
+
+
+def _attach_shared_memory(name: str) -> SharedMemory:
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        # NOTE: Before Python 3.13, attaching also registers the segment in the
+        # resource tracker, which would destroy it when this process exits.
+        shared_memory = SharedMemory(name=name)
+        if shared_memory.name not in _created_segments:
+            resource_tracker.unregister(shared_memory._name, "shared_memory")
+        return shared_memory
+
+
+def _extract_arrays(value, arrays: list, arrays_size: list):
+    if isinstance(value, np.ndarray) and not value.dtype.hasobject:
+        array = np.ascontiguousarray(value)
+        offset = arrays_size[0]
+        arrays.append((offset, array))
+        arrays_size[0] = _align(offset + array.nbytes)
+        return {_ARRAY_KEY: [offset, list(array.shape), array.dtype.str]}
+    if isinstance(value, dict):
+        return {k: _extract_arrays(v, arrays, arrays_size) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_extract_arrays(v, arrays, arrays_size) for v in value]
+    return value
+
+
+def _insert_arrays(value, record: np.ndarray, arrays_offset: int, copy: bool):
+    if isinstance(value, dict):
+        array_description = value.get(_ARRAY_KEY, None)
+        if array_description is not None and len(value) == 1:
+            offset, shape, dtype = array_description
+            dtype = np.dtype(dtype)
+            start = arrays_offset + offset
+            size = dtype.itemsize * int(np.prod(shape, dtype=np.int64))
+            array = record[start : start + size].view(dtype).reshape(shape)
+            return array.copy() if copy else array
+        return {
+            k: _insert_arrays(v, record, arrays_offset, copy) for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [_insert_arrays(v, record, arrays_offset, copy) for v in value]
+    return value
+
+
+class SharedMemoryRingWriter:
+    """
+    Producer of a shared memory document ring, usable as a RunEngine callback.
+
+    For instance, ``RE.subscribe(SharedMemoryRingWriter("sophys_live_view"))``.
+
+    The segment is created by the writer, and destroyed when it's closed. There must
+    be a single writer per segment.
+
+    Parameters
+    ----------
+    name : str
+        Name of the shared memory segment.
+    capacity : int, optional
+        Size of the ring, in bytes. Defaults to 64 MiB.
+    timeout : float, optional
+        Time, in seconds, to wait for the reader to release enough space for a new
+        document before dropping it, with a warning. If None, wait indefinitely.
+        Defaults to 5 seconds.
+
+    Documents are dropped instead of raising an exception, so that a slow or stuck
+    reader never aborts the plan the writer is subscribed to.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        capacity: int = 64 * 1024 * 1024,
+        timeout: float | None = 5.0,
+    ):
+        self._capacity = _align(capacity)
+        self._timeout = timeout
+
+        self._shared_memory = SharedMemory(
+            name=name, create=True, size=HEADER_SIZE + self._capacity
+        )
+        self._buffer = self._shared_memory.buf
+        _created_segments.add(self._shared_memory.name)
+        _HEADER.pack_into(
+            self._buffer, 0, _MAGIC, _FORMAT_VERSION, self._capacity, 0, 0, 0
+        )
+
+        self._written_position = 0
+
+    @property
+    def name(self) -> str:
+        return self._shared_memory.name
+
+    def __call__(self, name: str, document: dict):
+        arrays = list()
+        arrays_size = [0]
+        document = _extract_arrays(document, arrays, arrays_size)
+
+        payload = msgpack.packb((name, document))
+        arrays_offset = _align(_RECORD_HEADER.size + len(payload))
+        record_size = _align(arrays_offset + arrays_size[0])
+        if record_size > self._capacity:
+            _logger.warning(
+                "Dropping '%s' document of %d bytes, which doesn't fit in a ring of %d bytes.",
+                name,
+                record_size,
+                self._capacity,
+            )
+            return
+
+        offset = self._written_position % self._capacity
+        padding = (
+            self._capacity - offset if offset + record_size > self._capacity else 0
+        )
+        if not self._wait_for_space(padding + record_size, self._timeout):
+            _logger.warning(
+                "Dropping '%s' document, since the reader didn't release space in the ring.",
+                name,
+            )
+            return
+
+        if padding != 0:
+            struct.pack_into("<I", self._buffer, HEADER_SIZE + offset, _WRAP_MARKER)
+            offset = 0
+
+        start = HEADER_SIZE + offset
+        _RECORD_HEADER.pack_into(self._buffer, start, record_size, len(payload))
+        payload_start = start + _RECORD_HEADER.size
+        self._buffer[payload_start : payload_start + len(payload)] = payload
+        for array_offset, array in arrays:
+            array_start = start + arrays_offset + array_offset
+            self._buffer[array_start : array_start + array.nbytes] = array.reshape(
+                -1
+            ).view(np.uint8)
+
+        # NOTE: The position is only updated after the record is complete, so
+        # readers never see partially written records.
+        self._written_position += padding + record_size
+        struct.pack_into(
+            "<Q", self._buffer, _WRITTEN_POSITION_OFFSET, self._written_position
+        )
+
+    def wait_until_released(self, timeout: float | None = None):
+        """
+        Wait until the reader released all documents written so far, raising a
+        TimeoutError if it doesn't in time.
+        """
+        if not self._wait_for_space(self._capacity, timeout):
+            raise TimeoutError("The reader didn't release space in the ring.")
+
+    def _wait_for_space(self, size: int, timeout: float | None) -> bool:
+        """Wait until there's `size` bytes of free space, returning if there is."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            (released_position,) = struct.unpack_from(
+                "<Q", self._buffer, _RELEASED_POSITION_OFFSET
+            )
+            if self._capacity - (self._written_position - released_position) >= size:
+                return True
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.001)
+
+    def close(self):
+        """Mark the ring as closed for readers, and destroy the segment."""
+        if self._buffer is None:
+            return
+
+        struct.pack_into("<I", self._buffer, _CLOSED_OFFSET, 1)
+        self._buffer = None
+        self._shared_memory.close()
+        self._shared_memory.unlink()
+        _created_segments.discard(self._shared_memory.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class SharedMemoryRingReader:
+    """
+    Reader of the documents of a shared memory ring.
+
+    The numpy arrays of events are handed out as read-only views of the segment. The
+    space of a record is only released to the writer once all views of its arrays
+    are garbage collected, so they must not be kept around for long (e.g. they
+    should be copied into a longer-lived storage). Arrays of other documents are
+    copied, since those are usually kept for as long as the run is.
+
+    Closing the reader while views are still referenced defers detaching from the
+    segment until they're all garbage collected.
+
+    Parameters
+    ----------
+    name : str
+        Name of the shared memory segment, created by a `SharedMemoryRingWriter`.
+    """
+
+    def __init__(self, name: str):
+        self._shared_memory = _attach_shared_memory(name)
+        self._buffer = self._shared_memory.buf
+
+        magic, version, self._capacity, _, released_position, _ = _HEADER.unpack_from(
+            self._buffer, 0
+        )
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            self._shared_memory.close()
+            raise ValueError(f"'{name}' is not a document ring.")
+
+        # NOTE: Start from what wasn't released, i.e. what no reader has consumed.
+        self._read_position = released_position
+        self._released_position = released_position
+
+        # NOTE: [end position, released] of the records being read, in order.
+        self._records = deque()
+        self._records_lock = threading.Lock()
+        # NOTE: Records whose arrays handed out are still referenced.
+        self._referenced_records = 0
+        self._closing = False
+
+    @property
+    def closed(self) -> bool:
+        """Whether the writer closed the ring. It won't receive new documents."""
+        (closed,) = struct.unpack_from("<I", self._buffer, _CLOSED_OFFSET)
+        return closed != 0
+
+    @property
+    def pending_records(self) -> int:
+        """Number of records read whose space wasn't released yet."""
+        with self._records_lock:
+            return len(self._records)
+
+    def read(self) -> list[tuple[str, dict]]:
+        """Get the (name, document) pairs written since the last call."""
+        (written_position,) = struct.unpack_from(
+            "<Q", self._buffer, _WRITTEN_POSITION_OFFSET
+        )
+
+        documents = list()
+        while self._read_position < written_position:
+            offset = self._read_position % self._capacity
+            start = HEADER_SIZE + offset
+            (record_size,) = struct.unpack_from("<I", self._buffer, start)
+
+            if record_size == _WRAP_MARKER:
+                self._read_position += self._capacity - offset
+                self._add_record(self._read_position).released = True
+                continue
+
+            _, payload_size = _RECORD_HEADER.unpack_from(self._buffer, start)
+            payload_start = start + _RECORD_HEADER.size
+            document_type, document = msgpack.unpackb(
+                self._buffer[payload_start : payload_start + payload_size]
+            )
+
+            self._read_position += record_size
+            record = self._add_record(self._read_position)
+
+            # NOTE: Views of the record's arrays keep this array alive, so its
+            # finalizer runs once all of them are gone. It must be created from the
+            # buffer itself, since numpy makes views of views refer to the first
+            # array created from it.
+            record_array = np.frombuffer(
+                self._buffer, dtype=np.uint8, count=record_size, offset=start
+            )
+            record_array.flags.writeable = False
+            copy = document_type not in ("event", "event_page")
+            document = _insert_arrays(
+                document,
+                record_array,
+                _align(_RECORD_HEADER.size + payload_size),
+                copy,
+            )
+
+            with self._records_lock:
+                self._referenced_records += 1
+            # NOTE: The finalizer is attached to the memoryview numpy wraps the
+            # buffer with, which runs after it stops referencing the segment, so that
+            # the segment can be detached from in it.
+            record_owner = record_array.base
+            if not isinstance(record_owner, memoryview):
+                record_owner = record_array
+            weakref.finalize(record_owner, self._release, record)
+            del record_owner, record_array
+
+            documents.append((document_type, document))
+
+        self._release_records()
+        return documents
+
+    def _add_record(self, end_position: int) -> "_Record":
+        record = _Record(end_position)
+        with self._records_lock:
+            self._records.append(record)
+        return record
+
+    def _release(self, record: "_Record"):
+        record.released = True
+        self._release_records()
+
+        with self._records_lock:
+            self._referenced_records -= 1
+            detach = self._closing and self._referenced_records == 0
+        if detach:
+            self._detach()
+
+    def _release_records(self):
+        with self._records_lock:
+            if self._buffer is None:
+                return
+
+            released_position = self._released_position
+            while len(self._records) != 0 and self._records[0].released:
+                released_position = self._records.popleft().end_position
+            if released_position == self._released_position:
+                return
+
+            self._released_position = released_position
+            struct.pack_into(
+                "<Q", self._buffer, _RELEASED_POSITION_OFFSET, released_position
+            )
+
+    def close(self):
+        """
+        Stop reading from the segment. Arrays handed out stay valid until they're
+        garbage collected, when the segment is detached from.
+        """
+        with self._records_lock:
+            if self._closing:
+                return
+            self._closing = True
+            self._buffer = None
+            self._records.clear()
+            detach = self._referenced_records == 0
+        if detach:
+            self._detach()
+        else:
+            _logger.debug("Shared memory still in use after closing the reader.")
+
+    def _detach(self):
+        try:
+            self._shared_memory.close()
+        except BufferError:
+            _logger.warning("Failed to detach from the shared memory, still in use.")
+
+
+class _Record:
+    __slots__ = ("end_position", "released")
+
+    def __init__(self, end_position: int):
+        self.end_position = end_position
+        self.released = False
@@ -0,0 +1,38 @@
+import logging
+import time
+
+
+class StartupTimer:
+    """
+    Report the time it took to reach milestones of the application startup.
+
+    Each milestone is only reported the first time it's reached, to the
+    ``sophys.live_view.startup`` logger.
+    """
+
+    def __init__(self):
+        self._start_time = time.perf_counter()
+        self._milestones = dict()
+
+        self._logger = logging.getLogger("sophys.live_view.startup")
+
+    @property
+    def milestones(self) -> dict[str, float]:
+        """Time, in seconds since the start, each milestone reached was reached at."""
+        return dict(self._milestones)
+
+    def restart(self):
+        self._start_time = time.perf_counter()
+        self._milestones.clear()
+
+    def mark(self, milestone: str):
+        if milestone in self._milestones:
+            return
+
+        elapsed = time.perf_counter() - self._start_time
+        self._milestones[milestone] = elapsed
+        self._logger.info("Startup: %s after %.3f s.", milestone, elapsed)
+
+
+# NOTE: Started when first imported, which the entrypoint does before anything else.
+startup_timer = StartupTimer()
@@ -0,0 +1,137 @@
+import math
+
+import numpy as np
+
+
+class StreamingStatistics:
+    """
+    Statistics of a signal, updated incrementally as its values arrive.
+
+    Each update costs time proportional only to the number of new values, so the
+    statistics of a signal can be kept up to date during a whole run, and read at any
+    time in constant time. Non-finite values are counted in the positions (`argmin`
+    and `argmax` are indexes over all received values), but ignored otherwise.
+
+    The mean and variance are computed with Welford's algorithm, merging each batch
+    of values with Chan's parallel update formula.
+
+    Optionally, the values of an independent (X) signal can be provided alongside the
+    values, in which case the first moment (center of mass) against it is also kept.
+    """
+
+    __slots__ = (
+        "count",
+        "mean",
+        "_m2",
+        "sum",
+        "min",
+        "argmin",
+        "max",
+        "argmax",
+        "_weighted_sum",
+        "_weights_sum",
+        "_received",
+    )
+
+    def __init__(self):
+        self.count = 0
+        self.mean = math.nan
+        self._m2 = 0.0
+        self.sum = 0.0
+
+        self.min = math.nan
+        self.argmin = -1
+        self.max = math.nan
+        self.argmax = -1
+
+        self._weighted_sum = 0.0
+        self._weights_sum = 0.0
+
+        self._received = 0
+
+    @staticmethod
+    def supports(values) -> bool:
+        """Whether the values can be accumulated, i.e. if they're numeric scalars."""
+        values = np.asarray(values)
+        return values.ndim <= 1 and (
+            np.issubdtype(values.dtype, np.number) or values.dtype == np.bool_
+        )
+
+    def update(self, values, x_values=None):
+        """Accumulate a new batch of values, and optionally the corresponding X values."""
+        values = np.asarray(values, dtype=float).ravel()
+
+        first_position = self._received
+        self._received += len(values)
+
+        valid = np.isfinite(values)
+        batch_count = int(np.count_nonzero(valid))
+        if batch_count == 0:
+            return
+
+        valid_values = values[valid] if batch_count != len(values) else values
+
+        batch_mean = float(valid_values.mean())
+        batch_m2 = float(np.square(valid_values - batch_mean).sum())
+
+        if self.count == 0:
+            self.mean = batch_mean
+            self._m2 = batch_m2
+        else:
+            total_count = self.count + batch_count
+            delta = batch_mean - self.mean
+            self.mean += delta * batch_count / total_count
+            self._m2 += batch_m2 + delta**2 * self.count * batch_count / total_count
+        self.count += batch_count
+        self.sum += float(valid_values.sum())
+
+        batch_argmin = int(np.where(valid, values, np.inf).argmin())
+        if self.argmin < 0 or values[batch_argmin] < self.min:
+            self.min = float(values[batch_argmin])
+            self.argmin = first_position + batch_argmin
+
+        batch_argmax = int(np.where(valid, values, -np.inf).argmax())
+        if self.argmax < 0 or values[batch_argmax] > self.max:
+            self.max = float(values[batch_argmax])
+            self.argmax = first_position + batch_argmax
+
+        if x_values is not None:
+            x_values = np.asarray(x_values, dtype=float).ravel()
+            if len(x_values) == len(values):
+                weighted = valid & np.isfinite(x_values)
+                self._weighted_sum += float(
+                    (x_values[weighted] * values[weighted]).sum()
+                )
+                self._weights_sum += float(values[weighted].sum())
+
+    @property
+    def variance(self) -> float:
+        """Population variance of the values."""
+        if self.count == 0:
+            return math.nan
+        return self._m2 / self.count
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation of the values."""
+        return math.sqrt(self.variance)
+
+    @property
+    def center_of_mass(self) -> float:
+        """First moment of the values against the X values, if they were provided."""
+        if self._weights_sum == 0:
+            return math.nan
+        return self._weighted_sum / self._weights_sum
+
+    def as_dict(self) -> dict[str, float | int]:
+        return {
+            "count": self.count,
+            "min": self.min,
+            "argmin": self.argmin,
+            "max": self.max,
+            "argmax": self.argmax,
+            "mean": self.mean,
+            "std": self.std,
+            "sum": self.sum,
+            "com": self.center_of_mass,
+        }
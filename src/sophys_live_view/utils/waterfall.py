@@ -0,0 +1,187 @@
+import typing
+
+import numpy as np
+
+
+class WaterfallImage:
+    """
+    Image of many curves at once, with one row per curve, resampled onto a common X
+    grid, and the color being the Y value.
+
+    Curves are identified by a key, and have a version that must change whenever
+    their data changes. Updating with a list of curves only resamples the ones that
+    are new or whose version changed, so appending curves (e.g. a new run finishing)
+    costs time proportional to the new curves only. All curves are resampled again
+    only when the X range has to grow to fit a new curve.
+
+    The same rows can also be shown as a density image: a 2D histogram of the Y
+    values of all curves along X.
+
+    Parameters
+    ----------
+    columns : int, optional
+        Number of points of the common X grid. Defaults to 512.
+    """
+
+    # NOTE: Grow the X range by this fraction of its size, so that curves slowly
+    # extending outwards (e.g. a live run) don't cause all curves to be resampled.
+    GROWTH_MARGIN = 0.1
+
+    def __init__(self, columns: int = 512):
+        self._columns = columns
+        self._x_limits = None
+
+        self._row_cache = dict()
+        self._keys = list()
+        self._rows = np.empty((0, columns))
+
+    @property
+    def x_limits(self) -> tuple[float, float] | None:
+        """Range of X values covered by the image, or None if there are no curves."""
+        return self._x_limits
+
+    @property
+    def keys(self) -> list[typing.Hashable]:
+        """Keys of the curves of each row, in order."""
+        return list(self._keys)
+
+    @property
+    def origin(self) -> tuple[float, float]:
+        return (self._x_limits[0], 0.0)
+
+    @property
+    def scale(self) -> tuple[float, float]:
+        x_min, x_max = self._x_limits
+        return ((x_max - x_min) / self._columns, 1.0)
+
+    def update(
+        self,
+        curves: list[
+            tuple[
+                typing.Hashable,
+                typing.Hashable,
+                typing.Callable[[], tuple[np.ndarray, np.ndarray]],
+            ]
+        ],
+    ):
+        """
+        Set the curves of the image, as (key, version, get data) tuples, in row order.
+
+        The data of a curve, as a (x, y) tuple, is only gotten when it needs to be
+        resampled.
+        """
+        new_data = dict()
+        for key, version, get_data in curves:
+            cached = self._row_cache.get(key, None)
+            if cached is None or cached[0] != version:
+                x, y = self._valid_points(*get_data())
+                new_data[key] = (version, x, y)
+
+        if self._grow_limits(new_data.values()):
+            # NOTE: The grid changed, so all other curves must be resampled as well.
+            for key, version, get_data in curves:
+                if key not in new_data:
+                    new_data[key] = (version, *self._valid_points(*get_data()))
+            self._row_cache.clear()
+
+        for key, (version, x, y) in new_data.items():
+            self._row_cache[key] = (version, self._resample(x, y))
+
+        keys = [key for key, _, _ in curves]
+        for key in set(self._row_cache.keys()) - set(keys):
+            del self._row_cache[key]
+
+        if keys[: len(self._keys)] == self._keys:
+            # NOTE: Only update the rows of changed curves, and add the new ones.
+            for row_index, key in enumerate(self._keys):
+                if key in new_data:
+                    self._rows[row_index] = self._row_cache[key][1]
+
+            new_keys = keys[len(self._keys) :]
+            if len(new_keys) != 0:
+                self._rows = np.concatenate(
+                    (self._rows, [self._row_cache[key][1] for key in new_keys])
+                )
+        else:
+            self._rows = np.array(
+                [self._row_cache[key][1] for key in keys], ndmin=2
+            ).reshape(len(keys), self._columns)
+        self._keys = keys
+
+    def image(self) -> np.ndarray:
+        """Get the waterfall image, with one row per curve, NaN outside of each curve."""
+        return self._rows
+
+    def density(self, rows: int = 256) -> tuple[np.ndarray, float, float]:
+        """
+        Get a 2D histogram of the Y values of all curves along the X grid.
+
+        Returns the image, with `rows` bins of Y values, and the origin and scale of
+        its Y axis.
+        """
+        valid = np.isfinite(self._rows)
+        if not np.any(valid):
+            return np.zeros((rows, self._columns)), 0.0, 1.0
+
+        values = self._rows[valid]
+        y_min, y_max = float(values.min()), float(values.max())
+        if y_max == y_min:
+            y_max = y_min + 1.0
+
+        columns_index = np.broadcast_to(np.arange(self._columns), self._rows.shape)[
+            valid
+        ]
+        rows_index = ((values - y_min) * (rows / (y_max - y_min))).astype(int)
+        np.minimum(rows_index, rows - 1, out=rows_index)
+
+        density = np.zeros((rows, self._columns))
+        np.add.at(density, (rows_index, columns_index), 1)
+        return density, y_min, (y_max - y_min) / rows
+
+    @staticmethod
+    def _valid_points(x, y) -> tuple[np.ndarray, np.ndarray]:
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if x.ndim != 1 or y.ndim != 1:
+            return np.empty(0), np.empty(0)
+        length = min(len(x), len(y))
+        x, y = x[:length], y[:length]
+
+        valid = np.isfinite(x) & np.isfinite(y)
+        x, y = x[valid], y[valid]
+
+        order = np.argsort(x, kind="stable")
+        return x[order], y[order]
+
+    def _grow_limits(self, curves) -> bool:
+        """Grow the X range to fit the (version, x, y) curves, returning if it changed."""
+        x_min, x_max = np.inf, -np.inf
+        for _, x, _ in curves:
+            if len(x) != 0:
+                x_min, x_max = min(x_min, x[0]), max(x_max, x[-1])
+        if x_min > x_max:
+            return False
+
+        if self._x_limits is not None:
+            current_min, current_max = self._x_limits
+            if x_min >= current_min and x_max <= current_max:
+                return False
+            x_min, x_max = min(x_min, current_min), max(x_max, current_max)
+
+        span = x_max - x_min
+        if span == 0:
+            span = max(abs(x_min), 1.0)
+        self._x_limits = (
+            x_min - span * self.GROWTH_MARGIN,
+            x_max + span * self.GROWTH_MARGIN,
+        )
+        return True
+
+    def _resample(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        if len(x) == 0 or self._x_limits is None:
+            return np.full(self._columns, np.nan)
+
+        x_min, x_max = self._x_limits
+        step = (x_max - x_min) / self._columns
+        grid = x_min + step * (np.arange(self._columns) + 0.5)
+        return np.interp(grid, x, y, left=np.nan, right=np.nan)
@@ -0,0 +1,86 @@
+import math
+
+import numpy as np
+from qtpy.QtCore import Qt
+from qtpy.QtWidgets import QHeaderView, QTableWidgetItem
+from silx.gui.widgets.TableWidget import TableWidget
+
+from ..utils.streaming_statistics import StreamingStatistics
+
+
+class CurveStatisticsTable(TableWidget):
+    """
+    Table displaying the statistics of each plotted curve.
+
+    The statistics are read from the `StreamingStatistics` kept by the data aggregator,
+    so updating the table doesn't depend on the size of the curves.
+    """
+
+    COLUMNS = (
+        "Curve",
+        "Count",
+        "Min",
+        "X at min",
+        "Max",
+        "X at max",
+        "Mean",
+        "Std",
+        "Sum",
+        "COM",
+    )
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.setColumnCount(len(self.COLUMNS))
+        self.setHorizontalHeaderLabels(self.COLUMNS)
+        self.verticalHeader().setVisible(False)
+        self.horizontalHeader().setSectionResizeMode(
+            QHeaderView.ResizeMode.ResizeToContents
+        )
+        self.horizontalHeader().setStretchLastSection(True)
+
+    def set_statistics(
+        self, curves: list[tuple[str, StreamingStatistics, np.ndarray | None]]
+    ):
+        """Show the statistics of each (curve name, statistics, X data) tuple."""
+        self.setRowCount(len(curves))
+
+        for row, (name, statistics, x_data) in enumerate(curves):
+            values = (
+                name,
+                str(statistics.count),
+                self._format(statistics.min),
+                self._format(self._x_at(x_data, statistics.argmin)),
+                self._format(statistics.max),
+                self._format(self._x_at(x_data, statistics.argmax)),
+                self._format(statistics.mean),
+                self._format(statistics.std),
+                self._format(statistics.sum),
+                self._format(statistics.center_of_mass),
+            )
+            for column, value in enumerate(values):
+                item = self.item(row, column)
+                if item is None:
+                    item = QTableWidgetItem()
+                    if column != 0:
+                        item.setTextAlignment(
+                            Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+                        )
+                    self.setItem(row, column, item)
+                item.setText(value)
+
+    @staticmethod
+    def _x_at(x_data: np.ndarray | None, position: int) -> float:
+        if x_data is None or position < 0 or position >= len(x_data):
+            return math.nan
+        return x_data[position]
+
+    @staticmethod
+    def _format(value) -> str:
+        try:
+            if math.isnan(value):
+                return "-"
+        except TypeError:
+            return str(value)
+        return f"{value:.6g}"
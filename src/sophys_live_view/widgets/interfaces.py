@@ -4,6 +4,8 @@ import numpy as np
 from qtpy.QtCore import Signal
 from qtpy.QtWidgets import QWidget
 
+from ..utils.custom_signals import mean
+
 
 class IRunSelector(QWidget):
     """
@@ -101,6 +103,12 @@ class IPlotDisplay(QWidget):
         The signal that will be emitted with the name and expression of the new custom signal.
     show_stats_by_default : bool, optional
         Whether to show a widget with curve statistics by default on the 1D plot.
+    float32_detectors : bool, optional
+        Whether to store floating-point detector data with single precision, when
+        their precision allows it.
+    many_runs_threshold : int, optional
+        Number of selected runs above which the 1D plot shows a single image with
+        all of them, instead of one curve per run.
     """
 
     plot_tab_changed = Signal(str)  # new tab name
@@ -116,4 +124,5 @@ CUSTOM_SIGNALS_ENVIRONMENT = {
     "acos": np.acos,
     "tan": np.tan,
     "atan": np.atan,
+    "mean": mean,
 }
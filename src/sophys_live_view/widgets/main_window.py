@@ -1,12 +1,16 @@
 from importlib.metadata import version
+import logging
+import os
 from pathlib import Path
 from time import sleep
 
 from qtpy.QtCore import Qt
-from qtpy.QtGui import QCloseEvent, QIcon
-from qtpy.QtWidgets import QMainWindow, QSplitter
+from qtpy.QtGui import QCloseEvent, QIcon, QPaintEvent
+from qtpy.QtWidgets import QLabel, QMainWindow, QMessageBox, QSplitter
 
 from ..utils.data_source_manager import DataSourceManager
+from ..utils.session_snapshot import save_session_snapshot
+from ..utils.startup_timing import startup_timer
 from .metadata_viewer import MetadataViewer
 from .plot_display import PlotDisplay
 from .run_selector import RunSelector
@@ -15,10 +19,23 @@ from .signal_selector import SignalSelector
 
 class SophysLiveView(QMainWindow):
     def __init__(
-        self, data_sources, show_stats_by_default=False, parent=None, **kwargs
+        self,
+        data_sources,
+        show_stats_by_default=False,
+        parent=None,
+        *,
+        float32_detectors=False,
+        many_runs_threshold=50,
+        session_snapshot_path: str | os.PathLike | None = None,
+        session_snapshot_max_runs=200,
+        **kwargs,
     ):
         super().__init__(parent, **kwargs)
 
+        self._session_snapshot_path = session_snapshot_path
+        self._session_snapshot_max_runs = session_snapshot_max_runs
+        self._logger = logging.getLogger("sophys.live_view.main_window")
+
         self.resize(1200, 800)
         self.setWindowTitle(
             "sophys-live-view - version {}".format(version("sophys-live-view"))
@@ -46,8 +63,13 @@ class SophysLiveView(QMainWindow):
             self.signal_selector.selected_signals_changed_2d,
             self.signal_selector.custom_signal_added,
             show_stats_by_default,
+            float32_detectors,
+            many_runs_threshold,
         )
 
+        self._run_exporter = None
+        self.run_selector.export_requested.connect(self._export_runs)
+
         self.signal_selector.set_plot_tab_changed_signal(
             self.plot_display.plot_tab_changed
         )
@@ -74,14 +96,131 @@ class SophysLiveView(QMainWindow):
 
         self.setCentralWidget(vertical_splitter)
 
+        self._ingestion_queue_label = QLabel()
+        self._ingestion_queue_label.setToolTip(
+            "Updates waiting to be processed, by priority.\n\n"
+            "Selected runs and open runs are processed first. Updates of the other\n"
+            "runs are processed in batches, while the application is idle."
+        )
+        self.statusBar().addPermanentWidget(self._ingestion_queue_label)
+        self.plot_display.ingestion_queue_depths_changed.connect(
+            self._on_ingestion_queue_depths_changed
+        )
+
+        # NOTE: The previous session is restored first, so that it's browsable while
+        # the other data sources catch up.
+        if session_snapshot_path is not None:
+            from ..utils.session_snapshot_data_source import SessionSnapshotDataSource
+
+            snapshot_data_source = SessionSnapshotDataSource(session_snapshot_path)
+            snapshot_data_source.run_restored.connect(self._on_run_restored)
+            self.data_source_manager.add_data_source(snapshot_data_source)
+
         for data_source in data_sources:
             self.data_source_manager.add_data_source(data_source)
 
         self.data_source_manager.start()
 
+    def _on_ingestion_queue_depths_changed(self, queue_depths: dict):
+        if sum(queue_depths.values()) == 0:
+            self._ingestion_queue_label.clear()
+            return
+
+        self._ingestion_queue_label.setText(
+            "Pending updates: "
+            + ", ".join(
+                f"{priority} {depth}" for priority, depth in queue_depths.items()
+            )
+        )
+
+    def _on_run_restored(self, subuid: str, state: dict):
+        self.run_selector.set_run_bookmarked(subuid, state["bookmarked"])
+        self.plot_display.set_run_axes(subuid, state["axes"])
+        self.signal_selector.add_custom_signals(subuid, state["custom_signals"])
+
+    def _export_runs(self, subuids: list[str], file_path: str):
+        if self._run_exporter is not None and self._run_exporter.isRunning():
+            QMessageBox.warning(
+                self,
+                "Export in progress",
+                "The selected runs weren't exported, since another export is still "
+                "in progress. Try again once it finishes.",
+            )
+            return
+
+        from ..utils.run_export import RunExporter
+
+        runs = list()
+        for subuid in subuids:
+            run_snapshot = self.plot_display.get_run_snapshot(subuid)
+            if run_snapshot is not None:
+                runs.append(run_snapshot)
+
+        self._run_exporter = RunExporter(runs, file_path)
+        self._run_exporter.loading_status.connect(self.run_selector.show_export_status)
+        self._run_exporter.export_failed.connect(self._on_export_failed)
+        self._run_exporter.start()
+
+    def _on_export_failed(self, message: str):
+        QMessageBox.critical(
+            self,
+            "Export failed!",
+            f"The selected runs couldn't be exported: \n{message}",
+        )
+
+    def save_session_snapshot(self):
+        """
+        Save the runs that finished to the session snapshot, if one is configured.
+
+        Only the most recent runs are saved, besides the bookmarked ones, so that
+        the snapshot doesn't keep growing from one session to the next.
+        """
+        if self._session_snapshot_path is None:
+            return
+
+        # NOTE: Runs still open are received again from their data source.
+        run_items = [
+            run_item for run_item in self.run_selector.runs() if not run_item.loading
+        ]
+        kept_run_items = set()
+        for run_item in reversed(run_items):
+            if len(kept_run_items) >= self._session_snapshot_max_runs:
+                break
+            kept_run_items.add(run_item.subuid)
+
+        runs = list()
+        for run_item in run_items:
+            if run_item.subuid not in kept_run_items and not run_item.bookmarked:
+                continue
+
+            run_snapshot = self.plot_display.get_run_snapshot(run_item.subuid)
+            if run_snapshot is None:
+                continue
+            run_snapshot.bookmarked = run_item.bookmarked
+            runs.append(run_snapshot)
+
+        try:
+            save_session_snapshot(self._session_snapshot_path, runs)
+        except OSError:
+            self._logger.exception(
+                "Failed to save the session snapshot to '%s'.",
+                self._session_snapshot_path,
+            )
+
+    def paintEvent(self, event: QPaintEvent):  # noqa: N802
+        super().paintEvent(event)
+
+        startup_timer.mark("first window painted")
+
     def closeEvent(self, event: QCloseEvent):  # noqa: N802
+        if self._run_exporter is not None:
+            self._run_exporter.requestInterruption()
+            self._run_exporter.wait()
+
         self.data_source_manager.stop()
         while self.data_source_manager.isRunning():
             sleep(0.05)
 
+        self.save_session_snapshot()
+
         event.accept()
@@ -81,6 +81,9 @@ class MetadataViewer(IMetadataViewer):
                     metadata_key == "configuration"
                 ):  # NOTE: Force 'configuration' to be at the end.
                     continue
+                if metadata_key == "data_keys":
+                    # NOTE: Only used internally for choosing how to store the data.
+                    continue
                 add_metadata_field(metadata_key, metadata_value, metadata_page)
 
             if "configuration" in self._stream_metadata[uid]:
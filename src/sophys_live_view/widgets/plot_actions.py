@@ -1,16 +1,210 @@
 import copy
+from dataclasses import dataclass
+import itertools
+import math
 
 import numpy as np
+from qtpy.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+from qtpy.QtWidgets import QActionGroup, QMenu
 from silx.gui.plot import Plot1D
 from silx.gui.plot.actions import PlotAction
 
 
+def savgol_coefficients(window_length: int, polyorder: int = 2) -> np.ndarray:
+    """Savitzky-Golay smoothing coefficients for a window of `window_length` (odd) points."""
+    half_window = window_length // 2
+    offsets = np.arange(-half_window, half_window + 1)
+    vandermonde = np.vander(offsets, polyorder + 1, increasing=True)
+    return np.linalg.pinv(vandermonde)[0]
+
+
+def smooth(y: np.ndarray, window_length: int, polyorder: int = 2) -> np.ndarray:
+    """Smooth `y` with a Savitzky-Golay filter, repeating the edge values for padding."""
+    if window_length <= 1:
+        return y
+
+    half_window = window_length // 2
+    padded = np.pad(np.asarray(y, dtype=float), half_window, mode="edge")
+    coefficients = savgol_coefficients(window_length, polyorder)
+    return np.convolve(padded, coefficients[::-1], mode="valid")
+
+
+def compute_derivative(
+    x: np.ndarray, y: np.ndarray, smoothing_window: int = 0
+) -> np.ndarray:
+    """Compute the first derivative of y(x), optionally smoothing `y` beforehand."""
+    if len(y) < 2:
+        return np.zeros(len(y))
+
+    y = smooth(y, smoothing_window)
+    return np.gradient(y, x, edge_order=2 if len(y) > 2 else 1)
+
+
+def extend_derivative(
+    x: np.ndarray,
+    y: np.ndarray,
+    previous_derivative: np.ndarray,
+    smoothing_window: int = 0,
+) -> np.ndarray:
+    """
+    Compute the first derivative of y(x), given the derivative of a prefix of it.
+
+    Only the last samples, which depend on the new data, are recomputed. The result
+    is the same as the one from `compute_derivative` over the whole data.
+    """
+    previous_length = len(previous_derivative)
+    half_window = smoothing_window // 2 if smoothing_window > 1 else 0
+
+    # NOTE: Appending points changes the smoothed values up to `half_window` samples back,
+    # and the derivative depends on the neighbours of each sample. The slice must also
+    # include enough samples on the left so that the recomputed values aren't
+    # affected by the left edge padding of the slice.
+    slice_start = previous_length - 2 * half_window - 3
+    if slice_start <= 0:
+        return compute_derivative(x, y, smoothing_window)
+    splice_start = previous_length - half_window - 1
+
+    tail = compute_derivative(x[slice_start:], y[slice_start:], smoothing_window)
+    return np.concatenate(
+        (previous_derivative[:splice_start], tail[splice_start - slice_start :])
+    )
+
+
+@dataclass(frozen=True)
+class PeakAnalysis:
+    peak: float
+    peak_value: float
+    fwhm: float
+    centroid: float
+    edge: float
+
+
+def _interpolate_crossing(x: np.ndarray, y: np.ndarray, i: int, level: float) -> float:
+    """X position where the segment between samples `i` and `i + 1` crosses `level`."""
+    dy = y[i + 1] - y[i]
+    if dy == 0:
+        return float(x[i])
+    return float(x[i] + (level - y[i]) * (x[i + 1] - x[i]) / dy)
+
+
+def analyze_peak(x: np.ndarray, y: np.ndarray) -> PeakAnalysis | None:
+    """
+    Find the main peak of y(x), and some quantities characterizing it.
+
+    The FWHM is computed from the interpolated half-maximum crossings on each side of
+    the maximum, with the minimum of the curve as its baseline. The centroid is the
+    mean of x weighted by the baseline-subtracted y, and the edge is the position of
+    the extremum of the first derivative.
+
+    Returns None if there aren't enough finite points for an analysis.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) != len(y):
+        return None
+
+    valid = np.isfinite(x) & np.isfinite(y)
+    if np.count_nonzero(valid) < 3:
+        return None
+    x = x[valid]
+    y = y[valid]
+
+    if np.any(np.diff(x) < 0):
+        order = np.argsort(x, kind="stable")
+        x = x[order]
+        y = y[order]
+
+    peak_index = int(y.argmax())
+    baseline = y.min()
+    half_maximum = (y[peak_index] + baseline) / 2
+
+    fwhm = math.nan
+    below_left = np.flatnonzero(y[:peak_index] < half_maximum)
+    below_right = np.flatnonzero(y[peak_index + 1 :] < half_maximum)
+    if len(below_left) > 0 and len(below_right) > 0:
+        left = _interpolate_crossing(x, y, below_left[-1], half_maximum)
+        right = _interpolate_crossing(x, y, peak_index + below_right[0], half_maximum)
+        fwhm = right - left
+
+    weights = y - baseline
+    weights_sum = weights.sum()
+    centroid = float((x * weights).sum() / weights_sum) if weights_sum > 0 else math.nan
+
+    # NOTE: Repeated X values give infinite slopes, which aren't meaningful edges.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slopes = np.abs(np.gradient(y, x))
+    slopes[~np.isfinite(slopes)] = -1
+    edge = float(x[slopes.argmax()])
+
+    return PeakAnalysis(
+        peak=float(x[peak_index]),
+        peak_value=float(y[peak_index]),
+        fwhm=fwhm,
+        centroid=centroid,
+        edge=edge,
+    )
+
+
+def analyze_peaks(
+    curves: dict[str, tuple[np.ndarray, np.ndarray]],
+) -> dict[str, PeakAnalysis | None]:
+    """Run `analyze_peak` over each (x, y) pair in `curves`, keeping their keys."""
+    return {legend: analyze_peak(x, y) for legend, (x, y) in curves.items()}
+
+
+class _BackgroundComputationSignals(QObject):
+    finished = Signal(object, object)  # key, result
+
+
+class BackgroundComputation(QRunnable):
+    """
+    Run a function on the global thread pool, posting its result back through the
+    `finished` signal of `signals`, along with the provided key.
+    """
+
+    def __init__(self, key, function, *args):
+        super().__init__()
+
+        self.signals = _BackgroundComputationSignals()
+
+        self._key = key
+        self._function = function
+        self._args = args
+
+    def start(self):
+        QThreadPool.globalInstance().start(self)
+
+    def run(self):
+        self.signals.finished.emit(self._key, self._function(*self._args))
+
+
+@dataclass
+class _DerivativeState:
+    version: object
+    generation: object
+    x: np.ndarray
+    y: np.ndarray
+    derivative: np.ndarray
+
+
 class DerivativeAction(PlotAction):
     """
     Plot action for computing and displaying the first derivative of all curves when checked.
+
+    Derivatives are updated incrementally when points are appended to a curve, and full
+    computations of large curves are made in a background thread, one at a time for
+    each curve. Updates of a curve while its computation runs are applied once it
+    finishes, extending its result when only points were appended.
+
+    Changes to a curve are detected from the `data_version` and `data_generation`
+    entries of its info, if present, or from the identity of its data arrays otherwise.
+    A curve whose data version changed, but whose generation didn't, is taken as having
+    only had points appended to it.
     """
 
-    def __init__(self, plot: Plot1D, parent=None):
+    SMOOTHING_WINDOWS = (0, 5, 11, 21)
+
+    def __init__(self, plot: Plot1D, parent=None, *, background_threshold=50_000):
         super().__init__(
             plot,
             icon="math-derive",
@@ -22,12 +216,46 @@ class DerivativeAction(PlotAction):
         )
 
         self._displaying = False
+        self._smoothing_window = 0
+        self._background_threshold = background_threshold
 
         self._legend_previously_hidden = False
         self._current_plotted_derivatives = dict()
 
+        self._derivative_states = dict()
+        # NOTE: ID of the background computation running for each curve, and the
+        # curves that changed since theirs started.
+        self._pending_computations = dict()
+        self._outdated_computations = set()
+        self._computation_ids = itertools.count()
+
+        smoothing_menu = QMenu(parent)
+        smoothing_group = QActionGroup(smoothing_menu)
+        for window in self.SMOOTHING_WINDOWS:
+            text = (
+                f"Savitzky-Golay smoothing ({window} points)"
+                if window > 1
+                else "No smoothing"
+            )
+            smoothing_action = smoothing_menu.addAction(text)
+            smoothing_action.setCheckable(True)
+            smoothing_action.setChecked(window == self._smoothing_window)
+            smoothing_action.triggered.connect(
+                lambda _, w=window: self.set_smoothing_window(w)
+            )
+            smoothing_group.addAction(smoothing_action)
+        self.setMenu(smoothing_menu)
+
         self.plot.sigContentChanged.connect(self.update_derivative)
 
+    def set_smoothing_window(self, window_length: int):
+        """Set the Savitzky-Golay smoothing window applied before derivating. 0 disables smoothing."""
+        self._smoothing_window = window_length
+
+        self._derivative_states.clear()
+        for legend in list(self._current_plotted_derivatives.keys()):
+            self.update_derivative("add", "curve", legend)
+
     def update_derivative(self, action, kind, legend):
         if not self._displaying or legend not in self._current_plotted_derivatives:
             return
@@ -40,23 +268,118 @@ class DerivativeAction(PlotAction):
         if original_curve is None:
             return
 
-        x = original_curve.getXData()
-        y = original_curve.getYData()
-        info = original_curve.getInfo()
+        x = original_curve.getXData(copy=False)
+        y = original_curve.getYData(copy=False)
+        version, generation = self._data_versions(original_curve)
+
+        state = self._derivative_states.get(legend, None)
+        if state is not None and self._is_extension(state, version, generation, x, y):
+            if len(x) != len(state.x):
+                state = _DerivativeState(
+                    version,
+                    generation,
+                    x,
+                    y,
+                    extend_derivative(x, y, state.derivative, self._smoothing_window),
+                )
+            self._set_derivative(legend, state)
+            return
+
+        if len(x) >= self._background_threshold:
+            if legend in self._pending_computations:
+                self._outdated_computations.add(legend)
+                return
+            self._start_background_computation(legend, version, generation, x, y)
+            return
+
+        derivative = compute_derivative(x, y, self._smoothing_window)
+        self._set_derivative(
+            legend, _DerivativeState(version, generation, x, y, derivative)
+        )
+
+    @staticmethod
+    def _data_versions(curve) -> tuple[object, object]:
+        """Get the data version and generation of a curve (see the class docstring)."""
+        info = curve.getInfo()
+        if isinstance(info, dict) and "data_version" in info:
+            return info["data_version"], info.get("data_generation", None)
+        return (id(curve.getXData(copy=False)), id(curve.getYData(copy=False))), None
+
+    @staticmethod
+    def _is_extension(
+        state: _DerivativeState,
+        version: object,
+        generation: object,
+        x: np.ndarray,
+        y: np.ndarray,
+    ) -> bool:
+        """Whether (x, y) is the same data as in `state`, with possibly some points appended."""
+        if len(y) != len(x) or len(x) < len(state.x):
+            return False
+        if version == state.version:
+            return len(x) == len(state.x)
+        return generation is not None and generation == state.generation
+
+    def _start_background_computation(
+        self, legend: str, version, generation, x: np.ndarray, y: np.ndarray
+    ):
+        # NOTE: The data is copied, since the original arrays may change while we work.
+        x = np.array(x)
+        y = np.array(y)
+
+        computation_id = next(self._computation_ids)
+        computation = BackgroundComputation(
+            (legend, computation_id, self._smoothing_window, version, generation, x, y),
+            compute_derivative,
+            x,
+            y,
+            self._smoothing_window,
+        )
+        computation.signals.finished.connect(self._on_background_computation_finished)
+        self._pending_computations[legend] = computation_id
+        computation.start()
+
+    def _on_background_computation_finished(self, key, derivative):
+        legend, computation_id, smoothing_window, version, generation, x, y = key
+
+        if self._pending_computations.get(legend, None) != computation_id:
+            # NOTE: Stale result, from before the derivatives were hidden.
+            return
+        del self._pending_computations[legend]
+        outdated = legend in self._outdated_computations
+        self._outdated_computations.discard(legend)
+
+        if not self._displaying or legend not in self._current_plotted_derivatives:
+            return
+
+        # NOTE: Kept even if the curve changed meanwhile, so that the update below
+        # only has to extend it when points were appended.
+        if smoothing_window == self._smoothing_window:
+            self._set_derivative(
+                legend, _DerivativeState(version, generation, x, y, derivative)
+            )
+        if outdated:
+            self.update_derivative("add", "curve", legend)
 
-        if info is None:
-            info = {}
+    def _set_derivative(self, legend: str, state: _DerivativeState):
+        self._derivative_states[legend] = state
 
-        derivative = np.gradient(y, x, edge_order=2)
+        original_curve = self.plot.getCurve(legend)
+        if original_curve is None:
+            return
+
+        info = original_curve.getInfo()
+        info = dict(info) if isinstance(info, dict) else {}
+        info["derivative_of"] = legend
 
         derivative_curve_name = self._current_plotted_derivatives[legend]
         derivative_curve = self.plot.getCurve(derivative_curve_name)
         if derivative_curve is not None:
-            derivative_curve.setData(x, derivative)
+            derivative_curve.setData(state.x, state.derivative)
         else:
             self.plot.addCurve(
-                x,
-                derivative,
+                state.x,
+                state.derivative,
                 legend=derivative_curve_name,
                 info=info,
                 linestyle="--",
@@ -71,6 +394,9 @@ class DerivativeAction(PlotAction):
         if not checked:
             current_plotted_derivatives = copy.copy(self._current_plotted_derivatives)
             self._current_plotted_derivatives.clear()
+            self._derivative_states.clear()
+            self._pending_computations.clear()
+            self._outdated_computations.clear()
 
             for derivative_curve_name in current_plotted_derivatives.values():
                 self.plot.remove(derivative_curve_name)
@@ -91,3 +417,197 @@ class DerivativeAction(PlotAction):
 
             self._legend_previously_hidden = legend_widget.isVisible()
             legend_widget.show()
+
+
+@dataclass
+class _PeakAnalysisState:
+    version: object
+    x: np.ndarray
+    y: np.ndarray
+    analysis: PeakAnalysis | None
+
+
+class PeakAnalysisAction(PlotAction):
+    """
+    Plot action for analyzing the main peak of all visible curves when checked.
+
+    The peak position, FWHM, centroid and edge position of each curve are computed in a
+    background thread, and shown as markers on the plot. A curve is only analyzed
+    again when its data version changes, which is read from the `data_version` entry
+    of the curve's info, if present, or from the identity of its data arrays otherwise.
+    """
+
+    MARKERS = (
+        ("Peak", "peak"),
+        ("Centroid", "centroid"),
+        ("Edge", "edge"),
+    )
+
+    def __init__(self, plot: Plot1D, parent=None, *, debounce_interval=100):
+        super().__init__(
+            plot,
+            icon="math-peak-search",
+            text="Peak analysis",
+            tooltip="Show the peak, FWHM, centroid and edge of all curves on the plot",
+            triggered=self.analysis_action,
+            checkable=True,
+            parent=parent,
+        )
+
+        self._displaying = False
+
+        self._analysis_states = dict()
+        self._plotted_markers = dict()
+
+        self._computation_running = False
+        self._analysis_requested = False
+
+        self._analysis_timer = QTimer(self)
+        self._analysis_timer.setSingleShot(True)
+        self._analysis_timer.setInterval(debounce_interval)
+        self._analysis_timer.timeout.connect(self._analyze_visible_curves)
+
+        self.plot.sigContentChanged.connect(self.update_analysis)
+
+    def get_analysis(self, legend: str) -> PeakAnalysis | None:
+        """Get the latest analysis of a curve, or None if it wasn't analyzed (yet)."""
+        state = self._analysis_states.get(legend, None)
+        if state is None:
+            return None
+        return state.analysis
+
+    def analysis_action(self, checked=False):
+        self._displaying = checked
+
+        if not checked:
+            self._analysis_timer.stop()
+            for legend in list(self._plotted_markers.keys()):
+                self._remove_markers(legend)
+            return
+
+        self._analyze_visible_curves()
+
+    def update_analysis(self, action, kind, legend):
+        if not self._displaying or kind != "curve":
+            return
+
+        if action == "remove":
+            self._remove_markers(legend)
+            return
+
+        # NOTE: Curves are re-added on every plot refresh, so draw the markers right away
+        # if nothing changed, instead of waiting for the debounce timer to fire.
+        curve = self.plot.getCurve(legend)
+        if curve is not None and self._is_up_to_date(curve):
+            self._draw_markers(curve)
+            return
+
+        self._analysis_timer.start()
+
+    @staticmethod
+    def _data_version(curve) -> object:
+        info = curve.getInfo()
+        if isinstance(info, dict) and "data_version" in info:
+            return info["data_version"]
+        # NOTE: The arrays are kept alive in the analysis state, so their IDs can't be reused.
+        return (id(curve.getXData(copy=False)), id(curve.getYData(copy=False)))
+
+    @staticmethod
+    def _is_analyzable(curve) -> bool:
+        info = curve.getInfo()
+        if isinstance(info, dict) and "derivative_of" in info:
+            return False
+        return curve.isVisible()
+
+    def _is_up_to_date(self, curve) -> bool:
+        state = self._analysis_states.get(curve.getName(), None)
+        return state is not None and state.version == self._data_version(curve)
+
+    def _analyze_visible_curves(self):
+        if not self._displaying:
+            return
+
+        if self._computation_running:
+            # NOTE: Only have a single computation at a time, so that frequent updates
+            # don't pile up work in the thread pool.
+            self._analysis_requested = True
+            return
+
+        curves = [c for c in self.plot.getAllCurves() if self._is_analyzable(c)]
+        plotted_legends = set(c.getName() for c in curves)
+        for legend in list(self._analysis_states.keys()):
+            if legend not in plotted_legends:
+                del self._analysis_states[legend]
+
+        outdated_curves = dict()
+        for curve in curves:
+            if self._is_up_to_date(curve):
+                self._draw_markers(curve)
+                continue
+
+            # NOTE: silx replaces the curve arrays on updates, instead of modifying them
+            # in-place, so they can be used in the background thread without copying.
+            outdated_curves[curve.getName()] = (
+                self._data_version(curve),
+                curve.getXData(copy=False),
+                curve.getYData(copy=False),
+            )
+
+        if len(outdated_curves) == 0:
+            return
+
+        computation = BackgroundComputation(
+            outdated_curves,
+            analyze_peaks,
+            {legend: (x, y) for legend, (_, x, y) in outdated_curves.items()},
+        )
+        computation.signals.finished.connect(self._on_background_computation_finished)
+        self._computation_running = True
+        computation.start()
+
+    def _on_background_computation_finished(self, analyzed_curves, results):
+        self._computation_running = False
+
+        for legend, (version, x, y) in analyzed_curves.items():
+            self._analysis_states[legend] = _PeakAnalysisState(
+                version, x, y, results[legend]
+            )
+
+        if self._displaying:
+            for legend in analyzed_curves.keys():
+                curve = self.plot.getCurve(legend)
+                if curve is not None and self._is_up_to_date(curve):
+                    self._draw_markers(curve)
+
+        if self._analysis_requested:
+            self._analysis_requested = False
+            self._analyze_visible_curves()
+
+    def _draw_markers(self, curve):
+        legend = curve.getName()
+        analysis = self._analysis_states[legend].analysis
+
+        self._remove_markers(legend)
+        if analysis is None:
+            return
+
+        marker_names = list()
+        for name, field in self.MARKERS:
+            position = getattr(analysis, field)
+            if not math.isfinite(position):
+                continue
+
+            text = f"{name}: {position:.4g}"
+            if field == "peak" and math.isfinite(analysis.fwhm):
+                text += f" (FWHM: {analysis.fwhm:.4g})"
+
+            marker_name = f"{name} of {legend}"
+            self.plot.addXMarker(
+                position, legend=marker_name, text=text, color=curve.getColor()
+            )
+            marker_names.append(marker_name)
+        self._plotted_markers[legend] = marker_names
+
+    def _remove_markers(self, legend: str):
+        for marker_name in self._plotted_markers.pop(legend, ()):
+            self.plot.remove(marker_name, kind="marker")
@@ -1,46 +1,200 @@
-from collections import defaultdict
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from functools import partial
+import time
 
 import numpy as np
+import qtawesome as qta
 from qtpy.QtCore import QObject, Qt, QTimer, Signal
-from qtpy.QtWidgets import QLabel, QStackedWidget, QTabWidget, QVBoxLayout
+from qtpy.QtWidgets import (
+    QComboBox,
+    QDockWidget,
+    QLabel,
+    QStackedWidget,
+    QTabWidget,
+    QToolBar,
+    QVBoxLayout,
+    QWidget,
+)
 from silx.gui.colors import Colormap
 from silx.gui.plot.PlotWindow import Plot1D, Plot2D
 
+from ..utils.binned_scatter import BinnedScatter
+from ..utils.custom_signals import CustomSignalEvaluator
+from ..utils.dtype_policy import DtypePolicy
+from ..utils.reference_resampling import ResampledReferenceCache
+from ..utils.session_snapshot import RunSnapshot
+from ..utils.startup_timing import startup_timer
+from ..utils.streaming_statistics import StreamingStatistics
+from ..utils.waterfall import WaterfallImage
+from .curve_statistics import CurveStatisticsTable
 from .interfaces import CUSTOM_SIGNALS_ENVIRONMENT, IPlotDisplay
-from .plot_actions import DerivativeAction
+from .plot_actions import DerivativeAction, PeakAnalysisAction
 
 
 class DataAggregator(QObject):
     new_data_received = Signal(str)  # subuid
+    queue_depths_changed = Signal(dict)  # {priority class : pending updates}
 
-    def __init__(self, new_stream_signal: Signal, new_data_signal: Signal):
+    # NOTE: In decreasing priority. Selected runs are the ones being displayed, live
+    # runs are open ones not coming from a preloading data source, and deferred runs
+    # are all others (e.g. closed or historical runs that aren't selected).
+    PRIORITY_CLASSES = ("selected", "live", "deferred")
+
+    # Maximum time, in seconds, spent ingesting deferred data at a time.
+    DEFERRED_BATCH_DURATION = 0.02
+
+    def __init__(
+        self,
+        new_stream_signal: Signal,
+        new_data_signal: Signal,
+        dtype_policy: DtypePolicy | None = None,
+        *,
+        stream_closed_signal: Signal | None = None,
+        loading_status_signal: Signal | None = None,
+    ):
         """
         Aggregate received data into useful containers.
 
+        Received data is queued, and ingested by priority: data of selected and live
+        runs is ingested as soon as the GUI is free, one update at a time, while
+        data of the other runs is coalesced into large batches, ingested in idle
+        time. Pending data of a run is always ingested before its data is accessed.
+
         Parameters
         ----------
         new_stream_signal : Signal
             Signal that will be emitted when a new stream has been created.
         new_data_signal : Signal
             Signal that will be emitted when new data for a stream has been received.
+        dtype_policy : DtypePolicy, optional
+            Policy for choosing the dtype each signal is stored with.
+        stream_closed_signal : Signal, optional
+            Signal that will be emitted when a stream is closed.
+        loading_status_signal : Signal, optional
+            Signal that will be emitted with the loading progress of data sources.
+            Data of runs from a data source that is still loading is deferred.
         """
         super().__init__()
 
-        self._data_cache = defaultdict(lambda: defaultdict(lambda: np.array([[], []])))
+        self._dtype_policy = dtype_policy if dtype_policy is not None else DtypePolicy()
+
+        self._data_cache = defaultdict(lambda: dict())
+        self._storage_dtypes = defaultdict(lambda: dict())
+        # NOTE: Grids of signals that can't hold NaN keep which positions were filled here.
+        self._validity_masks = defaultdict(lambda: dict())
+        # NOTE: Rows of grid signals changed since they were last taken, or None if
+        # the whole signal may have changed.
+        self._dirty_rows = defaultdict(lambda: dict())
         self._metadata_cache = defaultdict(lambda: dict())
         self._signals_name_map = defaultdict(lambda: dict())
         self._custom_signals_map = defaultdict(lambda: dict())
+        self._custom_signal_evaluator = CustomSignalEvaluator(
+            CUSTOM_SIGNALS_ENVIRONMENT,
+            self._get_custom_signal_input,
+            self.get_data_version,
+            self._runs,
+            self._alignment_signal,
+        )
+        # NOTE: Display name, signals, detectors and motors of each stream.
+        self._stream_declarations = dict()
+        self._data_versions = defaultdict(lambda: defaultdict(int))
+        # NOTE: Increased only when data changes other than by having values appended.
+        self._data_generations = defaultdict(lambda: defaultdict(int))
+
+        # NOTE: Keys are (signal, X signal), with the X signal being None for
+        # the statistics without a first moment against another signal.
+        self._statistics = defaultdict(lambda: dict())
+
+        # NOTE: Keyed by subuid, with the data source uid and the queued updates.
+        self._pending_data = dict()
+        self._selected_runs = set()
+        self._closed_runs = set()
+        self._loading_data_sources = set()
+        self._queue_depths = dict.fromkeys(self.PRIORITY_CLASSES, 0)
+
+        self._ingestion_timer = QTimer()
+        self._ingestion_timer.setSingleShot(True)
+        # NOTE: Zero-interval timers only fire once the event queue is empty.
+        self._ingestion_timer.setInterval(0)
+        self._ingestion_timer.timeout.connect(self._ingest_pending_data)
 
         new_stream_signal.connect(self._on_new_stream)
         new_data_signal.connect(self._receive_new_data)
+        if stream_closed_signal is not None:
+            stream_closed_signal.connect(self._on_stream_closed)
+        if loading_status_signal is not None:
+            loading_status_signal.connect(self._on_loading_status)
+
+    def set_selected_runs(self, subuids: set[str]):
+        """Set the runs whose data is ingested with the highest priority."""
+        self._selected_runs = set(subuids)
+
+        for subuid in self._selected_runs:
+            self._flush_pending_data(subuid)
+
+    def queue_depths(self) -> dict[str, int]:
+        """Get the number of pending updates in each priority class."""
+        depths = dict.fromkeys(self.PRIORITY_CLASSES, 0)
+        for subuid, (uid, updates) in self._pending_data.items():
+            depths[self._priority_of(uid, subuid)] += len(updates)
+        return depths
 
     def get_data(self, uid: str, signal_name: str, *, force_1d: bool = False):
+        self._flush_pending_data(uid)
+
         data = self._data_cache[uid].get(signal_name, None)
-        if force_1d and data is not None:
-            data = data.flatten()
-            data = data[~np.isnan(data)]
+        if force_1d and isinstance(data, np.ndarray):
+            validity_mask = self._validity_masks[uid].get(signal_name, None)
+            if validity_mask is not None:
+                data = data[validity_mask]
+            else:
+                data = data.flatten()
+                if np.issubdtype(data.dtype, np.inexact):
+                    data = data[~np.isnan(data)]
         return data
 
+    def take_dirty_rows(self, uid: str, signal_name: str) -> np.ndarray | None:
+        """
+        Get the (sorted) rows of a grid signal that changed since the last call, and
+        start tracking changes again from there.
+
+        Returns None if the whole signal may have changed, e.g. on its first call, or
+        if the signal is not a grid.
+        """
+        self._flush_pending_data(uid)
+
+        dirty_rows = self._dirty_rows[uid].get(signal_name, None)
+        self._dirty_rows[uid][signal_name] = set()
+
+        if dirty_rows is None:
+            return None
+        return np.array(sorted(dirty_rows), dtype=int)
+
+    def get_validity_mask(self, uid: str, signal_name: str) -> np.ndarray | None:
+        """
+        Get which positions of a grid signal were filled, for signals whose dtype
+        can't represent missing values with NaN. Returns None for other signals.
+        """
+        self._flush_pending_data(uid)
+        return self._validity_masks[uid].get(signal_name, None)
+
+    def get_data_version(self, uid: str, signal_name: str) -> int:
+        """Get a counter that increases every time the data of a signal changes."""
+        self._flush_pending_data(uid)
+        return self._data_versions[uid][signal_name]
+
+    def get_data_generation(self, uid: str, signal_name: str) -> int:
+        """
+        Get a counter that increases every time the data of a signal changes other
+        than by having values appended to it (e.g. a grid position being filled, or a
+        custom signal being recomputed).
+
+        While it's unchanged, newer data of the signal starts with the older data.
+        """
+        self._flush_pending_data(uid)
+        return self._data_generations[uid][signal_name]
+
     def get_metadata(self, uid: str):
         return self._metadata_cache[uid]
 
@@ -48,19 +202,124 @@ class DataAggregator(QObject):
         return self._signals_name_map[uid].get(signal, signal)
 
     def get_signals(self, uid: str) -> set[str]:
+        self._flush_pending_data(uid)
         return set(self._data_cache[uid].keys())
 
+    def get_run_snapshot(self, uid: str) -> RunSnapshot | None:
+        """Get all data of a run, to save it in a session snapshot."""
+        if uid not in self._stream_declarations:
+            return None
+        self._flush_pending_data(uid)
+
+        display_name, signals, detectors, motors = self._stream_declarations[uid]
+        signals_name_map = dict(self._signals_name_map[uid])
+        for name in self._custom_signals_map[uid]:
+            signals_name_map[name] = name + " (custom)"
+
+        return RunSnapshot(
+            subuid=uid,
+            display_name=display_name,
+            signals=signals | self._data_cache[uid].keys(),
+            signals_name_map=signals_name_map,
+            detectors=detectors,
+            motors=motors,
+            metadata=self._metadata_cache[uid],
+            columns=dict(self._data_cache[uid]),
+            validity_masks=dict(self._validity_masks[uid]),
+            custom_signals=dict(self._custom_signals_map[uid]),
+        )
+
+    def get_statistics(
+        self, uid: str, signal_name: str, x_signal_name: str | None = None
+    ) -> StreamingStatistics | None:
+        """
+        Get the statistics of a signal in a run, updated as new data arrives.
+
+        If `x_signal_name` is provided, the statistics also contain the first moment
+        of the signal against it. Returns None if the signal has no numeric data.
+        """
+        key = (signal_name, x_signal_name)
+
+        statistics = self._statistics[uid].get(key, None)
+        if statistics is not None:
+            return statistics
+
+        data = self.get_data(uid, signal_name, force_1d=True)
+        if data is None or not StreamingStatistics.supports(data):
+            return None
+
+        x_data = None
+        if x_signal_name is not None:
+            x_data = self.get_data(uid, x_signal_name, force_1d=True)
+            if x_data is None or not StreamingStatistics.supports(x_data):
+                return None
+
+        statistics = StreamingStatistics()
+        statistics.update(data, x_data)
+        self._statistics[uid][key] = statistics
+        return statistics
+
     def add_custom_signal(self, uid: str, name: str, expression: str):
+        """
+        Add a signal to a run, computed from an expression of other signals.
+
+        Besides the run's own signals, the expression can use ``runs`` to read
+        signals of other runs, aligned to this run (see `CustomSignalEvaluator`).
+        The signal is recomputed whenever any signal it reads changes.
+        """
         self._custom_signals_map[uid][name] = expression
+        self._update_custom_signal(uid, name)
 
-        environment = CUSTOM_SIGNALS_ENVIRONMENT
-        for detector, value in self._data_cache[uid].items():
-            environment[detector] = value
+    def _update_custom_signal(self, uid: str, name: str) -> bool:
+        """Recompute a custom signal, if its inputs changed. Returns if it changed."""
+        self._flush_pending_data(uid)
 
+        expression = self._custom_signals_map[uid][name]
         try:
-            self._data_cache[uid][name] = eval(expression, None, environment)
+            value, changed = self._custom_signal_evaluator.evaluate(
+                uid, name, expression
+            )
         except Exception:
             print(f"The provided expression '{expression}' is not valid.")
+            return False
+        if not changed:
+            return False
+
+        self._data_cache[uid][name] = value
+        self._data_versions[uid][name] += 1
+        self._data_generations[uid][name] += 1
+        self._dirty_rows[uid][name] = None
+
+        # NOTE: Custom signals are recomputed as a whole, so their statistics are too.
+        for key in list(self._statistics[uid].keys()):
+            if name in key:
+                del self._statistics[uid][key]
+        return True
+
+    def _update_dependent_custom_signals(self, subuid: str):
+        """Recompute custom signals of other runs that read signals of this run."""
+        for uid, name in self._custom_signal_evaluator.dependents(subuid):
+            if uid != subuid and self._update_custom_signal(uid, name):
+                self.new_data_received.emit(uid)
+
+    def _get_custom_signal_input(self, uid: str, signal_name: str) -> np.ndarray | None:
+        data = self.get_data(uid, signal_name)
+        validity_mask = self._validity_masks[uid].get(signal_name, None)
+        if validity_mask is not None:
+            data = np.where(validity_mask, data, np.nan)
+        return data
+
+    def _runs(self) -> list[tuple[str, str]]:
+        return [
+            (subuid, declaration[0])
+            for subuid, declaration in self._stream_declarations.items()
+        ]
+
+    def _alignment_signal(self, uid: str) -> str | None:
+        declaration = self._stream_declarations.get(uid, None)
+        if declaration is None or len(declaration[3]) == 0:
+            return None
+        return declaration[3][0]
 
     def _on_new_stream(
         self,
@@ -75,31 +334,231 @@ class DataAggregator(QObject):
     ):
         self._metadata_cache[subuid] = metadata
         self._signals_name_map[subuid] = signals_name_map
+        self._stream_declarations[subuid] = (
+            display_name,
+            set(signals),
+            set(detectors),
+            list(motors),
+        )
+
+        data_keys = metadata.get("data_keys", {})
+        storage_dtypes = self._storage_dtypes[subuid]
+        for signal in signals:
+            dtype = self._dtype_policy.storage_dtype(
+                data_keys.get(signal, None), is_detector=signal in detectors
+            )
+            if dtype is not None:
+                storage_dtypes[signal] = dtype
 
         if "shape" in metadata:
             for detector in metadata.get("detectors", []):
-                self._data_cache[subuid][detector] = np.ones(metadata["shape"]) * np.nan
+                dtype = storage_dtypes.get(detector, np.dtype(np.float64))
+                if DtypePolicy.needs_validity_mask(dtype):
+                    self._data_cache[subuid][detector] = np.zeros(
+                        metadata["shape"], dtype=dtype
+                    )
+                    self._validity_masks[subuid][detector] = np.zeros(
+                        metadata["shape"], dtype=bool
+                    )
+                else:
+                    self._data_cache[subuid][detector] = np.full(
+                        metadata["shape"], np.nan, dtype=dtype
+                    )
+                self._data_versions[subuid][detector] += 1
+                self._data_generations[subuid][detector] += 1
+                self._dirty_rows[subuid][detector] = None
+
+        # NOTE: Custom signals reading a range of runs (e.g. the last ones) may now
+        # include this one.
+        self._update_dependent_custom_signals(subuid)
+
+    def _on_stream_closed(self, uid: str, subuid: str):
+        self._closed_runs.add(subuid)
+
+    def _on_loading_status(self, uid: str, message: str, percentage: float):
+        if percentage >= 100.0:
+            self._loading_data_sources.discard(uid)
+        else:
+            self._loading_data_sources.add(uid)
+
+    def _priority_of(self, uid: str, subuid: str) -> str:
+        if subuid in self._selected_runs:
+            return "selected"
+        if subuid not in self._closed_runs and uid not in self._loading_data_sources:
+            return "live"
+        return "deferred"
 
     def _receive_new_data(self, uid: str, subuid: str, new_data: dict, metadata: dict):
+        if subuid not in self._pending_data:
+            self._pending_data[subuid] = (uid, deque())
+        self._pending_data[subuid][1].append((new_data, metadata))
+
+        if not self._ingestion_timer.isActive():
+            self._ingestion_timer.start()
+
+    def _ingest_pending_data(self):
+        pending_by_priority = defaultdict(list)
+        for subuid, (uid, _) in self._pending_data.items():
+            pending_by_priority[self._priority_of(uid, subuid)].append(subuid)
+
+        for priority in ("selected", "live"):
+            for subuid in pending_by_priority[priority]:
+                _, updates = self._pending_data.pop(subuid)
+                for new_data, metadata in updates:
+                    self._ingest(subuid, new_data, metadata)
+                    self.new_data_received.emit(subuid)
+
+        start_time = time.perf_counter()
+        for subuid in pending_by_priority["deferred"]:
+            if time.perf_counter() - start_time > self.DEFERRED_BATCH_DURATION:
+                break
+            self._flush_pending_data(subuid)
+
+        if len(self._pending_data) != 0:
+            self._ingestion_timer.start()
+
+        queue_depths = self.queue_depths()
+        if queue_depths != self._queue_depths:
+            self._queue_depths = queue_depths
+            self.queue_depths_changed.emit(queue_depths)
+
+    def _flush_pending_data(self, subuid: str):
+        """Ingest all pending data of a run, coalescing it into as few updates as possible."""
+        if subuid not in self._pending_data:
+            return
+        _, updates = self._pending_data.pop(subuid)
+
+        batch_data, batch_metadata = None, None
+        for new_data, metadata in updates:
+            # NOTE: Updates with metadata (e.g. grid positions) are ingested on their own.
+            batchable = not any(metadata.get(signal_name) for signal_name in new_data)
+            if (
+                batch_data is not None
+                and batchable
+                and batch_data.keys() == new_data.keys()
+            ):
+                for signal_name, values in new_data.items():
+                    batch_data[signal_name].append(values)
+                continue
+
+            if batch_data is not None:
+                self._ingest_batch(subuid, batch_data, batch_metadata)
+                batch_data = None
+
+            if not batchable:
+                self._ingest(subuid, new_data, metadata)
+            else:
+                batch_data = {name: [values] for name, values in new_data.items()}
+                batch_metadata = metadata
+
+        if batch_data is not None:
+            self._ingest_batch(subuid, batch_data, batch_metadata)
+
+        self.new_data_received.emit(subuid)
+
+    def _ingest_batch(self, subuid: str, batch_data: dict, metadata: dict):
+        self._ingest(
+            subuid,
+            {
+                signal_name: np.concatenate(values) if len(values) > 1 else values[0]
+                for signal_name, values in batch_data.items()
+            },
+            metadata,
+        )
+
+    def _ingest(self, subuid: str, new_data: dict, metadata: dict):
         for detector_name, detector_values in new_data.items():
-            if detector_name in metadata and "position" in metadata[detector_name]:
+            if detector_name in metadata and metadata[detector_name].get("restored"):
+                # NOTE: Whole columns from a session snapshot, kept as they are.
+                self._data_cache[subuid][detector_name] = detector_values
+                validity_mask = metadata[detector_name].get("validity_mask", None)
+                if validity_mask is not None:
+                    self._validity_masks[subuid][detector_name] = validity_mask
+                self._dirty_rows[subuid][detector_name] = None
+                self._data_generations[subuid][detector_name] += 1
+            elif detector_name in metadata and "position" in metadata[detector_name]:
                 position = metadata[detector_name]["position"]
                 assert len(detector_values) == 1, (
                     "Received multiple values for a single data position."
                 )
-                self._data_cache[subuid][detector_name][position] = detector_values[0]
+                self._set_grid_value(
+                    subuid, detector_name, position, np.asarray(detector_values)
+                )
             else:
-                self._data_cache[subuid][detector_name] = np.append(
-                    self._data_cache[subuid][detector_name], detector_values
+                self._data_cache[subuid][detector_name] = DtypePolicy.append(
+                    self._data_cache[subuid].get(detector_name, None),
+                    detector_values,
+                    self._storage_dtypes[subuid].get(detector_name, None),
                 )
+                self._dirty_rows[subuid][detector_name] = None
+            self._data_versions[subuid][detector_name] += 1
 
-        for name, expression in self._custom_signals_map[subuid].items():
-            self.add_custom_signal(subuid, name, expression)
+        # NOTE: Statistics of restored runs are only computed when they're needed.
+        if not any(metadata.get(name, {}).get("restored") for name in new_data):
+            self._update_statistics(subuid, new_data)
 
-        self.new_data_received.emit(subuid)
+        for name in self._custom_signals_map[subuid]:
+            self._update_custom_signal(subuid, name)
+        self._update_dependent_custom_signals(subuid)
+
+    def _set_grid_value(
+        self, subuid: str, signal_name: str, position: tuple, values: np.ndarray
+    ):
+        grid = self._data_cache[subuid][signal_name]
+        dirty_rows = self._dirty_rows[subuid].get(signal_name, None)
+        if not DtypePolicy.can_store(values, grid.dtype):
+            grid = grid.astype(np.result_type(grid, values))
+            self._data_cache[subuid][signal_name] = grid
+            dirty_rows = self._dirty_rows[subuid][signal_name] = None
+
+        grid[position] = values[0]
+        # NOTE: Positions can be filled in any order, so the flattened data isn't
+        # only appended to.
+        self._data_generations[subuid][signal_name] += 1
+        if dirty_rows is not None:
+            dirty_rows.add(position[0] if grid.ndim > 1 else 0)
+
+        validity_mask = self._validity_masks[subuid].get(signal_name, None)
+        if validity_mask is not None:
+            validity_mask[position] = True
+
+    def _update_statistics(self, subuid: str, new_data: dict):
+        statistics = self._statistics[subuid]
+
+        for signal_name, values in new_data.items():
+            if (signal_name, None) not in statistics and StreamingStatistics.supports(
+                values
+            ):
+                statistics[(signal_name, None)] = StreamingStatistics()
+
+        for key, signal_statistics in list(statistics.items()):
+            signal_name, x_signal_name = key
+            if signal_name not in new_data:
+                continue
+
+            if x_signal_name is None:
+                signal_statistics.update(new_data[signal_name])
+            elif x_signal_name in new_data:
+                signal_statistics.update(new_data[signal_name], new_data[x_signal_name])
+            else:
+                # NOTE: Can't update incrementally, so recompute it when it's needed.
+                del statistics[key]
+
+
+@dataclass
+class _GridImageState:
+    data: np.ndarray
+    value_range: tuple[float, float] | None
+    colormap_range: tuple[float, float] | None = None
 
 
 class PlotDisplay(IPlotDisplay):
+    ingestion_queue_depths_changed = Signal(dict)  # {priority class : pending updates}
+
+    COMPARISON_MODES = ("Difference", "Ratio")
+    BINNED_SCATTER_RESOLUTION = (256, 256)
+    MANY_RUNS_MODES = ("Waterfall", "Density")
+
     def __init__(
         self,
         data_source_manager,
@@ -108,11 +567,24 @@ class PlotDisplay(IPlotDisplay):
         selected_signals_changed_2d: Signal,
         custom_signal_added: Signal,
         show_stats_by_default: bool = False,
+        float32_detectors: bool = False,
+        many_runs_threshold: int = 50,
     ):
         super().__init__()
 
+        self._many_runs_threshold = many_runs_threshold
+        self._many_runs_mode = self.MANY_RUNS_MODES[0]
+        # NOTE: Keyed by the Y axis signal.
+        self._waterfalls = dict()
+
         self._current_uids = [("", "")]
 
+        self._plotted_curves_statistics = list()
+
+        self._reference_uid = ""
+        self._comparison_mode = self.COMPARISON_MODES[0]
+        self._resampled_references = ResampledReferenceCache()
+
         self._1d_x_axis_names = defaultdict(lambda: "")
         self._1d_y_axis_names = defaultdict(lambda: set())
 
@@ -120,6 +592,17 @@ class PlotDisplay(IPlotDisplay):
         self._2d_y_axis_names = defaultdict(lambda: "")
         self._2d_z_axis_names = defaultdict(lambda: set())
 
+        self._binned_scatters = dict()
+        self._zoomed_binned_scatters = dict()
+
+        self._grid_images = dict()
+
+        # NOTE: Keyed by tab index. The zoom is only reset automatically when the selection
+        # changes, or when the user didn't change it since the last automatic reset.
+        self._zoom_selection_keys = dict()
+        self._automatic_limits = dict()
+        self._resetting_zoom = False
+
         layout = QVBoxLayout()
         self._stacked_widget = QStackedWidget()
         layout.addWidget(self._stacked_widget)
@@ -135,33 +618,89 @@ class PlotDisplay(IPlotDisplay):
         _plot_1d = Plot1D()
         _plot_1d.setDefaultPlotPoints(True)
         _plot_1d.toolBar().addAction(DerivativeAction(_plot_1d, _plot_1d))
+        _plot_1d.toolBar().addAction(PeakAnalysisAction(_plot_1d, _plot_1d))
         self._plots.addTab(_plot_1d, "1D")
 
-        if show_stats_by_default:
-            dock_widget = _plot_1d.getStatsWidget().parent()
-            # Run the callback that adds the widget to its docking area.
-            dock_widget.show()
-            # By default, it adds the dock widget to the right area. We need it at the bottom.
-            _plot_1d.removeDockWidget(dock_widget)
-            _plot_1d.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, dock_widget)
-            # It was hidden when we removed the dock widget from its parent.
-            dock_widget.show()
-
-        _plot_2d_scatter = Plot2D()
-        _plot_2d_scatter.setDefaultColormap(Colormap(name="viridis"))
-        self._plots.addTab(_plot_2d_scatter, "2D - Scatter")
-
-        _plot_2d_grid = Plot2D()
-        _plot_2d_grid.setDefaultColormap(Colormap(name="viridis"))
-        self._plots.addTab(_plot_2d_grid, "2D - Grid")
+        self._statistics_table = CurveStatisticsTable()
+        self._statistics_dock = QDockWidget("Statistics", _plot_1d)
+        self._statistics_dock.setWidget(self._statistics_table)
+        _plot_1d.addDockWidget(
+            Qt.DockWidgetArea.BottomDockWidgetArea, self._statistics_dock
+        )
+        self._statistics_dock.setVisible(show_stats_by_default)
+        self._statistics_dock.visibilityChanged.connect(self._on_statistics_shown)
+
+        statistics_action = self._statistics_dock.toggleViewAction()
+        statistics_action.setIcon(qta.icon("mdi6.sigma"))
+        statistics_action.setToolTip("Show statistics of all curves on the plot")
+        _plot_1d.toolBar().addAction(statistics_action)
+
+        comparison_toolbar = QToolBar("Reference comparison", _plot_1d)
+        comparison_toolbar.addWidget(QLabel("Reference: "))
+        self._reference_run_combo = QComboBox()
+        self._reference_run_combo.setSizeAdjustPolicy(
+            QComboBox.SizeAdjustPolicy.AdjustToContents
+        )
+        self._reference_run_combo.addItem("None", "")
+        self._reference_run_combo.setToolTip(
+            "Show the curves of the other selected runs compared to this run"
+        )
+        self._reference_run_combo.currentIndexChanged.connect(
+            self._on_reference_run_changed
+        )
+        comparison_toolbar.addWidget(self._reference_run_combo)
+        self._comparison_mode_combo = QComboBox()
+        self._comparison_mode_combo.addItems(self.COMPARISON_MODES)
+        self._comparison_mode_combo.setEnabled(False)
+        self._comparison_mode_combo.currentTextChanged.connect(
+            self._on_comparison_mode_changed
+        )
+        comparison_toolbar.addWidget(self._comparison_mode_combo)
+        _plot_1d.addToolBar(comparison_toolbar)
+
+        many_runs_toolbar = QToolBar("Many runs", _plot_1d)
+        many_runs_toolbar.addWidget(QLabel("Many runs: "))
+        self._many_runs_mode_combo = QComboBox()
+        self._many_runs_mode_combo.addItems(self.MANY_RUNS_MODES)
+        self._many_runs_mode_combo.setToolTip(
+            f"How to show the curves when more than {many_runs_threshold} runs are selected:\n"
+            "  Waterfall - An image with one row per run, colored by the Y value\n"
+            "  Density - A histogram of the Y values of all runs along X"
+        )
+        self._many_runs_mode_combo.currentTextChanged.connect(
+            self._on_many_runs_mode_changed
+        )
+        many_runs_toolbar.addWidget(self._many_runs_mode_combo)
+        _plot_1d.addToolBar(many_runs_toolbar)
+
+        # NOTE: The 2D plots are only built when their tab is first shown, since
+        # they're not needed to show the window, and take a while to build.
+        self._plots.addTab(QWidget(), "2D - Scatter")
+        self._plots.addTab(QWidget(), "2D - Grid")
+        self._lazy_tab_builders = {
+            1: self._build_2d_scatter_plot,
+            2: self._build_2d_grid_plot,
+        }
+
+        self._binned_scatter_action = None
+        self._binned_scatter_rebin_timer = QTimer()
+        self._binned_scatter_rebin_timer.setSingleShot(True)
+        self._binned_scatter_rebin_timer.setInterval(100)
+        self._binned_scatter_rebin_timer.timeout.connect(self.update_plots)
 
         self._stacked_widget.addWidget(self._plots)
 
         self._data_aggregator = DataAggregator(
             data_source_manager.new_data_stream,
             data_source_manager.new_data_received,
+            DtypePolicy(float32_detectors=float32_detectors),
+            stream_closed_signal=data_source_manager.data_stream_closed,
+            loading_status_signal=data_source_manager.loading_status,
         )
         self._data_aggregator.new_data_received.connect(self._update_plots_maybe)
+        self._data_aggregator.queue_depths_changed.connect(
+            self.ingestion_queue_depths_changed
+        )
 
         # NOTE: Here we have kind of a race condition: We need the change_stream_signal
         # connection, but it must happen before the other ones, so that the signal selector
@@ -182,6 +721,49 @@ class PlotDisplay(IPlotDisplay):
         self._plot_update_timer.setInterval(50)
         self._plot_update_timer.timeout.connect(self._update_plots)
 
+    def _build_2d_scatter_plot(self) -> Plot2D:
+        plot_2d_scatter = Plot2D()
+        plot_2d_scatter.setDefaultColormap(Colormap(name="viridis"))
+
+        self._binned_scatter_action = plot_2d_scatter.toolBar().addAction(
+            qta.icon("mdi6.grid"), "Binned heatmap"
+        )
+        self._binned_scatter_action.setCheckable(True)
+        self._binned_scatter_action.setToolTip(
+            "Show the scatter points binned into an image, for scans with lots of points"
+        )
+        self._binned_scatter_action.toggled.connect(self._on_binned_scatter_toggled)
+
+        plot_2d_scatter.getXAxis().sigLimitsChanged.connect(
+            self._on_scatter_limits_changed
+        )
+        plot_2d_scatter.getYAxis().sigLimitsChanged.connect(
+            self._on_scatter_limits_changed
+        )
+        return plot_2d_scatter
+
+    def _build_2d_grid_plot(self) -> Plot2D:
+        plot_2d_grid = Plot2D()
+        plot_2d_grid.setDefaultColormap(Colormap(name="viridis"))
+        return plot_2d_grid
+
+    def _build_tab_maybe(self, tab_index: int):
+        """Replace the placeholder of a tab by its actual plot, if not done yet."""
+        builder = self._lazy_tab_builders.pop(tab_index, None)
+        if builder is None:
+            return
+
+        placeholder = self._plots.widget(tab_index)
+        tab_text = self._plots.tabText(tab_index)
+
+        self._plots.blockSignals(True)
+        self._plots.removeTab(tab_index)
+        self._plots.insertTab(tab_index, builder(), tab_text)
+        self._plots.setCurrentIndex(tab_index)
+        self._plots.blockSignals(False)
+
+        placeholder.deleteLater()
+
     def _update_plots_maybe(self, changed_uid: str):
         uids = set(i[0] for i in self._current_uids)
         if changed_uid in uids:
@@ -195,21 +777,41 @@ class PlotDisplay(IPlotDisplay):
 
     def change_current_streams(self, new_uids_and_names: list[tuple[str, str]]):
         self._current_uids = new_uids_and_names
+        self._data_aggregator.set_selected_runs(
+            set(uid for uid, _ in new_uids_and_names)
+        )
 
         if len(new_uids_and_names) == 1 and new_uids_and_names[0][0] == "":
             self._stacked_widget.setCurrentIndex(0)
             return
 
+        self._update_reference_runs(new_uids_and_names)
+
         self._plots.widget(0).clear()
-        self._plots.widget(1).clear()
-        self._plots.widget(2).clear()
+        if 1 not in self._lazy_tab_builders:
+            self._plots.widget(1).clear()
+
+        self._plotted_curves_statistics.clear()
+        binned_scatter_keys = set()
+        grid_image_legends = set()
+
+        # NOTE: Too many curves are slow to draw and impossible to tell apart, so
+        # they're shown as a single image instead.
+        many_runs = len(new_uids_and_names) > self._many_runs_threshold
+        if self._plots.widget(0).isVisible():
+            if many_runs:
+                self._configure_1d_many_runs_tab(new_uids_and_names, 0)
+            elif len(self._waterfalls) != 0:
+                self._waterfalls.clear()
+                self._plots.widget(0).getYAxis().setLabel("")
+                self._plots.widget(0).setGraphTitle("")
 
         for uid, stream_name in new_uids_and_names:
             self._stacked_widget.setCurrentWidget(self._plots)
 
             signals = self._data_aggregator.get_signals(uid)
 
-            if self._plots.widget(0).isVisible():
+            if self._plots.widget(0).isVisible() and not many_runs:
                 for detector_name in sorted(signals):
                     if detector_name not in self._1d_y_axis_names[uid]:
                         continue
@@ -222,13 +824,190 @@ class PlotDisplay(IPlotDisplay):
                         continue
 
                     self._configure_2d_scatter_tab(uid, stream_name, detector_name, 1)
+                    binned_scatter_keys.add(
+                        (
+                            uid,
+                            self._2d_x_axis_names[uid],
+                            self._2d_y_axis_names[uid],
+                            detector_name,
+                        )
+                    )
 
             if self._plots.widget(2).isVisible():
                 for detector_name in sorted(signals):
                     if detector_name not in self._2d_z_axis_names[uid]:
                         continue
 
-                    self._configure_2d_grid_tab(uid, stream_name, detector_name, 2)
+                    legend = self._configure_2d_grid_tab(
+                        uid, stream_name, detector_name, 2
+                    )
+                    if legend is not None:
+                        grid_image_legends.add(legend)
+
+        if self._statistics_dock.isVisible():
+            self._statistics_table.set_statistics(self._plotted_curves_statistics)
+
+        if self._plots.widget(1).isVisible():
+            for binned_scatters in (
+                self._binned_scatters,
+                self._zoomed_binned_scatters,
+            ):
+                for key in list(binned_scatters.keys()):
+                    if key not in binned_scatter_keys:
+                        del binned_scatters[key]
+
+            self._reset_zoom_maybe(
+                1,
+                (
+                    self._binned_scatter_action.isChecked(),
+                    *self._2d_selection_key(new_uids_and_names),
+                ),
+            )
+
+        if self._plots.widget(2).isVisible():
+            # NOTE: The grid images are updated in-place, so only remove the ones that
+            # aren't selected anymore, instead of clearing the whole plot.
+            for legend in list(self._grid_images.keys()):
+                if legend not in grid_image_legends:
+                    self._plots.widget(2).remove(legend, kind="image")
+                    del self._grid_images[legend]
+
+            self._reset_zoom_maybe(2, self._2d_selection_key(new_uids_and_names))
+
+        if len(self._plots.currentWidget().getItems()) != 0:
+            startup_timer.mark("first point plotted")
+
+    def _2d_selection_key(self, uids_and_names: list[tuple[str, str]]) -> tuple:
+        return tuple(
+            (
+                uid,
+                self._2d_x_axis_names[uid],
+                self._2d_y_axis_names[uid],
+                frozenset(self._2d_z_axis_names[uid]),
+            )
+            for uid, _ in uids_and_names
+        )
+
+    @staticmethod
+    def _get_limits(plot_widget) -> tuple[tuple[float, float], tuple[float, float]]:
+        return (plot_widget.getXAxis().getLimits(), plot_widget.getYAxis().getLimits())
+
+    def _reset_zoom_maybe(self, tab_index: int, selection_key: tuple):
+        """Reset the zoom of a plot, unless the user changed it for the current selection."""
+        plot_widget = self._plots.widget(tab_index)
+
+        if selection_key == self._zoom_selection_keys.get(
+            tab_index, None
+        ) and self._get_limits(plot_widget) != self._automatic_limits.get(
+            tab_index, None
+        ):
+            return
+
+        self._resetting_zoom = True
+        plot_widget.resetZoom()
+        self._resetting_zoom = False
+
+        self._zoom_selection_keys[tab_index] = selection_key
+        self._automatic_limits[tab_index] = self._get_limits(plot_widget)
+
+    def _on_binned_scatter_toggled(self, checked: bool):
+        self._binned_scatters.clear()
+        self._zoomed_binned_scatters.clear()
+        self.update_plots()
+
+    def _on_scatter_limits_changed(self, *_):
+        if self._binned_scatter_action.isChecked() and not self._resetting_zoom:
+            # NOTE: Re-bin the points at a higher resolution after zooming in.
+            self._binned_scatter_rebin_timer.start()
+
+    def _update_reference_runs(self, uids_and_names: list[tuple[str, str]]):
+        """Update the runs available as reference to the currently selected ones."""
+        combo = self._reference_run_combo
+        current_uids = [combo.itemData(i) for i in range(1, combo.count())]
+        if current_uids == [uid for uid, _ in uids_and_names]:
+            return
+
+        combo.blockSignals(True)
+        combo.clear()
+        combo.addItem("None", "")
+        for uid, stream_name in uids_and_names:
+            combo.addItem(stream_name, uid)
+
+        reference_index = combo.findData(self._reference_uid)
+        combo.setCurrentIndex(max(reference_index, 0))
+        combo.blockSignals(False)
+
+        if reference_index < 0:
+            self._set_reference_run("")
+
+    def _on_reference_run_changed(self, index: int):
+        self._set_reference_run(self._reference_run_combo.itemData(index) or "")
+        self.update_plots()
+
+    def _set_reference_run(self, uid: str):
+        self._reference_uid = uid
+        self._resampled_references.clear()
+        self._comparison_mode_combo.setEnabled(uid != "")
+
+    def _on_comparison_mode_changed(self, mode: str):
+        self._comparison_mode = mode
+        self.update_plots()
+
+    def _compare_with_reference(
+        self, uid: str, x_axis_signal: str, x_axis_data, detector_name: str, data
+    ):
+        """
+        Compare the data of a signal against the same signal in the reference run,
+        resampled onto the X values of this run.
+
+        Returns the compared data and the version of the reference data used, or
+        None if the reference run can't be compared against.
+        """
+        reference_uid = self._reference_uid
+        reference_x_signal = self._1d_x_axis_names[reference_uid]
+
+        reference_x = self._data_aggregator.get_data(
+            reference_uid, reference_x_signal, force_1d=True
+        )
+        reference_y = self._data_aggregator.get_data(
+            reference_uid, detector_name, force_1d=True
+        )
+        if reference_x is None or reference_y is None:
+            return None
+        try:
+            reference_x = np.asarray(reference_x, dtype=float)
+            reference_y = np.asarray(reference_y, dtype=float)
+        except (TypeError, ValueError):
+            return None
+        if reference_x.shape != reference_y.shape:
+            return None
+
+        reference_version = (
+            self._data_aggregator.get_data_version(reference_uid, reference_x_signal),
+            self._data_aggregator.get_data_version(reference_uid, detector_name),
+        )
+        resampled_reference = self._resampled_references.resample(
+            (reference_uid, reference_x_signal, detector_name),
+            reference_version,
+            reference_x,
+            reference_y,
+            (uid, x_axis_signal, detector_name),
+            self._data_aggregator.get_data_version(uid, x_axis_signal),
+            x_axis_data,
+        )
+
+        data = np.asarray(data, dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            match self._comparison_mode:
+                case "Ratio":
+                    compared_data = data / resampled_reference
+                case _:
+                    compared_data = data - resampled_reference
+        return compared_data, reference_version
+
+    def _on_statistics_shown(self, visible: bool):
+        if visible:
+            self.update_plots()
 
     def _configure_1d_tab(
         self, uid: str, stream_name: str, detector_name: str, tab_index: int
@@ -257,6 +1036,41 @@ class PlotDisplay(IPlotDisplay):
         if len(x_axis_data) != len(cached_data):
             return
 
+        legend = detector_name + " - " + stream_name + "   (" + uid + ")"
+        ylabel = self._data_aggregator.get_signal_name(uid, detector_name)
+        data_version = (
+            uid,
+            x_axis_signal,
+            self._data_aggregator.get_data_version(uid, x_axis_signal),
+            detector_name,
+            self._data_aggregator.get_data_version(uid, detector_name),
+        )
+        data_generation = (
+            uid,
+            x_axis_signal,
+            self._data_aggregator.get_data_generation(uid, x_axis_signal),
+            detector_name,
+            self._data_aggregator.get_data_generation(uid, detector_name),
+        )
+
+        if self._reference_uid != "":
+            # NOTE: The reference itself would only be compared against itself.
+            if uid == self._reference_uid:
+                return
+
+            comparison = self._compare_with_reference(
+                uid, x_axis_signal, x_axis_data, detector_name, cached_data
+            )
+            if comparison is None:
+                return
+            cached_data, reference_version = comparison
+
+            mode = self._comparison_mode.lower()
+            legend += f" [{mode}]"
+            ylabel += f" ({mode})"
+            data_version += (mode, reference_version)
+            data_generation += (mode, reference_version)
+
         plot_widget = self._plots.widget(tab_index)
         plot_widget.getXAxis().setLabel(
             self._data_aggregator.get_signal_name(uid, x_axis_signal)
@@ -264,10 +1078,138 @@ class PlotDisplay(IPlotDisplay):
         plot_widget.addCurve(
             x_axis_data,
             cached_data,
-            ylabel=self._data_aggregator.get_signal_name(uid, detector_name),
-            legend=detector_name + " - " + stream_name + "   (" + uid + ")",
+            ylabel=ylabel,
+            legend=legend,
+            info={"data_version": data_version, "data_generation": data_generation},
+        )
+
+        if self._reference_uid != "":
+            # NOTE: The streaming statistics are of the signal, not of the comparison.
+            return
+
+        statistics = self._data_aggregator.get_statistics(
+            uid, detector_name, x_axis_signal
+        )
+        if statistics is not None:
+            self._plotted_curves_statistics.append((legend, statistics, x_axis_data))
+
+    def _configure_1d_many_runs_tab(
+        self, uids_and_names: list[tuple[str, str]], tab_index: int
+    ):
+        plot_widget = self._plots.widget(tab_index)
+
+        # NOTE: A single image is shown, of the first selected detector against the
+        # X signal of the first run, since images of different signals would be on
+        # top of each other, and the rows of different X signals can't be compared.
+        x_axis_signal = self._1d_x_axis_names[uids_and_names[0][0]]
+        detector_names = set()
+        for uid, _ in uids_and_names:
+            detector_names |= self._1d_y_axis_names[uid]
+        if len(detector_names) == 0:
+            self._waterfalls.clear()
+            return
+        detector_name = min(detector_names)
+
+        curves = list()
+        left_out_runs = 0
+        for uid, _ in uids_and_names:
+            if detector_name not in self._1d_y_axis_names[uid]:
+                continue
+            if (
+                self._1d_x_axis_names[uid] != x_axis_signal
+                or detector_name not in self._data_aggregator.get_signals(uid)
+            ):
+                left_out_runs += 1
+                continue
+
+            data_version = (
+                self._data_aggregator.get_data_version(uid, x_axis_signal),
+                self._data_aggregator.get_data_version(uid, detector_name),
+            )
+            curves.append(
+                (
+                    uid,
+                    data_version,
+                    partial(self._get_curve_data, uid, x_axis_signal, detector_name),
+                )
+            )
+
+        left_out = list()
+        if len(detector_names) > 1:
+            left_out.append(f"{len(detector_names) - 1} other signals")
+        if left_out_runs != 0:
+            left_out.append(
+                f"{left_out_runs} runs without '{detector_name}' against '{x_axis_signal}'"
+            )
+        plot_widget.setGraphTitle(
+            f"Not shown with many runs: {', '.join(left_out)}" if left_out else ""
+        )
+
+        key = (x_axis_signal, detector_name)
+        for waterfall_key in list(self._waterfalls.keys()):
+            if waterfall_key != key:
+                del self._waterfalls[waterfall_key]
+
+        if len(curves) == 0:
+            self._waterfalls.clear()
+            return
+
+        waterfall = self._waterfalls.get(key, None)
+        if waterfall is None:
+            waterfall = self._waterfalls[key] = WaterfallImage()
+        waterfall.update(curves)
+        if waterfall.x_limits is None:
+            return
+
+        plot_widget.getXAxis().setLabel(
+            self._data_aggregator.get_signal_name(uids_and_names[0][0], x_axis_signal)
+        )
+        legend = f"{detector_name} - {len(curves)} runs"
+        signal_name = self._data_aggregator.get_signal_name(
+            uids_and_names[0][0], detector_name
         )
 
+        if self._many_runs_mode == "Density":
+            density, y_origin, y_scale = waterfall.density()
+            plot_widget.getYAxis().setLabel(signal_name)
+            plot_widget.addImage(
+                density,
+                legend=legend,
+                origin=(waterfall.origin[0], y_origin),
+                scale=(waterfall.scale[0], y_scale),
+                copy=False,
+            )
+        else:
+            plot_widget.getYAxis().setLabel(f"Run ({signal_name})")
+            plot_widget.addImage(
+                waterfall.image(),
+                legend=legend,
+                origin=waterfall.origin,
+                scale=waterfall.scale,
+                copy=False,
+            )
+
+    def _get_curve_data(
+        self, uid: str, x_axis_signal: str, detector_name: str
+    ) -> tuple[np.ndarray, np.ndarray]:
+        x_axis_data = self._data_aggregator.get_data(uid, x_axis_signal, force_1d=True)
+        data = self._data_aggregator.get_data(uid, detector_name, force_1d=True)
+        # NOTE: Runs without data yet, or with non-scalar data, are shown as empty rows.
+        if x_axis_data is None or data is None:
+            return np.empty(0), np.empty(0)
+        try:
+            x_axis_data = np.asarray(x_axis_data, dtype=float)
+            data = np.asarray(data, dtype=float)
+        except (TypeError, ValueError):
+            return np.empty(0), np.empty(0)
+        if x_axis_data.ndim != 1 or data.ndim != 1:
+            return np.empty(0), np.empty(0)
+        return x_axis_data, data
+
+    def _on_many_runs_mode_changed(self, mode: str):
+        self._many_runs_mode = mode
+        self.update_plots()
+
     def _configure_2d_scatter_tab(
         self, uid: str, stream_name: str, detector_name: str, tab_index: int
     ):
@@ -287,23 +1229,139 @@ class PlotDisplay(IPlotDisplay):
         plot_widget.getYAxis().setLabel(
             self._data_aggregator.get_signal_name(uid, y_axis_signal)
         )
-        plot_widget.addScatter(
-            x_axis_data,
-            y_axis_data,
-            cached_data,
-            legend=detector_name + " - " + stream_name + " - " + uid,
+        legend = detector_name + " - " + stream_name + " - " + uid
+
+        if self._binned_scatter_action.isChecked():
+            self._add_binned_scatter(
+                plot_widget,
+                (uid, x_axis_signal, y_axis_signal, detector_name),
+                legend,
+                x_axis_data,
+                y_axis_data,
+                cached_data,
+                tuple(
+                    self._data_aggregator.get_data_generation(uid, signal)
+                    for signal in (x_axis_signal, y_axis_signal, detector_name)
+                ),
+            )
+            return
+
+        plot_widget.addScatter(x_axis_data, y_axis_data, cached_data, legend=legend)
+
+    def _add_binned_scatter(
+        self,
+        plot_widget,
+        key: tuple,
+        legend: str,
+        x_data,
+        y_data,
+        values,
+        generation: tuple,
+    ):
+        binned_scatter = self._binned_scatters.get(key, None)
+        if binned_scatter is None:
+            binned_scatter = BinnedScatter(self.BINNED_SCATTER_RESOLUTION)
+            self._binned_scatters[key] = binned_scatter
+        binned_scatter.update(x_data, y_data, values, generation)
+
+        if binned_scatter.limits is None:
+            return
+
+        view_limits = self._get_limits(plot_widget)
+        if self._is_zoomed_in(view_limits, binned_scatter.limits):
+            zoomed_binned_scatter = self._zoomed_binned_scatters.get(key, None)
+            if (
+                zoomed_binned_scatter is None
+                or zoomed_binned_scatter.limits != view_limits
+            ):
+                zoomed_binned_scatter = BinnedScatter(
+                    self.BINNED_SCATTER_RESOLUTION, limits=view_limits
+                )
+                self._zoomed_binned_scatters[key] = zoomed_binned_scatter
+            zoomed_binned_scatter.update(x_data, y_data, values, generation)
+            binned_scatter = zoomed_binned_scatter
+        else:
+            self._zoomed_binned_scatters.pop(key, None)
+
+        plot_widget.addImage(
+            binned_scatter.image(),
+            legend=legend,
+            origin=binned_scatter.origin,
+            scale=binned_scatter.scale,
+            resetzoom=False,
+            copy=False,
         )
-        plot_widget.resetZoom()
+
+    @staticmethod
+    def _is_zoomed_in(view_limits, binned_limits) -> bool:
+        """Whether the view shows a small enough part of the binned region to re-bin it."""
+        for (view_min, view_max), (binned_min, binned_max) in zip(
+            view_limits, binned_limits, strict=True
+        ):
+            if (view_max - view_min) * 2 < binned_max - binned_min:
+                return True
+        return False
 
     def _configure_2d_grid_tab(
         self, uid: str, stream_name: str, detector_name: str, tab_index: int
-    ):
+    ) -> str | None:
         x_axis_signal = self._2d_x_axis_names[uid]
         y_axis_signal = self._2d_y_axis_names[uid]
         if x_axis_signal == "" or y_axis_signal == "":
-            return
+            return None
+
+        data = self._data_aggregator.get_data(uid, detector_name)
+        if not isinstance(data, np.ndarray):
+            return None
+        legend = detector_name + " - " + stream_name + " - " + uid
+
+        plot_widget = self._plots.widget(tab_index)
+        plot_widget.getXAxis().setLabel(
+            self._data_aggregator.get_signal_name(uid, x_axis_signal)
+        )
+        plot_widget.getYAxis().setLabel(
+            self._data_aggregator.get_signal_name(uid, y_axis_signal)
+        )
+
+        state = self._grid_images.get(legend, None)
+        image = plot_widget.getImage(legend)
+        dirty_rows = self._data_aggregator.take_dirty_rows(uid, detector_name)
+        if state is None or image is None:
+            dirty_rows = None
+
+        grid = np.atleast_2d(data)
+        validity_mask = self._data_aggregator.get_validity_mask(uid, detector_name)
+        if validity_mask is not None:
+            validity_mask = np.atleast_2d(validity_mask)
+
+        if dirty_rows is None:
+            if validity_mask is not None:
+                displayed_data = np.where(validity_mask, grid, np.nan)
+            else:
+                displayed_data = grid
+            state = _GridImageState(
+                displayed_data,
+                self._value_range(displayed_data),
+                state.colormap_range if state is not None else None,
+            )
+        else:
+            if len(dirty_rows) == 0:
+                return legend
+
+            if validity_mask is not None:
+                state.data[dirty_rows] = np.where(
+                    validity_mask[dirty_rows], grid[dirty_rows], np.nan
+                )
+            state.value_range = self._merge_value_ranges(
+                state.value_range, self._value_range(state.data[dirty_rows])
+            )
+        self._grid_images[legend] = state
+
+        if image is not None:
+            image.setData(state.data, copy=False)
+            self._update_grid_colormap(image.getColormap(), state)
+            return legend
 
-        cached_data = np.atleast_2d(self._data_aggregator.get_data(uid, detector_name))
         _metadata = self._data_aggregator.get_metadata(uid)
 
         shape = tuple(_metadata.get("shape", (0, 0)))
@@ -316,26 +1374,78 @@ class PlotDisplay(IPlotDisplay):
         )
         origin = (extents_x[0] - scale[1] / 2, extents_y[0] - scale[0] / 2)
 
-        plot_widget = self._plots.widget(tab_index)
-        plot_widget.getXAxis().setLabel(
-            self._data_aggregator.get_signal_name(uid, x_axis_signal)
-        )
-        plot_widget.getYAxis().setLabel(
-            self._data_aggregator.get_signal_name(uid, y_axis_signal)
-        )
+        colormap = plot_widget.getDefaultColormap().copy()
+        self._update_grid_colormap(colormap, state)
         plot_widget.addImage(
-            cached_data,
+            state.data,
             origin=origin,
             scale=scale,
-            legend=detector_name + " - " + stream_name + " - " + uid,
-            resetzoom=True,
+            legend=legend,
+            colormap=colormap,
+            resetzoom=False,
+            copy=False,
         )
+        return legend
+
+    @staticmethod
+    def _value_range(data: np.ndarray) -> tuple[float, float] | None:
+        finite_data = data[np.isfinite(data)]
+        if len(finite_data) == 0:
+            return None
+        return (float(finite_data.min()), float(finite_data.max()))
+
+    @staticmethod
+    def _merge_value_ranges(
+        first: tuple[float, float] | None, second: tuple[float, float] | None
+    ) -> tuple[float, float] | None:
+        if first is None or second is None:
+            return first if second is None else second
+        return (min(first[0], second[0]), max(first[1], second[1]))
+
+    @staticmethod
+    def _update_grid_colormap(colormap: Colormap, state: "_GridImageState"):
+        """Set the colormap range from the data range, unless it was changed by the user."""
+        current_range = (colormap.getVMin(), colormap.getVMax())
+        if state.colormap_range is not None and current_range != state.colormap_range:
+            return
+        if state.value_range is None or state.value_range == current_range:
+            return
+
+        colormap.setVRange(*state.value_range)
+        state.colormap_range = state.value_range
 
     def _on_plot_tab_changed(self, new_index: int):
+        self._build_tab_maybe(new_index)
+
         self.plot_tab_changed.emit(self._plots.tabText(new_index))
 
         self.update_plots()
 
+    def get_run_snapshot(self, uid: str) -> RunSnapshot | None:
+        """Get all data of a run and its axes choices, to save it in a session snapshot."""
+        snapshot = self._data_aggregator.get_run_snapshot(uid)
+        if snapshot is None:
+            return None
+
+        if uid in self._1d_x_axis_names:
+            snapshot.axes["1d_x"] = self._1d_x_axis_names[uid]
+            snapshot.axes["1d_y"] = sorted(self._1d_y_axis_names[uid])
+        if uid in self._2d_x_axis_names:
+            snapshot.axes["2d_x"] = self._2d_x_axis_names[uid]
+            snapshot.axes["2d_y"] = self._2d_y_axis_names[uid]
+            snapshot.axes["2d_z"] = sorted(self._2d_z_axis_names[uid])
+        return snapshot
+
+    def set_run_axes(self, uid: str, axes: dict):
+        """Restore the axes choices of a run, as saved in `get_run_snapshot`."""
+        if "1d_x" in axes:
+            self._1d_x_axis_names[uid] = axes["1d_x"]
+            self._1d_y_axis_names[uid] = set(axes.get("1d_y", []))
+        if "2d_x" in axes:
+            self._2d_x_axis_names[uid] = axes["2d_x"]
+            self._2d_y_axis_names[uid] = axes.get("2d_y", "")
+            self._2d_z_axis_names[uid] = set(axes.get("2d_z", []))
+
     def _on_1d_signals_changed(self, x_signal: str, y_signals: set[str]):
         for uid, _ in self._current_uids:
             self._1d_x_axis_names[uid] = x_signal
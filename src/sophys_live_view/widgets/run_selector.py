@@ -1,22 +1,34 @@
 from dataclasses import dataclass
+import pathlib
 
 import qtawesome as qta
-from qtpy.QtCore import QAbstractListModel, QModelIndex, QSize, Qt, Signal, Slot
+from qtpy.QtCore import (
+    QAbstractListModel,
+    QModelIndex,
+    QSize,
+    QSortFilterProxyModel,
+    Qt,
+    QTimer,
+    Signal,
+    Slot,
+)
 from qtpy.QtWidgets import (
     QFileDialog,
     QLabel,
+    QLineEdit,
     QListView,
     QProgressBar,
     QPushButton,
     QVBoxLayout,
 )
 
-from ..utils.json_data_source import JSONDataSource
+from ..utils.run_index import RunIndex
 from .interfaces import IRunSelector
 
 
 class RunSelector(IRunSelector):
     select_item = Signal(QModelIndex)
+    export_requested = Signal(list, str)  # subuids, file path
 
     def __init__(self, data_source_manager):
         super().__init__()
@@ -29,10 +41,31 @@ class RunSelector(IRunSelector):
         layout = QVBoxLayout()
         self.setLayout(layout)
 
+        self._run_index = RunIndex()
+        self._run_filter_terms = list()
+
+        self._run_filter_line = QLineEdit()
+        self._run_filter_line.setPlaceholderText("Filter runs...")
+        self._run_filter_line.setToolTip(
+            "Filter the runs by their metadata and signals, with whitespace-separated terms.\n\n"
+            "Examples:\n"
+            "  plan:grid_scan - Runs whose plan name starts with 'grid_scan'\n"
+            "  det:pilatus - Runs with a detector whose name starts with 'pilatus'\n"
+            "  signal:i0 - Runs with a signal whose name starts with 'i0'\n"
+            "  scan_id>1200 - Runs with a scan ID greater than 1200 (also: <, >=, <=, =)\n"
+            "  sample=abc - Runs whose sample is exactly 'abc'\n"
+            "  abc - Runs with any indexed word starting with 'abc'"
+        )
+        self._run_filter_line.setClearButtonEnabled(True)
+        self._run_filter_line.textChanged.connect(self._change_run_filter)
+        layout.addWidget(self._run_filter_line)
+
         self._run_list_model = RunListModel()
+        self._run_filter_model = RunFilterProxyModel()
+        self._run_filter_model.setSourceModel(self._run_list_model)
         self._run_list_view = QListView()
         self._run_list_view.setSelectionMode(QListView.SelectionMode.ExtendedSelection)
-        self._run_list_view.setModel(self._run_list_model)
+        self._run_list_view.setModel(self._run_filter_model)
         layout.addWidget(self._run_list_view)
 
         self._progress_label = QLabel()
@@ -49,6 +82,15 @@ class RunSelector(IRunSelector):
         self._file_import_button.clicked.connect(self._import_file)
         layout.addWidget(self._file_import_button)
 
+        self._export_button = QPushButton("Export selected runs...")
+        self._export_button.setToolTip(
+            "Write all signals and metadata of the selected runs to a CSV, NumPy or HDF5 file"
+        )
+        self._export_button.setEnabled(False)
+        self._exporting = False
+        self._export_button.clicked.connect(self._export_selected_runs)
+        layout.addWidget(self._export_button)
+
         data_source_manager.new_data_stream.connect(self._add_stream)
         data_source_manager.data_stream_closed.connect(self._close_stream)
         data_source_manager.go_to_last_automatically.connect(self._set_go_to_last)
@@ -58,6 +100,14 @@ class RunSelector(IRunSelector):
         )
         self._run_list_view.doubleClicked.connect(self.toggle_bookmark)
 
+        # NOTE: While preloading, new runs are inserted in batches, to avoid
+        # relayouting the view for every single one of them.
+        self._batch_insertion_timer = QTimer()
+        self._batch_insertion_timer.setInterval(500)
+        self._batch_insertion_timer.timeout.connect(
+            self._run_list_model.flush_pending_streams
+        )
+
         self.select_item.connect(
             self.on_select_item, Qt.ConnectionType.QueuedConnection
         )
@@ -65,11 +115,15 @@ class RunSelector(IRunSelector):
     def change_current_streams(self):
         current_streams = []
         for index in self._run_list_view.selectedIndexes():
+            index = self._run_filter_model.mapToSource(index)
             text = self._run_list_model.data(index, Qt.ItemDataRole.DisplayRole)
             subuid = self._run_list_model.data(index, RunListModel.SUBUID_ROLE)
 
             current_streams.append((subuid, text))
 
+        self._export_button.setEnabled(
+            len(current_streams) != 0 and not self._exporting
+        )
         self.selected_streams_changed.emit(current_streams)
 
     def _add_stream(
@@ -78,8 +132,18 @@ class RunSelector(IRunSelector):
         subuid: str,
         display_name: str,
         signals: set[str],
+        signals_name_map: dict[str, str],
+        detectors: set[str],
+        motors: list[str],
         metadata: dict,
     ):
+        row = self._run_list_model.total_run_count()
+        self._run_index.add_run(row, display_name, signals, metadata)
+        if len(self._run_filter_terms) != 0 and self._run_index.row_matches(
+            self._run_filter_terms, row
+        ):
+            self._run_filter_model.add_matching_row(row)
+
         self._run_list_model.add_stream(uid, subuid, display_name)
 
         if self._finished_loading and self._go_to_last_automatically:
@@ -96,16 +160,38 @@ class RunSelector(IRunSelector):
 
     @Slot(QModelIndex)
     def on_select_item(self, index: QModelIndex):
+        index = self._run_filter_model.mapFromSource(index)
+        if not index.isValid():
+            return
+
         self._run_list_view.selectionModel().clearSelection()
         self._run_list_view.setCurrentIndex(index)
 
+    @Slot(str)
+    def _change_run_filter(self, query: str):
+        self._run_filter_terms = self._run_index.parse_query(query)
+        self._run_filter_model.set_matching_rows(
+            self._run_index.query(self._run_filter_terms)
+        )
+
     @Slot(QModelIndex)
     def toggle_bookmark(self, index: QModelIndex):
+        if index.model() is self._run_filter_model:
+            index = self._run_filter_model.mapToSource(index)
+
         currently_checked = self._run_list_model.data(index, RunListModel.BOOKMARK_ROLE)
         self._run_list_model.setData(
             index, not currently_checked, RunListModel.BOOKMARK_ROLE
         )
 
+    def runs(self) -> list["RunItem"]:
+        """Get all runs in the selector, in order."""
+        return self._run_list_model.runs()
+
+    def set_run_bookmarked(self, subuid: str, state: bool):
+        """Bookmark, or remove the bookmark of, the run with a SubUID."""
+        self._run_list_model.set_bookmarked(subuid, state)
+
     @Slot(str, bool)
     def _set_go_to_last(self, uid: str, state: bool):
         self._go_to_last_automatically = state
@@ -116,6 +202,9 @@ class RunSelector(IRunSelector):
             self._progress_label.setVisible(False)
             self._progress_progress_bar.setVisible(False)
 
+            self._batch_insertion_timer.stop()
+            self._run_list_model.set_batch_insertion(False)
+
             self._finished_loading = True
             item_count = self._run_list_model.rowCount()
             if self._go_to_last_automatically and item_count > 0:
@@ -126,8 +215,52 @@ class RunSelector(IRunSelector):
             self._progress_progress_bar.setVisible(True)
             self._progress_progress_bar.setValue(round(percentage))
 
+            if not self._batch_insertion_timer.isActive():
+                self._run_list_model.set_batch_insertion(True)
+                self._batch_insertion_timer.start()
+
             self._finished_loading = False
 
+    @Slot(str, float)
+    def show_export_status(self, message: str, percentage: float):
+        """Show the progress of an export, without affecting the loading of runs."""
+        # NOTE: Only one export runs at a time, so the button stays disabled until
+        # it finishes, regardless of the selection.
+        self._exporting = percentage < 100.0
+        self._progress_label.setVisible(self._exporting)
+        self._progress_label.setText(message)
+        self._progress_progress_bar.setVisible(self._exporting)
+        self._progress_progress_bar.setValue(round(percentage))
+        self._export_button.setEnabled(
+            not self._exporting and len(self._run_list_view.selectedIndexes()) != 0
+        )
+
+    def _export_selected_runs(self):
+        # NOTE: Deferred, so that the export code isn't loaded on startup.
+        from ..utils.run_export import EXPORT_FORMATS
+
+        file_name, selected_filter = QFileDialog.getSaveFileName(
+            caption="Select a file to export the selected runs to.",
+            filter=";;".join(dict.fromkeys(EXPORT_FORMATS.values())),
+        )
+        if file_name == "":
+            return
+
+        if pathlib.Path(file_name).suffix.lower() not in EXPORT_FORMATS:
+            file_name += next(
+                suffix
+                for suffix, file_filter in EXPORT_FORMATS.items()
+                if file_filter == selected_filter
+            )
+
+        subuids = list()
+        for index in self._run_list_view.selectedIndexes():
+            index = self._run_filter_model.mapToSource(index)
+            subuids.append(self._run_list_model.data(index, RunListModel.SUBUID_ROLE))
+        self.export_requested.emit(
+            sorted(subuids, key=self._run_list_model.row_of_subuid), file_name
+        )
+
     def _import_file(self):
         file_names, selected_filter = QFileDialog.getOpenFileNames(
             caption="Select a file to load into sophys-live-view.",
@@ -136,11 +269,36 @@ class RunSelector(IRunSelector):
         if len(file_names) == 0:
             return
 
+        # NOTE: Deferred, so that the Bluesky parsing isn't loaded on startup.
+        from ..utils.json_data_source import JSONDataSource
+
         for file_name in file_names:
             data_source = JSONDataSource(file_name)
             self._data_source_manager.add_data_source(data_source)
 
 
+class RunFilterProxyModel(QSortFilterProxyModel):
+    """Filter proxy showing only the rows of the source model present in a pre-computed set."""
+
+    def __init__(self):
+        super().__init__()
+
+        self._matching_rows = None
+
+    def set_matching_rows(self, rows: set[int] | None):
+        """Set the rows to show. None means all rows are shown."""
+        self._matching_rows = rows
+        self.invalidateFilter()
+
+    def add_matching_row(self, row: int):
+        """Add a row to the shown ones, without re-filtering the whole model."""
+        if self._matching_rows is not None:
+            self._matching_rows.add(row)
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex):  # noqa: N802
+        return self._matching_rows is None or source_row in self._matching_rows
+
+
 @dataclass
 class RunItem:
     uid: str
@@ -161,6 +319,11 @@ class RunListModel(QAbstractListModel):
         super().__init__()
 
         self._runs = list()
+        self._pending_runs = list()
+        self._run_rows = dict()
+        self._subuid_rows = dict()
+
+        self._batch_insertion = False
 
         self.star_unfilled_icon = qta.icon("fa6.star", scale_factor=0.8)
         self.star_filled_icon = qta.icon("fa6s.star", color="orange", scale_factor=0.8)
@@ -171,23 +334,83 @@ class RunListModel(QAbstractListModel):
         uid: str,
         subuid: str,
         display_name: str,
-    ):
-        old_number_of_items = len(self._runs)
-        self.rowsAboutToBeInserted.emit(
-            QModelIndex(), old_number_of_items, old_number_of_items
-        )
-        self._runs.append(RunItem(uid, subuid, display_name, loading=True))
-        self.rowsInserted.emit(QModelIndex(), old_number_of_items, old_number_of_items)
+    ) -> int:
+        """
+        Add a new run to the end of the model, returning its row.
+
+        When batch insertion is enabled, the run is only shown after the next
+        call to `flush_pending_streams`, together with all other pending runs.
+        """
+        row = self.total_run_count()
+        self._run_rows[(uid, subuid)] = row
+        self._subuid_rows[subuid] = row
+        self._pending_runs.append(RunItem(uid, subuid, display_name, loading=True))
+
+        if not self._batch_insertion:
+            self.flush_pending_streams()
+
+        return row
 
     def close_stream(self, uid: str, subuid: str):
-        for rev_index, run in enumerate(reversed(self._runs)):
-            if run.uid == uid and run.subuid == subuid:
-                run.loading = False
+        row = self._run_rows.get((uid, subuid), None)
+        if row is None:
+            return
+
+        if row >= len(self._runs):
+            self._pending_runs[row - len(self._runs)].loading = False
+            return
+
+        self._runs[row].loading = False
+
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [RunListModel.LOADING_ROLE])
+
+    def row_of(self, uid: str, subuid: str) -> int | None:
+        """Get the row of a run, or None if it is not in the model."""
+        return self._run_rows.get((uid, subuid), None)
+
+    def row_of_subuid(self, subuid: str) -> int | None:
+        """Get the row of the run with a SubUID, or None if it is not in the model."""
+        return self._subuid_rows.get(subuid, None)
+
+    def runs(self) -> list[RunItem]:
+        """Get all runs in the model, including the ones pending insertion."""
+        return self._runs + self._pending_runs
+
+    def set_bookmarked(self, subuid: str, state: bool):
+        row = self._subuid_rows.get(subuid, None)
+        if row is None:
+            return
+
+        if row >= len(self._runs):
+            self._pending_runs[row - len(self._runs)].bookmarked = state
+            return
+
+        self.setData(self.index(row), state, RunListModel.BOOKMARK_ROLE)
+
+    def total_run_count(self) -> int:
+        """Get the number of runs in the model, including the ones pending insertion."""
+        return len(self._runs) + len(self._pending_runs)
+
+    def set_batch_insertion(self, state: bool):
+        """Enable or disable batch insertion of new runs. Disabling it flushes all pending runs."""
+        self._batch_insertion = state
+
+        if not state:
+            self.flush_pending_streams()
+
+    def flush_pending_streams(self):
+        """Insert all pending runs into the model, as a single contiguous range of rows."""
+        if len(self._pending_runs) == 0:
+            return
 
-                index = self.index(self.rowCount() - rev_index)
-                self.dataChanged.emit(index, index)
+        first_row = len(self._runs)
+        last_row = first_row + len(self._pending_runs) - 1
 
-                break
+        self.beginInsertRows(QModelIndex(), first_row, last_row)
+        self._runs.extend(self._pending_runs)
+        self._pending_runs.clear()
+        self.endInsertRows()
 
     def rowCount(self, parent: QModelIndex | None = None):  # noqa: N802
         return len(self._runs)
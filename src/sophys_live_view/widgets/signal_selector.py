@@ -1,9 +1,15 @@
+from abc import abstractmethod
 from collections import defaultdict
 
-from qtpy.QtCore import Qt, Signal
+from qtpy.QtCore import (
+    QAbstractTableModel,
+    QModelIndex,
+    QSortFilterProxyModel,
+    Qt,
+    Signal,
+)
+from qtpy.QtGui import QFont
 from qtpy.QtWidgets import (
-    QButtonGroup,
-    QCheckBox,
     QDialog,
     QDialogButtonBox,
     QFrame,
@@ -13,9 +19,8 @@ from qtpy.QtWidgets import (
     QLineEdit,
     QMessageBox,
     QPushButton,
-    QRadioButton,
-    QScrollArea,
     QStackedWidget,
+    QTableView,
     QTableWidget,
     QTableWidgetItem,
     QTextEdit,
@@ -23,23 +28,26 @@ from qtpy.QtWidgets import (
     QWidget,
 )
 
+from ..utils.custom_signals import RunCollection
 from .interfaces import CUSTOM_SIGNALS_ENVIRONMENT, ISignalSelector
 
 
-def set_checked_no_emit(widget: QCheckBox | QRadioButton, state: bool):
-    widget.blockSignals(True)
-    widget.setChecked(state)
-    widget.blockSignals(False)
-
-
 class SignalSelector(ISignalSelector):
     def __init__(self, data_source_manager, selected_streams_changed: Signal):
         super().__init__()
 
         self._current_uids = set()
+        self._current_signals = frozenset()
+
+        # NOTE: Union of the signals of each selection of runs, so that going back
+        # and forth between selections doesn't need to recompute it.
+        self._selection_signals_cache = dict()
 
         self._signals = dict()
         self._signals_name_map = dict()
+        self._signal_names = dict()
+        # NOTE: Display name of each run, in the order they were received.
+        self._display_names = dict()
         self.uids_with_signal = defaultdict(lambda: set())
 
         self.default_dependent_signals = set()
@@ -77,19 +85,25 @@ class SignalSelector(ISignalSelector):
         signal.connect(self._change_tab)
 
     def change_current_streams(self, new_uids_and_names: list[tuple[str, str]]):
-        new_signals = set()
-        new_uids = set()
-        for uid, _ in new_uids_and_names:
-            new_signals |= self._signals[uid]
-            new_uids.add(uid)
+        new_uids = frozenset(uid for uid, _ in new_uids_and_names)
+
+        new_signals = self._selection_signals_cache.get(new_uids, None)
+        if new_signals is None:
+            new_signals = frozenset().union(*(self._signals[uid] for uid in new_uids))
+            self._selection_signals_cache[new_uids] = new_signals
 
-        self._current_uids = new_uids
-        self._custom_signal_button.setVisible(len(new_uids) == 1)
+        self._current_uids = set(new_uids)
+        self._current_signals = new_signals
+        self._custom_signal_button.setVisible(len(new_uids) >= 1)
 
         self._configure_default_signals(new_uids, new_signals)
 
-        self._1d_signal_selection_table.configure_signals(new_uids, new_signals)
-        self._2d_signal_selection_table.configure_signals(new_uids, new_signals)
+        # NOTE: Only the visible table is configured right away. The other one
+        # gets configured when it becomes visible, in `_change_tab`.
+        current_table = self._signal_selection_stack.currentWidget()
+        current_table.configure_signals(new_uids, new_signals)
+        for table in self._selection_tables():
+            table.set_outdated(table is not current_table)
 
     def _configure_default_signals(self, new_uids, new_signals):
         self.default_independent_signals = list()
@@ -103,15 +117,20 @@ class SignalSelector(ISignalSelector):
                 uid, set()
             )
 
+    def _selection_tables(self):
+        return (self._1d_signal_selection_table, self._2d_signal_selection_table)
+
+    def _invalidate_selection_signals_cache(self, uid: str):
+        for uids in list(self._selection_signals_cache.keys()):
+            if uid in uids:
+                del self._selection_signals_cache[uids]
+
     def reload(self):
         self.change_current_streams([(i, None) for i in self._current_uids])
 
     def get_signal_name(self, signal: str):
         # FIXME: Properly handle different names in each uid
-        name = signal
-        for uid in self.uids_with_signal[signal]:
-            name = self._signals_name_map[uid].get(signal, signal)
-        return name
+        return self._signal_names.get(signal, signal)
 
     def _add_new_signal(
         self,
@@ -126,6 +145,8 @@ class SignalSelector(ISignalSelector):
     ):
         self._signals[subuid] = signals
         self._signals_name_map[subuid] = signals_name_map
+        self._display_names[subuid] = display_name
+        self._invalidate_selection_signals_cache(subuid)
 
         self._default_dependent_signals[subuid] = detectors
         self._default_independent_signals[subuid] = motors
@@ -133,30 +154,64 @@ class SignalSelector(ISignalSelector):
         for signal in signals:
             self.uids_with_signal[signal].add(subuid)
 
-    def _add_custom_signal(self, uid: str, signal_name: str, signal_expression: str):
+            if signal in signals_name_map:
+                self._signal_names[signal] = signals_name_map[signal]
+            else:
+                self._signal_names.setdefault(signal, signal)
+
+    def add_custom_signals(self, uid: str, custom_signals: dict[str, str]):
+        """Add custom signals to a run, by name and expression, if the run is known."""
+        if uid not in self._signals:
+            return
+        for signal_name, signal_expression in custom_signals.items():
+            self._add_custom_signal(uid, signal_name, signal_expression, reload=False)
+        self.reload()
+
+    def _add_custom_signal(
+        self,
+        uid: str,
+        signal_name: str,
+        signal_expression: str,
+        *,
+        reload: bool = True,
+    ):
         self._signals[uid].add(signal_name)
+        self._invalidate_selection_signals_cache(uid)
         self._signals_name_map[uid][signal_name] = signal_name + " (custom)"
+        self._signal_names[signal_name] = signal_name + " (custom)"
         self.uids_with_signal[signal_name].add(uid)
 
         self.custom_signal_added.emit(uid, signal_name, signal_expression)
 
-        self.reload()
+        if reload:
+            self.reload()
 
     def _change_tab(self, new_tab_name: str):
         name_to_index = {"1D": 0, "2D - Scatter": 1, "2D - Grid": 1}
         self._signal_selection_stack.setCurrentIndex(name_to_index[new_tab_name])
 
-        self._signal_selection_stack.currentWidget().refresh_layout()
+        current_table = self._signal_selection_stack.currentWidget()
+        if current_table.is_outdated():
+            current_table.configure_signals(self._current_uids, self._current_signals)
+            current_table.set_outdated(False)
 
     def _custom_signal_button_clicked(self):
-        uid = list(self._current_uids)[0]
-        signals = {k: self.get_signal_name(k) for k in self._signals[uid]}
+        # NOTE: With many runs selected, the signal is added to each one of them,
+        # evaluated against each run's own signals.
+        uids = sorted(self._current_uids)
+        uid = uids[0]
+        signals = {
+            k: self.get_signal_name(k)
+            for k in frozenset().union(*(self._signals[run_uid] for run_uid in uids))
+        }
 
         dialog = QDialog()
         layout = QVBoxLayout()
         dialog.setLayout(layout)
 
-        custom_signal_selector = CustomSignalCreator(uid, signals)
+        custom_signal_selector = CustomSignalCreator(
+            uid, signals, list(self._display_names.items())
+        )
         layout.addWidget(custom_signal_selector)
 
         button_box = QDialogButtonBox(
@@ -175,441 +230,485 @@ class SignalSelector(ISignalSelector):
             return
 
         name, expr = custom_signal_selector.get_custom_signal_parameters()
-        valid, exception = custom_signal_selector.validate_expression(expr)
-        if valid:
-            self._add_custom_signal(uid, name, expr)
-        else:
-            QMessageBox.critical(
-                self,
-                "Invalid expression!",
-                f"The inputted expression is invalid: \n{exception}",
+        for uid in uids:
+            valid, exception = custom_signal_selector.validate_expression(
+                expr, self._signals[uid]
             )
+            if not valid:
+                QMessageBox.critical(
+                    self,
+                    "Invalid expression!",
+                    f"The inputted expression is invalid for "
+                    f"'{self._display_names.get(uid, uid)}': \n{exception}",
+                )
+                return
 
+        # NOTE: The selection is only reloaded once, after adding all of them.
+        for uid in uids:
+            self._add_custom_signal(uid, name, expr, reload=False)
+        self.reload()
 
-class TableScrollArea(QScrollArea):
-    def __init__(self, parent):
-        super().__init__(parent)
 
-        self._parent = parent
+def _contiguous_ranges(rows: list[int]) -> list[tuple[int, int]]:
+    """Group sorted row numbers into (first, last) ranges of consecutive rows."""
+    ranges = list()
+    for row in rows:
+        if len(ranges) != 0 and ranges[-1][1] == row - 1:
+            ranges[-1] = (ranges[-1][0], row)
+        else:
+            ranges.append((row, row))
+    return ranges
 
-        self._row_widgets = list()
 
-        self._layout = QGridLayout()
-        self._layout.setRowMinimumHeight(0, 20)
+class SignalSelectionModel(QAbstractTableModel):
+    """
+    Table model of signals, with one column for the signal names, and one checkable
+    column for each axis.
 
-        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+    Axes can be exclusive, in which case at most a single signal can be checked on them
+    at a time, like in a radio button group. Only the state of the checks is stored, so
+    the view doesn't need to allocate any widget for each signal.
 
-    def refresh_layout(self):
-        # NOTE: We need to add a new widget so that the Scroll Area updates the layout.
-        _w = QWidget()
-        _w.setLayout(self._layout)
+    Checked signals removed from the model are remembered, and checked again when
+    they're added back (e.g. when going back to a previously selected run), unless
+    another signal was checked on an exclusive axis meanwhile.
+    """
 
-        # Take the old widget without destroying it, so it doesn't recursively destroy the layout (i guess)
-        _old = self.takeWidget()
+    check_state_changed = Signal(int)  # axis index
 
-        self.setWidget(_w)
-        area_size = self.viewport().size()
-        _w.setMinimumSize(area_size)
+    SIGNAL_ROLE = Qt.ItemDataRole.UserRole
 
-    def _clear_layout(self):
-        for widgets in self._row_widgets:
-            for widget in widgets:
-                self._layout.removeWidget(widget)
+    def __init__(self, axes_names: list[str], exclusive_axes: list[bool]):
+        super().__init__()
 
-        self._row_widgets.clear()
+        self._headers = ["Signal", *axes_names]
+        self._exclusive_axes = exclusive_axes
 
-    def _add_row(self, *args):
-        row_count = len(self._row_widgets) + 1
+        self._signals = list()
+        self._signals_names = dict()
+        self._signals_rows = dict()
+        self._checked_signals = [set() for _ in axes_names]
+        # NOTE: In the order they were removed, to restore the last one on exclusive axes.
+        self._removed_checked_signals = [dict() for _ in axes_names]
 
-        alignment = Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignCenter
+    def update_signals(self, signals: list[str], signals_names: dict[str, str]):
+        """
+        Change the signals in the model to `signals`, which must be sorted.
 
-        for idx, widget in enumerate(args):
-            self._layout.addWidget(widget, row_count, idx, 1, 1, alignment)
+        Only the difference between the current and new signals is applied, so signals
+        present in both keep their rows' check state, and no reset of the view happens.
+        Signals that were checked when they were removed are checked again.
+        """
+        new_signals = set(signals)
+
+        removed_rows = [
+            row for row, signal in enumerate(self._signals) if signal not in new_signals
+        ]
+        for first, last in reversed(_contiguous_ranges(removed_rows)):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            for signal in self._signals[first : last + 1]:
+                for axis, checked in enumerate(self._checked_signals):
+                    if signal not in checked:
+                        continue
+                    checked.discard(signal)
+                    self._removed_checked_signals[axis].pop(signal, None)
+                    self._removed_checked_signals[axis][signal] = True
+            del self._signals[first : last + 1]
+            self.endRemoveRows()
+
+        # NOTE: Both lists are sorted, so the final rows of the new signals are their indexes in `signals`.
+        inserted_rows = [
+            row
+            for row, signal in enumerate(signals)
+            if signal not in self._signals_rows
+        ]
+        for first, last in _contiguous_ranges(inserted_rows):
+            self.beginInsertRows(QModelIndex(), first, last)
+            self._signals[first:first] = signals[first : last + 1]
+            self.endInsertRows()
+
+        inserted_signals = set(signals[row] for row in inserted_rows)
+        for axis, removed_checked in enumerate(self._removed_checked_signals):
+            restored = [s for s in removed_checked if s in inserted_signals]
+            if len(restored) == 0:
+                continue
+            for signal in restored:
+                del removed_checked[signal]
+            if self._exclusive_axes[axis]:
+                if len(self._checked_signals[axis]) != 0:
+                    continue
+                restored = restored[-1:]
+            self._checked_signals[axis].update(restored)
+
+        self._signals_rows = {signal: row for row, signal in enumerate(self._signals)}
+
+        renamed_rows = [
+            self._signals_rows[signal]
+            for signal, name in signals_names.items()
+            if self._signals_names.get(signal, None) != name
+            and signal in self._signals_rows
+        ]
+        self._signals_names = dict(signals_names)
+        for first, last in _contiguous_ranges(sorted(renamed_rows)):
+            self.dataChanged.emit(self.index(first, 0), self.index(last, 0))
 
-        self._layout.setRowMinimumHeight(row_count, 20)
+    def signals(self) -> list[str]:
+        return self._signals
 
-        self._row_widgets.append(tuple(args))
+    def checked_signals(self, axis: int) -> set[str]:
+        return self._checked_signals[axis]
 
+    def set_checked_signals(self, axis: int, signals: set[str]):
+        """Programatically set the checked signals of an axis, without emitting `check_state_changed`."""
+        changed = self._checked_signals[axis] ^ set(signals)
+        self._checked_signals[axis] = set(s for s in signals if s in self._signals_rows)
 
-class SelectionTable1D(TableScrollArea):
-    selected_streams_changed = Signal(str, set)  # X, Y
+        for signal in changed:
+            self._emit_check_changed(axis, signal)
 
-    def __init__(self, parent):
-        super().__init__(parent)
+    def rowCount(self, parent: QModelIndex | None = None):  # noqa: N802
+        if parent is not None and parent.isValid():
+            return 0
+        return len(self._signals)
 
-        self._selected_x_signal = ""
-        self._selected_y_signals = set()
+    def columnCount(self, parent: QModelIndex | None = None):  # noqa: N802
+        if parent is not None and parent.isValid():
+            return 0
+        return len(self._headers)
 
-        self._old_independent_signals = list()
-        self._old_dependent_signals = set()
+    def headerData(  # noqa: N802
+        self, section: int, orientation, role=Qt.ItemDataRole.DisplayRole
+    ):
+        if (
+            orientation == Qt.Orientation.Horizontal
+            and role == Qt.ItemDataRole.DisplayRole
+        ):
+            return self._headers[section]
+        return None
+
+    def flags(self, index: QModelIndex):
+        if index.column() == 0:
+            return Qt.ItemFlag.ItemIsEnabled
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsUserCheckable
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        signal = self._signals[index.row()]
+        column = index.column()
+
+        match role:
+            case Qt.ItemDataRole.DisplayRole if column == 0:
+                return self._signals_names.get(signal, signal)
+            case Qt.ItemDataRole.ToolTipRole if column == 0:
+                return signal
+            case Qt.ItemDataRole.FontRole if column == 0:
+                if "(custom)" not in self._signals_names.get(signal, signal):
+                    return None
+                font = QFont()
+                font.setItalic(True)
+                return font
+            case Qt.ItemDataRole.CheckStateRole if column != 0:
+                if signal in self._checked_signals[column - 1]:
+                    return Qt.CheckState.Checked
+                return Qt.CheckState.Unchecked
+            case SignalSelectionModel.SIGNAL_ROLE:
+                return signal
+            case _:
+                return None
+
+    def setData(self, index: QModelIndex, data, role=Qt.ItemDataRole.EditRole):  # noqa: N802
+        column = index.column()
+        if not index.isValid() or role != Qt.ItemDataRole.CheckStateRole or column == 0:
+            return False
+
+        axis = column - 1
+        signal = self._signals[index.row()]
+        checked = Qt.CheckState(data) == Qt.CheckState.Checked
+        checked_signals = self._checked_signals[axis]
+
+        if checked == (signal in checked_signals):
+            return True
+
+        if self._exclusive_axes[axis]:
+            # NOTE: Like a radio button, an exclusive axis can only be changed by checking another signal.
+            if not checked:
+                return False
+
+            old_signals = list(checked_signals)
+            checked_signals.clear()
+            for old_signal in old_signals:
+                self._emit_check_changed(axis, old_signal)
+
+        if checked:
+            checked_signals.add(signal)
+        else:
+            checked_signals.discard(signal)
+        self._emit_check_changed(axis, signal)
 
-        self._row_data = dict()
+        self.check_state_changed.emit(axis)
+        return True
 
-        alignment = Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignCenter
+    def _emit_check_changed(self, axis: int, signal: str):
+        row = self._signals_rows.get(signal, None)
+        if row is None:
+            return
 
-        name = QLabel("Signal")
-        name.setAlignment(alignment)
-        self._layout.addWidget(name, 0, 0, 1, 1)
-        x_axis = QLabel("X")
-        x_axis.setAlignment(alignment)
-        self._layout.addWidget(x_axis, 0, 1, 1, 1)
-        y_axis = QLabel("Y")
-        y_axis.setAlignment(alignment)
-        self._layout.addWidget(y_axis, 0, 2, 1, 1)
+        index = self.index(row, axis + 1)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.CheckStateRole])
 
-        self._layout.setColumnStretch(0, 2)
-        self._layout.setColumnStretch(1, 1)
-        self._layout.setColumnStretch(2, 1)
 
-        self.refresh_layout()
+class SignalSelectionTable(QWidget):
+    """
+    Base widget for selecting signals for each axis, with an incremental name filter.
 
-    def _row_signal_name(self, row: int):
-        return self._row_widgets[row][0].text()
+    The signals are shown in a `QTableView` over a `SignalSelectionModel`, so only
+    the visible rows are painted, regardless of how many signals there are.
+    """
 
-    def _row_signal(self, row: int):
-        return self._row_data[self._row_signal_name(row)]
+    def __init__(self, parent, axes_names: list[str], exclusive_axes: list[bool]):
+        super().__init__(parent)
 
-    def _is_x_axis_activated(self, row: int):
-        return self._row_widgets[row][1].isChecked()
+        self._parent = parent
 
-    def _activated_x_axis_rows(self):
-        return [
-            row
-            for row in range(len(self._row_widgets))
-            if self._is_x_axis_activated(row)
-        ]
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
 
-    def _is_y_axis_activated(self, row: int):
-        return self._row_widgets[row][2].isChecked()
+        self._filter_line = QLineEdit()
+        self._filter_line.setPlaceholderText("Filter signals...")
+        self._filter_line.setClearButtonEnabled(True)
+        layout.addWidget(self._filter_line)
+
+        self._model = SignalSelectionModel(axes_names, exclusive_axes)
+        self._model.check_state_changed.connect(self._on_check_state_changed)
+
+        self._filter_model = QSortFilterProxyModel()
+        self._filter_model.setSourceModel(self._model)
+        self._filter_model.setFilterKeyColumn(0)
+        self._filter_model.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self._filter_line.textChanged.connect(self._filter_model.setFilterFixedString)
+
+        self._view = QTableView()
+        self._view.setModel(self._filter_model)
+        self._view.setSelectionMode(QTableView.SelectionMode.NoSelection)
+        self._view.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self._view.setWordWrap(False)
+        self._view.verticalHeader().setVisible(False)
+        self._view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self._view.verticalHeader().setDefaultSectionSize(22)
+        self._view.horizontalHeader().setSectionResizeMode(
+            0, QHeaderView.ResizeMode.Stretch
+        )
+        for column in range(1, len(axes_names) + 1):
+            self._view.horizontalHeader().setSectionResizeMode(
+                column, QHeaderView.ResizeMode.ResizeToContents
+            )
+        layout.addWidget(self._view)
 
-    def _activated_y_axis_rows(self):
-        return [
-            row
-            for row in range(len(self._row_widgets))
-            if self._is_y_axis_activated(row)
-        ]
+        self._configured_signals = frozenset()
+        self._outdated = False
 
     def configure_signals(self, uids, signals):
-        self._clear_layout()
-        self._row_data.clear()
+        """
+        Show `signals` on the table, selecting default ones for axes without a selection.
 
-        sorted_signals_list = sorted(signals)
-        for signal in sorted_signals_list:
-            signal_name = self._parent.get_signal_name(signal)
-            self._row_data[signal_name] = signal
+        Signals kept from the previous configuration keep their selection state, and
+        signals checked before they were last removed are checked again.
+        """
+        signals = frozenset(signals)
+        if signals != self._configured_signals:
+            self._update_signals(signals)
+            self._configured_signals = signals
 
-            name = QLabel(signal_name)
-            name.setAlignment(
-                Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignCenter
-            )
-            if "(custom)" in signal_name:
-                _f = name.font()
-                _f.setItalic(True)
-                name.setFont(_f)
+        self._select_default_signals(signals)
+        self._emit_selected_signals()
 
-            x_axis_radio_button = QRadioButton()
-            x_axis_radio_button.clicked.connect(self._change_x_axis_signal)
+    def is_outdated(self) -> bool:
+        """Whether the table needs to be configured again before it is used."""
+        return self._outdated
 
-            y_axis_checkbox = QCheckBox()
-            y_axis_checkbox.toggled.connect(self._change_y_axis_signals)
+    def set_outdated(self, state: bool):
+        self._outdated = state
 
-            self._add_row(name, x_axis_radio_button, y_axis_checkbox)
+    def _update_signals(self, signals):
+        sorted_signals_list = sorted(signals)
+        self._model.update_signals(
+            sorted_signals_list,
+            {signal: self._parent.get_signal_name(signal) for signal in signals},
+        )
 
-        self._select_default_x_axis_signal(signals)
-        self._select_default_y_axis_signals(signals)
+    def _checked_signal(self, axis: int) -> str:
+        for signal in self._model.signals():
+            if signal in self._model.checked_signals(axis):
+                return signal
+        return ""
 
-        # NOTE: Avoid sending essentially the same signal twice in a row.
-        self._change_x_axis_signal(emit=False)
-        self._change_y_axis_signals()
+    def _check_first_signal_in(self, axis: int, candidates) -> bool:
+        if len(self._model.checked_signals(axis)) != 0:
+            return False
 
-        self.refresh_layout()
+        for signal in self._model.signals():
+            if signal in candidates:
+                self._model.set_checked_signals(axis, {signal})
+                return True
+        return False
 
-    def _select_default_x_axis_signal(self, signals):
-        """Select the default X axis signal if it's available, with more priority to old selected signals."""
-        default_independent_signals = self._parent.default_independent_signals
+    @abstractmethod
+    def _select_default_signals(self, signals):
+        """Check the default signals of the selected runs, for axes with none checked."""
+        raise NotImplementedError
 
-        has_independent = any(s in self._old_independent_signals for s in signals)
-        if has_independent:
-            default_independent_signals = self._old_independent_signals
+    @abstractmethod
+    def _emit_selected_signals(self):
+        """Emit `selected_streams_changed` with the currently checked signals."""
+        raise NotImplementedError
 
-        for row in range(len(self._row_widgets)):
-            signal = self._row_signal(row)
-            if signal in default_independent_signals:
-                set_checked_no_emit(self._row_widgets[row][1], True)
-                return
+    @abstractmethod
+    def _on_check_state_changed(self, axis: int):
+        """Handle a change in the checked signals of an axis."""
+        raise NotImplementedError
 
-    def _get_selected_x_axis_signal(self):
-        for row in self._activated_x_axis_rows():
-            return self._row_signal(row)
 
-    def _select_default_y_axis_signals(self, signals):
-        """Select the default Y axis signals if they're available, with more priority to old selected signals."""
-        default_dependent_signals = self._parent.default_dependent_signals
+class SelectionTable1D(SignalSelectionTable):
+    selected_streams_changed = Signal(str, set)  # X, Y
 
-        has_dependent = any(s in self._old_dependent_signals for s in signals)
-        if has_dependent:
-            default_dependent_signals = self._old_dependent_signals
+    def __init__(self, parent):
+        super().__init__(parent, ["X", "Y"], [True, False])
+
+        self._selected_x_signal = ""
+        self._selected_y_signals = set()
 
-        for row in range(len(self._row_widgets)):
-            signal = self._row_signal(row)
-            if signal in default_dependent_signals:
-                set_checked_no_emit(self._row_widgets[row][2], True)
+    def _on_check_state_changed(self, axis: int):
+        if axis == 0:
+            self._change_x_axis_signal()
+        else:
+            self._change_y_axis_signals()
 
-    def _get_selected_y_axis_signals(self):
-        selected_signals = set()
+    def _select_default_signals(self, signals):
+        self._select_default_x_axis_signal(signals)
+        self._select_default_y_axis_signals(signals)
 
-        for row in self._activated_y_axis_rows():
-            selected_signals.add(self._row_signal(row))
+        # NOTE: Avoid sending essentially the same signal twice in a row.
+        self._change_x_axis_signal(emit=False)
+        self._change_y_axis_signals(emit=False)
 
-        return selected_signals
+    def _select_default_x_axis_signal(self, signals):
+        """Select the default X axis signal if it's available and no other signal is selected."""
+        self._check_first_signal_in(0, self._parent.default_independent_signals)
 
-    def _change_x_axis_signal(self, state=True, *, emit=True):
-        self._selected_x_signal = self._get_selected_x_axis_signal()
-        self._old_independent_signals = [self._selected_x_signal]
+    def _select_default_y_axis_signals(self, signals):
+        """Select the default Y axis signals if they're available and no other signal is selected."""
+        if len(self._model.checked_signals(1)) != 0:
+            return
+
+        default_dependent_signals = self._parent.default_dependent_signals
+        self._model.set_checked_signals(
+            1, set(s for s in signals if s in default_dependent_signals)
+        )
+
+    def _change_x_axis_signal(self, *, emit=True):
+        self._selected_x_signal = self._checked_signal(0)
 
         if emit:
-            self.selected_streams_changed.emit(
-                self._selected_x_signal, self._selected_y_signals
-            )
+            self._emit_selected_signals()
 
-    def _change_y_axis_signals(self, state=True, *, emit=True):
-        self._selected_y_signals = self._get_selected_y_axis_signals()
-        self._old_dependent_signals = set(self._selected_y_signals)
+    def _change_y_axis_signals(self, *, emit=True):
+        self._selected_y_signals = set(self._model.checked_signals(1))
 
         if emit:
-            self.selected_streams_changed.emit(
-                self._selected_x_signal, self._selected_y_signals
-            )
+            self._emit_selected_signals()
+
+    def _emit_selected_signals(self):
+        self.selected_streams_changed.emit(
+            self._selected_x_signal, self._selected_y_signals
+        )
 
 
-class SelectionTable2D(TableScrollArea):
+class SelectionTable2D(SignalSelectionTable):
     selected_streams_changed = Signal(str, str, set)  # X, Y, Z
 
     def __init__(self, parent):
-        super().__init__(parent)
+        super().__init__(parent, ["X", "Y", "Data"], [True, True, True])
 
         self._selected_x_signal = ""
         self._selected_y_signal = ""
         self._selected_z_signal = ""
 
-        self._old_independent_signals = list()
-        self._old_dependent_signals = set()
-
-        self._x_buttons_container = QButtonGroup()
-        self._y_buttons_container = QButtonGroup()
-        self._z_buttons_container = QButtonGroup()
-
-        self._row_data = dict()
-
-        alignment = Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignCenter
-
-        name = QLabel("Signal")
-        name.setAlignment(alignment)
-        self._layout.addWidget(name, 0, 0, 1, 1)
-        x_axis = QLabel("X")
-        x_axis.setAlignment(alignment)
-        self._layout.addWidget(x_axis, 0, 1, 1, 1)
-        y_axis = QLabel("Y")
-        y_axis.setAlignment(alignment)
-        self._layout.addWidget(y_axis, 0, 2, 1, 1)
-        data_axis = QLabel("Data")
-        data_axis.setAlignment(alignment)
-        self._layout.addWidget(data_axis, 0, 3, 1, 1)
-
-        self._layout.setColumnStretch(0, 2)
-        self._layout.setColumnStretch(1, 1)
-        self._layout.setColumnStretch(2, 1)
-        self._layout.setColumnStretch(3, 1)
-
-        self.refresh_layout()
-
-    def configure_signals(self, uids, signals):
-        self._clear_layout()
-        self._row_data.clear()
-
-        sorted_signals_list = sorted(signals)
-        for signal in sorted_signals_list:
-            signal_name = self._parent.get_signal_name(signal)
-            self._row_data[signal_name] = signal
-
-            name = QLabel(signal_name)
-            name.setAlignment(
-                Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignCenter
-            )
-            if "(custom)" in signal_name:
-                _f = name.font()
-                _f.setItalic(True)
-                name.setFont(_f)
-
-            x_axis_radio_button = QRadioButton()
-            x_axis_radio_button.clicked.connect(self._change_x_axis_signal)
-            self._x_buttons_container.addButton(x_axis_radio_button)
-
-            y_axis_radio_button = QRadioButton()
-            y_axis_radio_button.clicked.connect(self._change_y_axis_signal)
-            self._y_buttons_container.addButton(y_axis_radio_button)
-
-            z_axis_radio_button = QRadioButton()
-            z_axis_radio_button.clicked.connect(self._change_z_axis_signal)
-            self._z_buttons_container.addButton(z_axis_radio_button)
-
-            self._add_row(
-                name, x_axis_radio_button, y_axis_radio_button, z_axis_radio_button
-            )
+    def _on_check_state_changed(self, axis: int):
+        match axis:
+            case 0:
+                self._change_x_axis_signal()
+            case 1:
+                self._change_y_axis_signal()
+            case _:
+                self._change_z_axis_signal()
 
+    def _select_default_signals(self, signals):
         self._select_default_x_axis_signal(signals)
         self._select_default_y_axis_signal(signals)
         self._select_default_z_axis_signal(signals)
 
         self._change_x_axis_signal(emit=False)
         self._change_y_axis_signal(emit=False)
-        self._change_z_axis_signal()
-
-        self.refresh_layout()
-
-    def _row_signal_name(self, row: int):
-        return self._row_widgets[row][0].text()
-
-    def _row_signal(self, row: int):
-        return self._row_data[self._row_signal_name(row)]
-
-    def _is_x_axis_activated(self, row: int):
-        return self._row_widgets[row][1].isChecked()
-
-    def _activated_x_axis_rows(self):
-        return [
-            row
-            for row in range(len(self._row_widgets))
-            if self._is_x_axis_activated(row)
-        ]
-
-    def _is_y_axis_activated(self, row: int):
-        return self._row_widgets[row][2].isChecked()
-
-    def _activated_y_axis_rows(self):
-        return [
-            row
-            for row in range(len(self._row_widgets))
-            if self._is_y_axis_activated(row)
-        ]
-
-    def _is_z_axis_activated(self, row: int):
-        return self._row_widgets[row][3].isChecked()
-
-    def _activated_z_axis_rows(self):
-        return [
-            row
-            for row in range(len(self._row_widgets))
-            if self._is_z_axis_activated(row)
-        ]
+        self._change_z_axis_signal(emit=False)
 
     def _select_default_x_axis_signal(self, signals):
-        """Select the default X axis signal if it's available, with more priority to old selected signals."""
+        """Select the default X axis signal if it's available and no other signal is selected."""
         default_independent_signals = self._parent.default_independent_signals
-
-        has_independent = any(s in self._old_independent_signals for s in signals)
-        if has_independent:
-            default_independent_signals = self._old_independent_signals
-
         if len(default_independent_signals) < 2:
             return
 
-        for row in range(len(self._row_widgets)):
-            signal = self._row_signal(row)
-            if signal == default_independent_signals[1]:
-                set_checked_no_emit(self._row_widgets[row][1], True)
-                return
-
-    def _get_selected_x_axis_signal(self):
-        for row in self._activated_x_axis_rows():
-            return self._row_signal(row)
+        self._check_first_signal_in(0, {default_independent_signals[1]})
 
     def _select_default_y_axis_signal(self, signals):
-        """Select the default Y axis signal if it's available, with more priority to old selected signals."""
+        """Select the default Y axis signal if it's available and no other signal is selected."""
         default_independent_signals = self._parent.default_independent_signals
-
-        has_independent = any(s in self._old_independent_signals for s in signals)
-        if has_independent:
-            default_independent_signals = self._old_independent_signals
-
         if len(default_independent_signals) < 2:
             return
 
-        for row in range(len(self._row_widgets)):
-            signal = self._row_signal(row)
-            if signal == default_independent_signals[0]:
-                set_checked_no_emit(self._row_widgets[row][2], True)
-                return
-
-    def _get_selected_y_axis_signal(self):
-        for row in self._activated_y_axis_rows():
-            return self._row_signal(row)
+        self._check_first_signal_in(1, {default_independent_signals[0]})
 
     def _select_default_z_axis_signal(self, signals):
-        """Select the default Z axis signal if it's available, with more priority to old selected signals."""
-        default_dependent_signals = self._parent.default_dependent_signals
+        """Select the default Z axis signal if it's available and no other signal is selected."""
+        self._check_first_signal_in(2, self._parent.default_dependent_signals)
 
-        has_dependent = any(s in self._old_dependent_signals for s in signals)
-        if has_dependent:
-            default_dependent_signals = self._old_dependent_signals
-
-        for row in range(len(self._row_widgets)):
-            signal = self._row_signal(row)
-            if signal in default_dependent_signals:
-                set_checked_no_emit(self._row_widgets[row][3], True)
-                return
-
-    def _get_selected_z_axis_signal(self):
-        for row in self._activated_z_axis_rows():
-            return self._row_signal(row)
-
-    def _change_x_axis_signal(self, state=True, *, emit=True):
-        self._selected_x_signal = self._get_selected_x_axis_signal()
-        self._parent._old_independent_signals = [
-            self._selected_x_signal,
-            self._selected_y_signal,
-        ]
+    def _change_x_axis_signal(self, *, emit=True):
+        self._selected_x_signal = self._checked_signal(0)
 
         if emit:
-            self.selected_streams_changed.emit(
-                self._selected_x_signal,
-                self._selected_y_signal,
-                set([self._selected_z_signal]),
-            )
+            self._emit_selected_signals()
 
-    def _change_y_axis_signal(self, state=True, *, emit=True):
-        self._selected_y_signal = self._get_selected_y_axis_signal()
-        self._parent._old_independent_signals = [
-            self._selected_x_signal,
-            self._selected_y_signal,
-        ]
+    def _change_y_axis_signal(self, *, emit=True):
+        self._selected_y_signal = self._checked_signal(1)
 
         if emit:
-            self.selected_streams_changed.emit(
-                self._selected_x_signal,
-                self._selected_y_signal,
-                set([self._selected_z_signal]),
-            )
+            self._emit_selected_signals()
 
-    def _change_z_axis_signal(self, state=True, *, emit=True):
-        self._selected_z_signal = self._get_selected_z_axis_signal()
-        self._parent._old_dependent_signals = set([self._selected_z_signal])
+    def _change_z_axis_signal(self, *, emit=True):
+        self._selected_z_signal = self._checked_signal(2)
 
         if emit:
-            self.selected_streams_changed.emit(
-                self._selected_x_signal,
-                self._selected_y_signal,
-                set([self._selected_z_signal]),
-            )
+            self._emit_selected_signals()
+
+    def _emit_selected_signals(self):
+        self.selected_streams_changed.emit(
+            self._selected_x_signal,
+            self._selected_y_signal,
+            set([self._selected_z_signal]),
+        )
 
 
 class CustomSignalCreator(QStackedWidget):
-    def __init__(self, run_uid: str, signals: dict[str, str]):
+    def __init__(
+        self,
+        run_uid: str,
+        signals: dict[str, str],
+        runs: list[tuple[str, str]] | None = None,
+    ):
         super().__init__()
 
         self._run_uid = run_uid
         self._expr_signal_names = list(signals.keys())
+        self._runs = runs if runs is not None else [(run_uid, "")]
 
         main = QWidget()
         layout = QVBoxLayout()
@@ -666,10 +765,17 @@ Other examples:
 Using numpy: <code>np.gradient(abc, edge_order=2)</code>
 <br>
 Multiple inputs: <code>abc - np.log(xyz)</code>
+<br><br>
+Signals of other runs are available through <code>runs</code>, in the order the runs were received,
+interpolated over the first motor of this run (or the point index, if the runs don't share it):
+<br><br>
+Normalizing by another run: <code>abc / runs["Reference scan"].abc</code>
+<br>
+Averaging the last 5 runs: <code>mean(runs[-5:].abc)</code>
 <br><br><br>
 Aside from the direct usage of <code>np</code>, for convenience, the following operations are also available:
 <br><br>
-<code>log | log10 | (a)sin | (a)cos | (a)tan</code>
+<code>log | log10 | (a)sin | (a)cos | (a)tan | mean</code>
 """,
             readOnly=True,
         )
@@ -679,15 +785,27 @@ Aside from the direct usage of <code>np</code>, for convenience, the following o
     def get_custom_signal_parameters(self):
         return self.signal_name_line.text(), self.signal_expr_line.text()
 
-    def validate_expression(self, expression) -> tuple[bool, Exception | None]:
+    def validate_expression(
+        self, expression, signal_names=None
+    ) -> tuple[bool, Exception | None]:
+        """
+        Check if an expression can be evaluated with the given signals, or with all
+        signals shown in the table if they're not given.
+        """
         import numpy as np
 
-        environment = CUSTOM_SIGNALS_ENVIRONMENT
-        for detector in self._expr_signal_names:
+        if signal_names is None:
+            signal_names = self._expr_signal_names
+
+        environment = dict(CUSTOM_SIGNALS_ENVIRONMENT)
+        for detector in signal_names:
             environment[detector] = np.array([1, 2, 3])
+        environment["runs"] = RunCollection(
+            self._runs, lambda uid, signal: np.array([1, 2, 3])
+        )
 
         try:
-            eval(expression, locals=environment)
+            eval(expression, {}, environment)
 
             return True, None
         except Exception as e:
@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from sophys_live_view.utils.startup_timing import startup_timer
+from sophys_live_view.widgets.main_window import SophysLiveView
+
+# NOTE: Cumulative import time of the entrypoint module, in seconds. It's generous,
+# so that it only fails on regressions such as importing a whole new library.
+IMPORT_TIME_BUDGET = 4.0
+
+DEFERRED_MODULES = ("kafka", "msgpack_numpy", "event_model")
+
+
+def _import_times(module: str) -> dict[str, int]:
+    """Get the cumulative import time, in microseconds, of each module imported."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=dict(os.environ, QT_QPA_PLATFORM="offscreen"),
+    )
+
+    import_times = dict()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line.split("|", 2))
+        import_times[name] = int(cumulative)
+    return import_times
+
+
+@pytest.fixture(scope="module")
+def import_times():
+    return _import_times("sophys_live_view.main")
+
+
+def test_import_time_budget(import_times):
+    assert import_times["sophys_live_view.main"] < IMPORT_TIME_BUDGET * 1e6
+
+
+@pytest.mark.parametrize("module", DEFERRED_MODULES)
+def test_deferred_imports(import_times, module):
+    assert module not in import_times
+
+
+def test_startup_milestones(qtbot):
+    startup_timer.restart()
+
+    main_window = SophysLiveView([])
+    qtbot.addWidget(main_window)
+    with qtbot.waitExposed(main_window):
+        main_window.show()
+
+    qtbot.waitUntil(lambda: "first window painted" in startup_timer.milestones)
+    main_window.close()
@@ -0,0 +1,45 @@
+import numpy as np
+
+from sophys_live_view.utils.binned_scatter import BinnedScatter
+
+
+def test_binned_scatter_incremental():
+    rng = np.random.default_rng(0)
+    x = rng.uniform(-1, 1, 10_000)
+    y = rng.uniform(-1, 1, 10_000)
+    values = x + y
+
+    incremental = BinnedScatter((32, 32))
+    for length in (10, 100, 5_000, 10_000):
+        incremental.update(x[:length], y[:length], values[:length])
+    assert incremental.binned_points == 10_000
+
+    # NOTE: The region grew while binning, so compare with all points binned at once.
+    full = BinnedScatter((32, 32), limits=incremental.limits)
+    full.update(x, y, values)
+
+    assert incremental.limits[0][0] <= -1 and incremental.limits[0][1] >= 1
+    np.testing.assert_allclose(incremental.image(), full.image())
+
+
+def test_binned_scatter_mean():
+    binned_scatter = BinnedScatter((2, 2), limits=((0, 2), (0, 2)))
+    binned_scatter.update(
+        np.array([0.5, 0.5, 1.5, 5.0]),
+        np.array([0.5, 0.5, 1.5, 0.5]),
+        np.array([1.0, 3.0, 4.0, 100.0]),
+    )
+
+    np.testing.assert_array_equal(binned_scatter.image(), [[2, np.nan], [np.nan, 4]])
+    assert binned_scatter.origin == (0, 0)
+    assert binned_scatter.scale == (1, 1)
+
+
+def test_binned_scatter_generation():
+    binned_scatter = BinnedScatter((2, 2), limits=((0, 2), (0, 2)))
+    x = np.array([0.5, 1.5])
+    binned_scatter.update(x, x, np.array([1.0, 2.0]), generation=1)
+
+    # NOTE: Same length, but the data changed as a whole.
+    binned_scatter.update(x, x, np.array([3.0, 4.0]), generation=2)
+    np.testing.assert_array_equal(binned_scatter.image(), [[3, np.nan], [np.nan, 4]])
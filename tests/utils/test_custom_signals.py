@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+from sophys_live_view.utils.custom_signals import (
+    CustomSignalEvaluator,
+    RunCollection,
+    mean,
+)
+
+
+class Runs:
+    """Runs with data and versions, counting how many times each signal is read."""
+
+    def __init__(self):
+        self.data = dict()
+        self.versions = dict()
+        self.reads = list()
+
+    def set(self, uid: str, signal: str, values):
+        self.data.setdefault(uid, dict())[signal] = np.asarray(values, dtype=float)
+        self.versions[(uid, signal)] = self.versions.get((uid, signal), 0) + 1
+
+    def get_data(self, uid: str, signal: str):
+        self.reads.append((uid, signal))
+        return self.data.get(uid, {}).get(signal, None)
+
+    def get_data_version(self, uid: str, signal: str):
+        return self.versions.get((uid, signal), 0)
+
+    def get_runs(self):
+        return [(uid, f"scan {uid}") for uid in self.data]
+
+    def evaluator(self):
+        return CustomSignalEvaluator(
+            {"mean": mean},
+            self.get_data,
+            self.get_data_version,
+            self.get_runs,
+            lambda uid: "x",
+        )
+
+
+def test_run_collection():
+    runs = RunCollection(
+        [("a", "scan a"), ("b", "scan b"), ("c", "scan c")],
+        lambda uid, signal: np.array([ord(uid), len(signal)]),
+    )
+
+    assert len(runs) == 3
+    assert runs[-1].uid == "c"
+    assert runs["scan b"].uid == "b"
+    np.testing.assert_array_equal(runs[0].det, [ord("a"), 3])
+    np.testing.assert_array_equal(runs[1:].det, [[ord("b"), 3], [ord("c"), 3]])
+    with pytest.raises(KeyError):
+        runs["scan d"]
+
+
+def test_cross_run_alignment():
+    runs = Runs()
+    runs.set("a", "x", [0, 1, 2, 3])
+    runs.set("a", "det", [0, 10, 20, 30])
+    runs.set("b", "x", [2, 1.5, 0.5])
+    runs.set("b", "det", [2, 1.5, 0.5])
+
+    evaluator = runs.evaluator()
+
+    # NOTE: Interpolated over the first motor, NaN outside of the other run's range.
+    value, changed = evaluator.evaluate("a", "ratio", 'det / runs["scan b"].det')
+    assert changed
+    np.testing.assert_allclose(value, [np.nan, 10, 10, np.nan])
+
+    value, _ = evaluator.evaluate("a", "average", "mean(runs.det)")
+    np.testing.assert_allclose(value, [0, 5.5, 11, 30])
+
+
+def test_cross_run_cache():
+    runs = Runs()
+    for uid in "abc":
+        runs.set(uid, "x", [0, 1, 2])
+        runs.set(uid, "det", [1, 2, 3])
+
+    evaluator = runs.evaluator()
+    value, changed = evaluator.evaluate("a", "average", "mean(runs[-2:].det)")
+    assert changed
+    np.testing.assert_allclose(value, [1, 2, 3])
+    assert evaluator.dependents("c") == [("a", "average")]
+    assert evaluator.dependents("a") == [("a", "average")]
+
+    # NOTE: Unchanged inputs reuse the result.
+    runs.reads.clear()
+    _, changed = evaluator.evaluate("a", "average", "mean(runs[-2:].det)")
+    assert not changed
+    assert runs.reads == []
+
+    # NOTE: Data appended to a run only affects that run's alignment.
+    runs.set("c", "x", [0, 1, 2, 3])
+    runs.set("c", "det", [3, 4, 5, 6])
+    value, changed = evaluator.evaluate("a", "average", "mean(runs[-2:].det)")
+    assert changed
+    np.testing.assert_allclose(value, [2, 3, 4])
+
+    # NOTE: A new run changes the result of expressions using the last runs.
+    assert evaluator.dependents("d") == [("a", "average")]
+    runs.set("d", "det", [])
+    runs.set("d", "x", [])
+    value, changed = evaluator.evaluate("a", "average", "mean(runs[-2:].det)")
+    assert changed
+    np.testing.assert_allclose(value, [3, 4, 5])
+
+
+def test_cross_run_without_common_axis():
+    runs = Runs()
+    runs.set("a", "x", [0, 1, 2])
+    runs.set("b", "det", [1, 2])
+    runs.set("c", "det", [1, 2, 3, 4, 5])
+
+    evaluator = runs.evaluator()
+
+    # NOTE: Aligned over the point index, up to the length of the target run's motor.
+    value, _ = evaluator.evaluate("a", "average", "abs(mean(runs.det))")
+    np.testing.assert_allclose(value, [1, 2, 3])
+    assert ("a", "abs") not in evaluator._results[("a", "average")].inputs
+
+    with pytest.raises(KeyError):
+        evaluator.evaluate("b", "average", "mean(runs.other)")
@@ -1,12 +1,18 @@
+import json
+import random
+import threading
+import time
+
 import pytest
 
+from sophys_live_view.utils.data_source import DataSource
 from sophys_live_view.utils.data_source_manager import DataSourceManager
 from sophys_live_view.utils.json_data_source import JSONDataSource
 
 
 @pytest.fixture
 def empty_manager():
-    manager = DataSourceManager(polling_time=0.05)
+    manager = DataSourceManager()
 
     yield manager
 
@@ -54,3 +60,161 @@ def test_data_source_after_start(empty_manager, test_data_path, qtbot):
     with qtbot.waitSignals([empty_manager.new_data_received] * 50, timeout=2000):
         with qtbot.waitSignal(empty_manager.new_data_stream, timeout=1000):
             empty_manager.add_data_source(data_source)
+
+
+def test_data_source_starts_on_add(empty_manager, test_data_path, qtbot):
+    empty_manager.start()
+
+    data_source = JSONDataSource(str(test_data_path / "count_with_rand.json"))
+    with qtbot.waitSignal(data_source.started, timeout=100):
+        empty_manager.add_data_source(data_source)
+
+
+def test_finite_data_sources_limit(test_data_path, qtbot):
+    lock = threading.Lock()
+    running = []
+    max_running = []
+
+    class SlowJSONDataSource(JSONDataSource):
+        def run(self):
+            with lock:
+                running.append(self)
+                max_running.append(len(running))
+            time.sleep(0.05)
+            super().run()
+            with lock:
+                running.remove(self)
+
+    manager = DataSourceManager(max_finite_sources=2)
+    manager.start()
+
+    data_sources = [
+        SlowJSONDataSource(str(test_data_path / file_name))
+        for file_name in (
+            "count_with_rand.json",
+            "scan_with_rand.json",
+            "scan_with_det.json",
+            "grid_with_rand.json",
+            "grid_with_det.json",
+        )
+    ]
+    with qtbot.waitSignals([manager.data_stream_closed] * 5, timeout=3000):
+        for data_source in data_sources:
+            manager.add_data_source(data_source)
+
+    manager.stop()
+    assert max(max_running) == 2
+
+
+def test_data_source_manager_cooperative_stop():
+    class StreamingDataSource(DataSource):
+        def run(self):
+            while not self.isInterruptionRequested():
+                time.sleep(0.01)
+            self.stopped_cooperatively = True
+
+    data_source = StreamingDataSource()
+    data_source.stopped_cooperatively = False
+
+    manager = DataSourceManager()
+    manager.add_data_source(data_source)
+    manager.start()
+    while not data_source.isRunning():
+        time.sleep(0.01)
+
+    stop_time = time.monotonic()
+    manager.stop(timeout=1.0)
+
+    assert time.monotonic() - stop_time < 1.0
+    assert data_source.stopped_cooperatively
+    assert not manager.isRunning()
+
+
+def test_bluesky_out_of_order_documents(test_data_path):
+    with open(test_data_path / "scan_with_rand.json") as _f:
+        documents = json.load(_f)
+
+    data_source = JSONDataSource(str(test_data_path / "scan_with_rand.json"))
+
+    received = []
+    data_source.new_data_stream.connect(lambda uid, *_: received.append(("start", 0)))
+    data_source.new_data_received.connect(
+        lambda uid, data, metadata: received.append(("event", int(data["seq_num"][0])))
+    )
+    data_source.data_stream_closed.connect(lambda uid: received.append(("stop", 0)))
+
+    random.Random(0).shuffle(documents)
+    for document_type, document in documents:
+        data_source(document_type, document)
+
+    assert received == [
+        ("start", 0),
+        *(("event", seq_num) for seq_num in range(1, 12)),
+        ("stop", 0),
+    ]
+
+
+def test_bluesky_flush_missing_events(test_data_path):
+    with open(test_data_path / "scan_with_rand.json") as _f:
+        documents = json.load(_f)
+
+    data_source = JSONDataSource(str(test_data_path / "scan_with_rand.json"))
+
+    received = []
+    data_source.new_data_received.connect(
+        lambda uid, data, metadata: received.append(int(data["seq_num"][0]))
+    )
+    data_source.data_stream_closed.connect(lambda uid: received.append("stop"))
+
+    # NOTE: Drop the event with seq_num 5, so the next ones wait for it.
+    documents = [(t, d) for t, d in documents if t != "event" or d["seq_num"] != 5]
+    for document_type, document in documents:
+        data_source(document_type, document)
+    assert received == [1, 2, 3, 4]
+
+    data_source.flush_pending_documents()
+    assert received == [1, 2, 3, 4, *range(6, 12), "stop"]
+
+
+def test_bluesky_orphan_documents(test_data_path):
+    with open(test_data_path / "scan_with_rand.json") as _f:
+        documents = json.load(_f)
+
+    data_source = JSONDataSource(str(test_data_path / "scan_with_rand.json"))
+
+    received = []
+    data_source.new_data_received.connect(lambda *_: received.append("event"))
+
+    # NOTE: As if reading from the middle of the run, without its start.
+    for document_type, document in documents:
+        if document_type != "start":
+            data_source(document_type, document)
+
+    data_source.flush_pending_documents()
+    assert len(data_source._pending_events) != 0
+
+    # NOTE: Still missing their start at the next flush, so they're dropped.
+    data_source.flush_pending_documents()
+    assert received == []
+    assert len(data_source._pending_descriptors) == 0
+    assert len(data_source._pending_events) == 0
+    assert len(data_source._pending_stops) == 0
+
+
+def test_bluesky_run_state_pruned(test_data_path):
+    with open(test_data_path / "scan_with_rand.json") as _f:
+        documents = json.load(_f)
+
+    data_source = JSONDataSource(str(test_data_path / "scan_with_rand.json"))
+
+    closed = []
+    data_source.data_stream_closed.connect(closed.append)
+    for document_type, document in documents:
+        data_source(document_type, document)
+
+    assert len(closed) == 1
+    assert len(data_source._started_runs) == 0
+    assert len(data_source._run_descriptors) == 0
+    assert len(data_source._descriptor_runs) == 0
+    assert len(data_source._descriptor_names) == 0
+    assert len(data_source._next_seq_nums) == 0
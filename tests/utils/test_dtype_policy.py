@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from sophys_live_view.utils.dtype_policy import DtypePolicy
+
+
+@pytest.mark.parametrize(
+    "data_key,is_detector,float32_detectors,expected",
+    [
+        ({"dtype": "integer", "shape": []}, False, False, np.int64),
+        ({"dtype": "integer", "dtype_numpy": "<i4", "shape": []}, True, True, np.int32),
+        ({"dtype": "boolean", "shape": []}, False, False, np.bool_),
+        ({"dtype": "number", "shape": [], "precision": 3}, True, False, np.float64),
+        ({"dtype": "number", "shape": [], "precision": 3}, True, True, np.float32),
+        ({"dtype": "number", "shape": [], "precision": 3}, False, True, np.float64),
+        ({"dtype": "number", "shape": [], "precision": 9}, True, True, np.float64),
+        ({"dtype": "number", "shape": []}, True, True, np.float64),
+        ({"dtype": "array", "shape": [10]}, True, False, None),
+        ({"dtype": "string", "shape": []}, False, False, None),
+        (None, False, False, None),
+    ],
+)
+def test_storage_dtype(data_key, is_detector, float32_detectors, expected):
+    policy = DtypePolicy(float32_detectors=float32_detectors)
+    dtype = policy.storage_dtype(data_key, is_detector=is_detector)
+    if expected is None:
+        assert dtype is None
+    else:
+        assert dtype == np.dtype(expected)
+
+
+def test_append():
+    stored = DtypePolicy.append(None, np.array([1, 2]), np.dtype(np.int32))
+    assert stored.dtype == np.int32
+
+    stored = DtypePolicy.append(stored, np.array([3]), np.dtype(np.int32))
+    assert stored.dtype == np.int32
+    np.testing.assert_array_equal(stored, [1, 2, 3])
+
+    # NOTE: Values that don't fit promote the storage, instead of being truncated.
+    promoted = DtypePolicy.append(stored, np.array([2**40]), np.dtype(np.int32))
+    assert promoted.dtype == np.int64
+    assert promoted[-1] == 2**40
+
+    promoted = DtypePolicy.append(stored, np.array([0.5]), np.dtype(np.int32))
+    assert promoted.dtype == np.float64
+    assert promoted[-1] == 0.5
+
+    stored = DtypePolicy.append(None, np.array([0.1, 0.2]), np.dtype(np.float32))
+    assert stored.dtype == np.float32
@@ -0,0 +1,62 @@
+import json
+
+import numpy as np
+import pytest
+
+from sophys_live_view.utils.data_source_manager import DataSourceManager
+from sophys_live_view.utils.document_log import (
+    DocumentLogWriter,
+    pack_document,
+    read_records,
+)
+from sophys_live_view.utils.file_tail_data_source import FileTailDataSource
+
+
+@pytest.fixture
+def empty_manager():
+    manager = DataSourceManager()
+
+    yield manager
+
+    if manager.isRunning():
+        manager.stop()
+
+
+def test_read_partial_records():
+    first_record = pack_document("start", {"uid": "abc"})
+    second_record = pack_document("stop", {"run_start": "abc", "data": np.arange(3)})
+    buffer = first_record + second_record
+
+    payloads, offset = read_records(buffer[: len(first_record) + 2])
+    assert len(payloads) == 1
+    assert offset == len(first_record)
+
+    payloads, offset = read_records(buffer, offset)
+    assert len(payloads) == 1
+    assert offset == len(buffer)
+
+
+def test_tail_document_log(empty_manager, test_data_path, tmp_path, qtbot):
+    log_path = tmp_path / "documents.log"
+
+    with open(test_data_path / "scan_with_rand.json") as _f:
+        first_run = json.load(_f)
+    with open(test_data_path / "count_with_rand.json") as _f:
+        second_run = json.load(_f)
+
+    with DocumentLogWriter(log_path) as writer:
+        for document_type, document in first_run:
+            writer(document_type, document)
+
+        empty_manager.add_data_source(FileTailDataSource(log_path))
+        with qtbot.waitSignals([empty_manager.new_data_received] * 11, timeout=2000):
+            with qtbot.waitSignal(empty_manager.new_data_stream, timeout=1000):
+                empty_manager.start()
+
+        # NOTE: Documents appended while the log is being tailed.
+        with qtbot.waitSignal(empty_manager.data_stream_closed, timeout=2000):
+            with qtbot.waitSignals(
+                [empty_manager.new_data_received] * 50, timeout=2000
+            ):
+                for document_type, document in second_run:
+                    writer(document_type, document)
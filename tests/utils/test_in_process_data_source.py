@@ -0,0 +1,41 @@
+import json
+import threading
+
+import pytest
+
+from sophys_live_view.utils.data_source_manager import DataSourceManager
+from sophys_live_view.utils.in_process_data_source import InProcessDataSource
+
+
+@pytest.fixture
+def empty_manager():
+    manager = DataSourceManager()
+
+    yield manager
+
+    if manager.isRunning():
+        manager.stop()
+
+
+def test_receive_documents_from_other_thread(empty_manager, test_data_path, qtbot):
+    with open(test_data_path / "scan_with_rand.json") as _f:
+        documents = json.load(_f)
+
+    data_source = InProcessDataSource()
+    empty_manager.add_data_source(data_source)
+    empty_manager.start()
+
+    def run_engine():
+        for document_type, document in documents:
+            data_source(document_type, document)
+
+    with qtbot.waitSignal(empty_manager.data_stream_closed, timeout=2000):
+        with qtbot.waitSignals([empty_manager.new_data_received] * 11, timeout=2000):
+            thread = threading.Thread(target=run_engine)
+            thread.start()
+    thread.join()
+
+    # NOTE: The documents of the RunEngine are left untouched.
+    start_document = documents[0][1]
+    assert "data_keys" not in start_document
+    assert "configuration" not in start_document
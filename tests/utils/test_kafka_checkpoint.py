@@ -0,0 +1,46 @@
+from kafka import TopicPartition
+
+from sophys_live_view.utils.kafka_checkpoint import CheckpointFile, PartitionCheckpoint
+
+
+def test_save_and_load(tmp_path):
+    checkpoint_file = CheckpointFile(tmp_path / "nested" / "checkpoint.json")
+    assert checkpoint_file.load() == {}
+
+    checkpoints = {
+        TopicPartition("branch_a", 0): PartitionCheckpoint(120, 100),
+        TopicPartition("branch_a", 1): PartitionCheckpoint(15, 15),
+    }
+    checkpoint_file.save(checkpoints)
+    assert checkpoint_file.load() == checkpoints
+
+    # NOTE: No temporary files are left behind.
+    assert [p.name for p in checkpoint_file.path.parent.iterdir()] == [
+        "checkpoint.json"
+    ]
+
+
+def test_save_keeps_other_partitions(tmp_path):
+    checkpoint_file = CheckpointFile(tmp_path / "checkpoint.json")
+    checkpoint_file.save(
+        {
+            TopicPartition("branch_a", 0): PartitionCheckpoint(120, 100),
+            TopicPartition("branch_b", 0): PartitionCheckpoint(7, 2),
+        }
+    )
+    checkpoint_file.save({TopicPartition("branch_a", 0): PartitionCheckpoint(130, 100)})
+
+    assert checkpoint_file.load() == {
+        TopicPartition("branch_a", 0): PartitionCheckpoint(130, 100),
+        TopicPartition("branch_b", 0): PartitionCheckpoint(7, 2),
+    }
+
+
+def test_load_invalid_file(tmp_path):
+    checkpoint_file = CheckpointFile(tmp_path / "checkpoint.json")
+
+    checkpoint_file.path.write_text("{not json")
+    assert checkpoint_file.load() == {}
+
+    checkpoint_file.path.write_text('{"version": 1000, "partitions": {}}')
+    assert checkpoint_file.load() == {}
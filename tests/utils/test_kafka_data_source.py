@@ -0,0 +1,211 @@
+import json
+
+from kafka import TopicPartition
+
+from sophys_live_view.utils.kafka_checkpoint import CheckpointFile, PartitionCheckpoint
+from sophys_live_view.utils.kafka_data_source import KafkaDataSource
+
+
+class TopicsListing:
+    def __init__(self, topics):
+        self._topics = topics
+
+    def topics(self):
+        return set(self._topics)
+
+
+def test_resolve_topics():
+    data_source = KafkaDataSource(
+        ["branch_a", "other"], ["localhost:0"], topic_pattern=r"branch_[a-z]"
+    )
+
+    topics = data_source._resolve_topics(
+        TopicsListing(["branch_a", "branch_b", "branch_c", "branch_bc", "unrelated"])
+    )
+    assert topics == ["branch_a", "other", "branch_b", "branch_c"]
+
+
+def test_tag_runs_with_topic(test_data_path, qtbot):
+    data_source = KafkaDataSource("branch_a", ["localhost:0"])
+
+    with open(test_data_path / "scan_with_rand.json") as _f:
+        documents = json.load(_f)
+
+    with qtbot.waitSignal(data_source.new_data_stream, timeout=1000) as blocker:
+        for document_type, document in documents[:2]:
+            data_source._handle_message(
+                TopicPartition("branch_b", 0), 0, (document_type, document)
+            )
+
+    assert blocker.args[-1]["topic"] == "branch_b"
+
+
+def test_aggregated_progress(test_data_path, qtbot):
+    data_source = KafkaDataSource(["branch_a"], ["localhost:0"])
+
+    first_partition = TopicPartition("branch_a", 0)
+    second_partition = TopicPartition("branch_a", 1)
+    data_source._start_offsets = {first_partition: 10, second_partition: 0}
+    data_source._end_offsets = {first_partition: 14, second_partition: 4}
+    data_source._start_preloading()
+
+    with open(test_data_path / "count_with_rand.json") as _f:
+        documents = json.load(_f)
+    start_document = documents[0][1]
+    events = [d for t, d in documents if t == "event"]
+
+    progress = []
+    data_source.loading_status.connect(lambda _, percent: progress.append(percent))
+    auto_update = []
+    data_source.go_to_last_automatically.connect(auto_update.append)
+
+    messages = [
+        (first_partition, 10, ("start", start_document)),
+        (second_partition, 0, ("event", events[0])),
+        (second_partition, 1, ("event", events[1])),
+        (first_partition, 11, ("event", events[2])),
+        (first_partition, 12, ("event", events[3])),
+        (first_partition, 13, ("event", events[4])),
+        (second_partition, 2, ("event", events[5])),
+        (second_partition, 3, ("event", events[6])),
+    ]
+    for partition, offset, value in messages:
+        data_source._handle_message(partition, offset, value)
+
+    assert progress == [12.5, 25, 37.5, 50, 62.5, 75, 87.5, 100]
+    assert auto_update == [False] * 7 + [True]
+
+
+def test_checkpoint_oldest_run(test_data_path, tmp_path, qtbot):
+    checkpoint_path = tmp_path / "checkpoint.json"
+    data_source = KafkaDataSource(
+        ["branch_a"], ["localhost:0"], checkpoint_path=checkpoint_path
+    )
+
+    first_partition = TopicPartition("branch_a", 0)
+    second_partition = TopicPartition("branch_a", 1)
+    data_source._start_offsets = {first_partition: 10, second_partition: 0}
+    data_source._end_offsets = {first_partition: 20, second_partition: 20}
+    data_source._start_preloading()
+
+    with open(test_data_path / "count_with_rand.json") as _f:
+        documents = json.load(_f)
+    (_, start_document), (_, descriptor_document) = documents[:2]
+    events = [d for t, d in documents if t == "event"]
+
+    # NOTE: An event of a run started before this session, which isn't displayed.
+    orphan_event = dict(events[0], descriptor="unknown", seq_num=1)
+
+    messages = [
+        (first_partition, 10, ("event", orphan_event)),
+        (first_partition, 11, ("start", start_document)),
+        (second_partition, 3, ("descriptor", descriptor_document)),
+        (second_partition, 4, ("event", events[0])),
+        (first_partition, 12, ("event", events[1])),
+    ]
+    for partition, offset, value in messages:
+        data_source._handle_message(partition, offset, value)
+
+    data_source._save_checkpoint()
+
+    checkpoints = CheckpointFile(checkpoint_path).load()
+    assert checkpoints == {
+        first_partition: PartitionCheckpoint(13, 11),
+        second_partition: PartitionCheckpoint(5, 3),
+    }
+
+
+class CheckpointConsumer:
+    def __init__(self):
+        self.seeks = dict()
+
+    def beginning_offsets(self, partitions):
+        return {partition: 0 for partition in partitions}
+
+    def seek(self, partition, offset):
+        self.seeks[partition] = offset
+
+
+def test_checkpoint_completed_run(test_data_path, tmp_path, qtbot):
+    checkpoint_path = tmp_path / "checkpoint.json"
+    data_source = KafkaDataSource(
+        ["branch_a"], ["localhost:0"], checkpoint_path=checkpoint_path
+    )
+
+    partition = TopicPartition("branch_a", 0)
+    data_source._start_offsets = {partition: 100}
+    data_source._end_offsets = {partition: 200}
+    data_source._start_preloading()
+
+    with open(test_data_path / "count_with_rand.json") as _f:
+        documents = json.load(_f)
+    orphan_event = dict(documents[2][1], descriptor="unknown", seq_num=1)
+
+    with qtbot.waitSignal(data_source.data_stream_closed, timeout=1000):
+        for offset, value in enumerate(documents, start=100):
+            data_source._handle_message(partition, offset, value)
+    data_source._handle_message(partition, 153, ("event", orphan_event))
+    data_source.flush_pending_documents(discard_orphans=True)
+
+    # NOTE: The run stopped, but it's still displayed, so resuming repopulates it.
+    data_source._save_checkpoint()
+    assert CheckpointFile(checkpoint_path).load() == {
+        partition: PartitionCheckpoint(154, 100)
+    }
+    assert data_source._first_run_offsets[partition] == {}
+    assert data_source._descriptor_starts == {}
+
+    resumed_data_source = KafkaDataSource(
+        ["branch_a"], ["localhost:0"], checkpoint_path=checkpoint_path, resume=True
+    )
+    resumed_data_source._end_offsets = {partition: 200}
+    consumer = CheckpointConsumer()
+    resumed_data_source._seek_to_checkpoints(consumer, [partition])
+    assert consumer.seeks == {partition: 100}
+
+
+class IdleConsumer:
+    def __init__(self, data_source, polls: int):
+        self._data_source = data_source
+        self._polls = polls
+
+    def __call__(self, **_):
+        return self
+
+    def partitions_for_topic(self, topic):
+        return {0}
+
+    def assign(self, partitions):
+        pass
+
+    def end_offsets(self, partitions):
+        return {partition: 0 for partition in partitions}
+
+    def poll(self, timeout_ms):
+        self._polls -= 1
+        if self._polls == 0:
+            self._data_source.close_thread()
+        return {}
+
+
+def test_idle_flush_interval(tmp_path, monkeypatch):
+    data_source = KafkaDataSource(
+        ["branch_a"], ["localhost:0"], checkpoint_path=tmp_path / "checkpoint.json"
+    )
+    data_source.FLUSH_INTERVAL = 60.0
+    monkeypatch.setattr("kafka.KafkaConsumer", IdleConsumer(data_source, polls=10))
+
+    flushes = []
+    monkeypatch.setattr(
+        data_source, "flush_pending_documents", lambda: flushes.append(True)
+    )
+    saves = []
+    monkeypatch.setattr(
+        CheckpointFile, "save", lambda self, checkpoints: saves.append(checkpoints)
+    )
+
+    data_source.run()
+
+    # NOTE: An idle consumer flushes and checkpoints once per interval, not per poll.
+    assert len(flushes) == 1
+    assert len(saves) == 1
@@ -0,0 +1,52 @@
+import msgpack_numpy as msgpack
+import numpy as np
+
+from sophys_live_view.utils.parallel_decoding import (
+    OrderedDecoder,
+    SharedArray,
+    attach_shared_arrays,
+    decode_message,
+)
+
+
+def _event_message(seq_num: int, size: int) -> bytes:
+    return msgpack.packb(
+        ("event", {"seq_num": seq_num, "data": {"image": np.full(size, seq_num)}})
+    )
+
+
+def test_shared_memory_round_trip():
+    decoded = decode_message(_event_message(3, 100_000), shared_memory_threshold=1024)
+    assert isinstance(decoded[1]["data"]["image"], SharedArray)
+
+    document_type, document = attach_shared_arrays(decoded)
+    assert document_type == "event"
+    np.testing.assert_array_equal(document["data"]["image"], np.full(100_000, 3))
+
+    # NOTE: Small arrays are passed as they are.
+    decoded = decode_message(_event_message(3, 10), shared_memory_threshold=1024)
+    assert isinstance(decoded[1]["data"]["image"], np.ndarray)
+
+
+def test_ordered_decoder():
+    decoder = OrderedDecoder(2)
+    try:
+        for seq_num in range(1, 21):
+            partition = seq_num % 2
+            decoder.submit(
+                partition, (partition, seq_num), _event_message(seq_num, 20_000)
+            )
+
+        results = list(decoder.ready(wait=True))
+    finally:
+        decoder.close()
+
+    assert len(decoder) == 0
+    assert len(results) == 20
+    for partition in (0, 1):
+        seq_nums = [s for (p, s), _ in results if p == partition]
+        assert seq_nums == sorted(seq_nums)
+
+    for (_, seq_num), (_, document) in results:
+        assert document["seq_num"] == seq_num
+        assert document["data"]["image"][0] == seq_num
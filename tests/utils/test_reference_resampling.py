@@ -0,0 +1,41 @@
+import numpy as np
+
+from sophys_live_view.utils.reference_resampling import ResampledReferenceCache
+
+
+def test_resample_reference():
+    cache = ResampledReferenceCache()
+
+    reference_x = np.array([4.0, 3.0, 2.0, 1.0, 0.0])
+    reference_y = reference_x**2
+    x = np.array([-1.0, 0.5, 1.5, 3.5, 5.0])
+
+    values = cache.resample("ref", 0, reference_x, reference_y, "target", 0, x)
+    np.testing.assert_allclose(values, [np.nan, 0.5, 2.5, 12.5, np.nan])
+
+    # NOTE: Unchanged versions reuse the cached values.
+    assert cache.resample("ref", 0, reference_x, reference_y, "target", 0, x) is values
+
+    new_reference_y = reference_x**3
+    values = cache.resample("ref", 1, reference_x, new_reference_y, "target", 0, x)
+    np.testing.assert_allclose(
+        values,
+        np.interp(x, [0, 1, 2, 3, 4], [0, 1, 8, 27, 64], left=np.nan, right=np.nan),
+    )
+
+
+def test_resample_reference_incremental():
+    rng = np.random.default_rng(0)
+    cache = ResampledReferenceCache()
+
+    reference_x = np.linspace(0, 10, 50)
+    reference_y = np.sin(reference_x)
+    x = np.sort(rng.uniform(0, 10, 200))
+
+    for version, length in enumerate((10, 11, 50, 200)):
+        values = cache.resample(
+            "ref", 0, reference_x, reference_y, "target", version, x[:length]
+        )
+        np.testing.assert_allclose(
+            values, np.interp(x[:length], reference_x, reference_y)
+        )
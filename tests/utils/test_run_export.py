@@ -0,0 +1,86 @@
+import csv
+import json
+
+import h5py
+import numpy as np
+import pytest
+
+from sophys_live_view.utils.run_export import RunExporter, flatten_metadata
+from sophys_live_view.utils.session_snapshot import RunSnapshot
+
+
+@pytest.fixture
+def runs():
+    return [
+        RunSnapshot(
+            subuid=f"run{index}",
+            display_name=f"Run {index}",
+            signals={"motor", "det", "waveform"},
+            signals_name_map={"motor": "Motor"},
+            detectors={"det"},
+            motors=["motor"],
+            metadata={"uid": f"run{index}", "plan": {"name": "scan", "args": [1, 2]}},
+            columns={
+                "motor": np.arange(10, dtype=float) + index,
+                "det": np.arange(10) * 2,
+                "waveform": np.ones((10, 4)),
+            },
+        )
+        for index in range(2)
+    ]
+
+
+def _export(runs, file_path, qtbot) -> list[float]:
+    exporter = RunExporter(runs, file_path)
+    exporter.CHUNK_ROWS = 3
+
+    progress = []
+    exporter.loading_status.connect(lambda _, percentage: progress.append(percentage))
+    with qtbot.waitSignal(exporter.finished, timeout=2000):
+        exporter.start()
+    qtbot.waitUntil(lambda: len(progress) != 0 and progress[-1] == 100.0)
+
+    assert progress == sorted(progress)
+    return progress
+
+
+def test_flatten_metadata():
+    assert flatten_metadata(
+        {"plan": {"name": "scan", "args": [1, 2]}, "shape": np.array([2, 3])}
+    ) == {"plan.name": "scan", "plan.args": "[1, 2]", "shape": "[2, 3]"}
+
+
+def test_export_csv(runs, tmp_path, qtbot):
+    runs[1].metadata["comment"] = "first line\nsecond line"
+
+    progress = _export(runs, tmp_path / "export.csv", qtbot)
+    assert len(progress) > 2
+
+    with open(tmp_path / "export_1.csv") as _f:
+        lines = _f.read().splitlines()
+    assert "# plan.name = scan" in lines
+    assert '# comment = "first line\\nsecond line"' in lines
+    assert "# Signals left out: waveform" in lines
+
+    rows = list(csv.reader(line for line in lines if not line.startswith("#")))
+    assert rows[0] == ["det", "Motor"]
+    assert rows[1:] == [[str(i * 2), str(i + 1.0)] for i in range(10)]
+
+
+def test_export_npz(runs, tmp_path, qtbot):
+    _export(runs, tmp_path / "export.npz", qtbot)
+
+    with np.load(tmp_path / "export.npz") as exported:
+        np.testing.assert_array_equal(exported["run_1/motor"], np.arange(10) + 1.0)
+        np.testing.assert_array_equal(exported["run_0/waveform"], np.ones((10, 4)))
+        assert json.loads(str(exported["run_0/metadata"]))["plan.name"] == "scan"
+
+
+def test_export_hdf5(runs, tmp_path, qtbot):
+    _export(runs, tmp_path / "export.h5", qtbot)
+
+    with h5py.File(tmp_path / "export.h5") as exported:
+        np.testing.assert_array_equal(exported["run_1/det"], np.arange(10) * 2)
+        np.testing.assert_array_equal(exported["run_0/waveform"], np.ones((10, 4)))
+        assert exported["run_0"].attrs["display_name"] == "Run 0"
+        assert exported["run_0"].attrs["plan.args"] == "[1, 2]"
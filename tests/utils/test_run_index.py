@@ -0,0 +1,80 @@
+import pytest
+
+from sophys_live_view.utils.run_index import RunIndex
+
+
+@pytest.fixture
+def run_index():
+    index = RunIndex()
+    index.add_run(
+        0,
+        "scan 1200 (grid_scan)",
+        {"pilatus_roi1", "motor_x", "motor_y"},
+        {
+            "plan_name": "grid_scan",
+            "scan_id": 1200,
+            "detectors": ["pilatus"],
+            "sample": "Silicon",
+            "hints": {"dimensions": []},
+        },
+    )
+    index.add_run(
+        1,
+        "scan 1201 (scan)",
+        {"pilatus_roi1", "motor_x"},
+        {"plan_name": "scan", "scan_id": 1201, "detectors": ["pilatus"]},
+    )
+    index.add_run(
+        2,
+        "scan 1202 (grid_scan)",
+        {"det", "motor_x", "motor_y"},
+        {"plan_name": "grid_scan", "scan_id": 1202, "detectors": ["det"]},
+    )
+    return index
+
+
+@pytest.mark.parametrize(
+    "query,expected",
+    [
+        ("", None),
+        ("plan:grid_scan", {0, 2}),
+        ("plan:grid", {0, 2}),
+        ("plan=grid", set()),
+        ("det:pilatus", {0, 1}),
+        ("plan:grid_scan det:pilatus", {0}),
+        ("scan_id>1200", {1, 2}),
+        ("scan_id>=1200 scan_id<1202", {0, 1}),
+        ("scan_id=1201", {1}),
+        ("signal:motor_y", {0, 2}),
+        ("SAMPLE:sil", {0}),
+        ("silicon", {0}),
+        ("hints:dimensions", set()),
+        ("unknown_key:abc", set()),
+    ],
+)
+def test_run_index_query(run_index, query, expected):
+    assert run_index.query(query) == expected
+
+    if expected is not None:
+        terms = run_index.parse_query(query)
+        assert {
+            row for row in range(3) if run_index.row_matches(terms, row)
+        } == expected
+
+
+def test_run_index_remove(run_index):
+    run_index.remove_run(0)
+
+    assert len(run_index) == 2
+    assert run_index.query("plan:grid_scan") == {2}
+    assert run_index.query("scan_id<1201") == set()
+    assert run_index.query("sample:silicon") == set()
+
+
+def test_run_index_update(run_index):
+    run_index.add_run(
+        2, "scan 1202 (scan)", {"det"}, {"plan_name": "scan", "scan_id": 5}
+    )
+
+    assert run_index.query("plan:grid_scan") == {0}
+    assert run_index.query("scan_id<1000") == {2}
@@ -0,0 +1,84 @@
+import numpy as np
+
+from sophys_live_view.utils.session_snapshot import (
+    RunSnapshot,
+    load_session_snapshot,
+    save_session_snapshot,
+)
+
+
+def _run_snapshot(subuid: str, **kwargs) -> RunSnapshot:
+    return RunSnapshot(
+        subuid=subuid,
+        display_name=f"Run {subuid}",
+        signals={"motor", "det"},
+        signals_name_map={"motor": "Motor"},
+        detectors={"det"},
+        motors=["motor"],
+        metadata={"uid": subuid, "shape": [2, 2]},
+        columns={
+            "motor": np.array([0.5, 1.0, 1.5]),
+            "det": np.array([[1, 2], [3, 0]], dtype=np.int32),
+        },
+        validity_masks={"det": np.array([[True, True], [True, False]])},
+        **kwargs,
+    )
+
+
+def test_save_and_load_snapshot(tmp_path):
+    snapshot_path = tmp_path / "session"
+    save_session_snapshot(
+        snapshot_path,
+        [_run_snapshot("a", bookmarked=True, axes={"1d_x": "motor", "1d_y": ["det"]})],
+    )
+
+    (run,) = load_session_snapshot(snapshot_path)
+    assert run.subuid == "a"
+    assert run.signals == {"motor", "det"}
+    assert run.detectors == {"det"}
+    assert run.metadata == {"uid": "a", "shape": [2, 2]}
+    assert run.bookmarked
+    assert run.axes == {"1d_x": "motor", "1d_y": ["det"]}
+
+    assert isinstance(run.columns["det"], np.memmap)
+    assert run.columns["det"].dtype == np.int32
+    np.testing.assert_array_equal(run.columns["motor"], [0.5, 1.0, 1.5])
+    np.testing.assert_array_equal(
+        run.validity_masks["det"], [[True, True], [True, False]]
+    )
+
+    # NOTE: Saving again replaces the previous snapshot, even with its arrays mapped.
+    save_session_snapshot(snapshot_path, [_run_snapshot("b")])
+    assert [run.subuid for run in load_session_snapshot(snapshot_path)] == ["b"]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["session"]
+
+
+def test_snapshot_skips_unserializable_runs(tmp_path):
+    unserializable = _run_snapshot("a")
+    unserializable.metadata["object"] = object()
+
+    save_session_snapshot(tmp_path, [unserializable, _run_snapshot("b")])
+
+    assert [run.subuid for run in load_session_snapshot(tmp_path)] == ["b"]
+
+
+def test_load_missing_snapshot(tmp_path):
+    assert load_session_snapshot(tmp_path / "missing") == []
+
+    (tmp_path / "session.msgpack").write_bytes(b"invalid")
+    assert load_session_snapshot(tmp_path) == []
+
+
+def test_snapshot_saves_custom_signal_expressions(tmp_path):
+    run = _run_snapshot("a", custom_signals={"double": "motor * 2"})
+    run.signals.add("double")
+    run.signals_name_map["double"] = "double (custom)"
+    run.columns["double"] = np.array([1.0, 2.0, 3.0])
+
+    save_session_snapshot(tmp_path, [run])
+
+    (run,) = load_session_snapshot(tmp_path)
+    assert run.custom_signals == {"double": "motor * 2"}
+    assert run.signals == {"motor", "det"}
+    assert "double" not in run.columns
+    assert "double" not in run.signals_name_map
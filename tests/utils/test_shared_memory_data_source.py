@@ -0,0 +1,73 @@
+import json
+import uuid
+
+import numpy as np
+import pytest
+
+from sophys_live_view.utils.data_source_manager import DataSourceManager
+from sophys_live_view.utils.shared_memory_data_source import SharedMemoryDataSource
+from sophys_live_view.utils.shared_memory_ring import (
+    SharedMemoryRingReader,
+    SharedMemoryRingWriter,
+)
+
+
+@pytest.fixture
+def empty_manager():
+    manager = DataSourceManager()
+
+    yield manager
+
+    if manager.isRunning():
+        manager.stop()
+
+
+def test_read_from_shared_memory(empty_manager, test_data_path, qtbot):
+    name = f"test_ring_{uuid.uuid4().hex[:8]}"
+
+    with open(test_data_path / "scan_with_rand.json") as _f:
+        documents = json.load(_f)
+
+    received = list()
+    empty_manager.new_data_received.connect(
+        lambda uid, subuid, data, metadata: received.append(data)
+    )
+
+    empty_manager.add_data_source(SharedMemoryDataSource(name))
+    empty_manager.start()
+
+    with SharedMemoryRingWriter(name, capacity=64 * 1024) as writer:
+        with qtbot.waitSignal(empty_manager.data_stream_closed, timeout=2000):
+            for document_type, document in documents:
+                if document_type == "event":
+                    document = dict(document)
+                    document["data"] = dict(document["data"], waveform=np.arange(10))
+                writer(document_type, document)
+
+    assert [int(data["seq_num"][0]) for data in received] == list(range(1, 12))
+    np.testing.assert_array_equal(received[0]["waveform"], [np.arange(10)])
+
+
+def test_held_events_release_ring_space(test_data_path):
+    with open(test_data_path / "scan_with_rand.json") as _f:
+        documents = json.load(_f)
+
+    data_source = SharedMemoryDataSource("unused")
+    with SharedMemoryRingWriter(f"test_ring_{uuid.uuid4().hex[:8]}") as writer:
+        reader = SharedMemoryRingReader(writer.name)
+
+        # NOTE: Events after the missing first one are held by the data source.
+        for document_type, document in documents:
+            if document_type == "event":
+                if document["seq_num"] == 1:
+                    continue
+                document = dict(document)
+                document["data"] = dict(document["data"], waveform=np.arange(10))
+            if document_type != "stop":
+                writer(document_type, document)
+        data_source._route_new_documents(reader)
+
+        assert len(data_source._out_of_order_events) != 0
+        assert reader.pending_records == 0
+
+        reader.close()
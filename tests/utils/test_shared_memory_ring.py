@@ -0,0 +1,110 @@
+import gc
+import uuid
+
+import numpy as np
+import pytest
+
+from sophys_live_view.utils.shared_memory_ring import (
+    SharedMemoryRingReader,
+    SharedMemoryRingWriter,
+)
+
+
+@pytest.fixture
+def ring():
+    writer = SharedMemoryRingWriter(
+        f"test_ring_{uuid.uuid4().hex[:8]}", capacity=4096, timeout=0.05
+    )
+    reader = SharedMemoryRingReader(writer.name)
+
+    yield writer, reader
+
+    reader.close()
+    writer.close()
+
+
+def test_event_arrays_are_views(ring):
+    writer, reader = ring
+
+    writer("start", {"uid": "abc", "positions": np.arange(3)})
+    writer("event", {"seq_num": 1, "data": {"det": np.arange(100.0), "mot": 1.5}})
+
+    (_, start), (_, event) = reader.read()
+    np.testing.assert_array_equal(start["positions"], np.arange(3))
+    np.testing.assert_array_equal(event["data"]["det"], np.arange(100.0))
+    assert event["data"]["mot"] == 1.5
+
+    # NOTE: Arrays of other documents are copied, so only the event holds space.
+    assert start["positions"].flags.owndata
+    assert not event["data"]["det"].flags.owndata
+    assert not event["data"]["det"].flags.writeable
+    assert reader.pending_records == 1
+
+    detector_row = np.expand_dims(event["data"]["det"], 0)
+    del event
+    gc.collect()
+    assert reader.pending_records == 1
+
+    del detector_row
+    assert reader.pending_records == 0
+
+
+def test_wrap_around(ring):
+    writer, reader = ring
+
+    for seq_num in range(1, 100):
+        writer("event", {"seq_num": seq_num, "data": {"det": np.full(50, seq_num)}})
+        ((_, event),) = reader.read()
+        assert event["seq_num"] == seq_num
+        np.testing.assert_array_equal(event["data"]["det"], np.full(50, seq_num))
+
+
+def test_full_ring(ring, caplog):
+    writer, reader = ring
+
+    # NOTE: Documents that don't fit are dropped, instead of raising from the writer.
+    held_documents = list()
+    for seq_num in range(1, 20):
+        writer("event", {"seq_num": seq_num, "data": {"det": np.zeros(50)}})
+        held_documents.extend(reader.read())
+    assert 0 < len(held_documents) < 19
+    assert "didn't release space" in caplog.text
+
+    # NOTE: Releasing the documents makes space for new ones.
+    held_documents.clear()
+    reader.read()
+    writer("event", {"seq_num": 100, "data": {"det": np.zeros(50)}})
+    assert len(reader.read()) == 1
+
+    writer("event", {"seq_num": 101, "data": {"det": np.zeros(1000)}})
+    assert len(reader.read()) == 0
+    assert "doesn't fit" in caplog.text
+
+
+def test_close_with_referenced_arrays():
+    writer = SharedMemoryRingWriter(f"test_ring_{uuid.uuid4().hex[:8]}", capacity=4096)
+    reader = SharedMemoryRingReader(writer.name)
+
+    writer("event", {"seq_num": 1, "data": {"det": np.arange(10.0)}})
+    ((_, event),) = reader.read()
+
+    # NOTE: Detaching is deferred until the arrays handed out are gone.
+    reader.close()
+    np.testing.assert_array_equal(event["data"]["det"], np.arange(10.0))
+    assert reader._shared_memory.buf is not None
+
+    del event
+    gc.collect()
+    assert reader._shared_memory.buf is None
+
+    writer.close()
+
+
+def test_closed_ring(ring):
+    writer, reader = ring
+    assert not reader.closed
+
+    writer("stop", {"run_start": "abc"})
+    writer.close()
+    assert reader.closed
+    assert len(reader.read()) == 1
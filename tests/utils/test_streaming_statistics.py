@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from sophys_live_view.utils.streaming_statistics import StreamingStatistics
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 50])
+def test_streaming_statistics(batch_size):
+    rng = np.random.default_rng(0)
+    x = np.linspace(-5, 5, 200)
+    y = np.exp(-((x - 1) ** 2)) + rng.normal(0, 0.01, 200)
+    y[17] = np.nan
+
+    statistics = StreamingStatistics()
+    for start in range(0, len(y), batch_size):
+        statistics.update(y[start : start + batch_size], x[start : start + batch_size])
+
+    valid = ~np.isnan(y)
+    assert statistics.count == np.count_nonzero(valid)
+    assert statistics.min == pytest.approx(np.nanmin(y))
+    assert statistics.argmin == np.nanargmin(y)
+    assert statistics.max == pytest.approx(np.nanmax(y))
+    assert statistics.argmax == np.nanargmax(y)
+    assert statistics.mean == pytest.approx(np.nanmean(y))
+    assert statistics.std == pytest.approx(np.nanstd(y))
+    assert statistics.sum == pytest.approx(np.nansum(y))
+    assert statistics.center_of_mass == pytest.approx(
+        np.sum(x[valid] * y[valid]) / np.sum(y[valid])
+    )
+
+
+def test_streaming_statistics_empty():
+    statistics = StreamingStatistics()
+    statistics.update([np.nan])
+
+    assert statistics.count == 0
+    assert np.isnan(statistics.mean)
+    assert np.isnan(statistics.center_of_mass)
+    assert statistics.argmax == -1
+
+
+def test_streaming_statistics_supports():
+    assert StreamingStatistics.supports(np.array([1, 2]))
+    assert StreamingStatistics.supports(np.array([True]))
+    assert not StreamingStatistics.supports(np.array(["abc"]))
+    assert not StreamingStatistics.supports(np.zeros((1, 10)))
@@ -0,0 +1,78 @@
+import numpy as np
+
+from sophys_live_view.utils.waterfall import WaterfallImage
+
+
+def _curves(count: int, calls: list, versions: dict | None = None):
+    x = np.linspace(0, 1, 50)
+    versions = versions or {}
+
+    def get_data(index):
+        calls.append(index)
+        return x, x * index
+
+    return [
+        (index, versions.get(index, 0), lambda index=index: get_data(index))
+        for index in range(count)
+    ]
+
+
+def test_waterfall_incremental():
+    calls = []
+    waterfall = WaterfallImage(columns=16)
+    waterfall.update(_curves(3, calls))
+    assert calls == [0, 1, 2]
+    assert waterfall.image().shape == (3, 16)
+
+    # NOTE: Only the new curve, and the one whose version changed, are resampled.
+    calls.clear()
+    waterfall.update(_curves(4, calls, versions={1: 1}))
+    assert sorted(calls) == [1, 3]
+    assert waterfall.keys == [0, 1, 2, 3]
+
+    full = WaterfallImage(columns=16)
+    full.update(_curves(4, []))
+    np.testing.assert_array_equal(waterfall.image(), full.image())
+
+    # NOTE: Rows follow the order of the curves.
+    calls.clear()
+    waterfall.update(list(reversed(_curves(4, calls, versions={1: 1}))))
+    assert calls == []
+    np.testing.assert_array_equal(waterfall.image(), full.image()[::-1])
+
+
+def test_waterfall_resampling():
+    waterfall = WaterfallImage(columns=4)
+    waterfall.update(
+        [
+            ("a", 0, lambda: (np.array([0.0, 2.0, 1.0]), np.array([0.0, 2.0, 1.0]))),
+            ("b", 0, lambda: (np.array([0.5, 1.0]), np.array([5.0, 5.0]))),
+        ]
+    )
+
+    x_min, x_max = waterfall.x_limits
+    assert x_min < 0 and x_max > 2
+    grid = waterfall.origin[0] + waterfall.scale[0] * (np.arange(4) + 0.5)
+
+    image = waterfall.image()
+    np.testing.assert_allclose(
+        image[0], np.where((grid >= 0) & (grid <= 2), grid, np.nan)
+    )
+    assert np.isnan(image[1][(grid < 0.5) | (grid > 1)]).all()
+
+    # NOTE: Curves without data (e.g. a run without the signal) are empty rows.
+    waterfall.update(
+        [("a", 0, None), ("b", 0, None), ("c", 0, lambda: (np.array(None), None))]
+    )
+    assert np.isnan(waterfall.image()[2]).all()
+
+
+def test_waterfall_density():
+    waterfall = WaterfallImage(columns=8)
+    waterfall.update(_curves(5, []))
+
+    density, y_origin, y_scale = waterfall.density(rows=10)
+    assert density.shape == (10, 8)
+    assert density.sum() == np.isfinite(waterfall.image()).sum()
+    assert y_origin == np.nanmin(waterfall.image())
+    assert y_origin + y_scale * 10 == np.nanmax(waterfall.image())
@@ -0,0 +1,44 @@
+import json
+
+from sophys_live_view.embedded import subscribe
+
+
+class RunEngine:
+    """Stand-in for the subscription API of a RunEngine."""
+
+    def __init__(self):
+        self.callbacks = dict()
+
+    def subscribe(self, callback):
+        token = len(self.callbacks)
+        self.callbacks[token] = callback
+        return token
+
+    def unsubscribe(self, token):
+        del self.callbacks[token]
+
+    def emit(self, name, document):
+        for callback in list(self.callbacks.values()):
+            callback(name, document)
+
+
+def test_subscribe(test_data_path, qtbot):
+    run_engine = RunEngine()
+    live_view = subscribe(run_engine)
+    qtbot.addWidget(live_view)
+
+    with open(test_data_path / "scan_with_rand.json") as _f:
+        documents = json.load(_f)
+
+    with qtbot.waitSignal(
+        live_view.data_source_manager.data_stream_closed, timeout=2000
+    ):
+        for document_type, document in documents:
+            run_engine.emit(document_type, document)
+
+    qtbot.waitUntil(
+        lambda: live_view.run_selector._run_list_model.rowCount() == 1, timeout=2000
+    )
+
+    live_view.close()
+    qtbot.waitUntil(lambda: len(run_engine.callbacks) == 0, timeout=2000)
@@ -0,0 +1,102 @@
+from sophys_live_view.utils.json_data_source import JSONDataSource
+from sophys_live_view.utils.session_snapshot import load_session_snapshot
+from sophys_live_view.widgets.main_window import SophysLiveView
+from sophys_live_view.widgets.run_selector import RunListModel
+
+
+def test_session_snapshot_warm_restart(test_data_path, tmp_path, qtbot):
+    snapshot_path = tmp_path / "session"
+
+    live_view = SophysLiveView(
+        [JSONDataSource(str(test_data_path / "scan_with_det.json"))],
+        session_snapshot_path=snapshot_path,
+    )
+    qtbot.addWidget(live_view)
+
+    model = live_view.run_selector._run_list_model
+    qtbot.waitUntil(lambda: model.rowCount() == 1, timeout=2000)
+    qtbot.waitUntil(
+        lambda: not model.data(model.index(0), RunListModel.LOADING_ROLE),
+        timeout=2000,
+    )
+    subuid = model.data(model.index(0), RunListModel.SUBUID_ROLE)
+    model.setData(model.index(0), True, RunListModel.BOOKMARK_ROLE)
+    live_view.plot_display.set_run_axes(subuid, {"1d_x": "motor", "1d_y": ["det"]})
+    live_view.signal_selector.add_custom_signals(subuid, {"double": "det * 2"})
+    data = live_view.plot_display._data_aggregator.get_data(subuid, "det")
+
+    live_view.close()
+    assert (snapshot_path / "session.msgpack").exists()
+
+    # NOTE: The same run received again from the file is ignored.
+    restored_view = SophysLiveView(
+        [JSONDataSource(str(test_data_path / "scan_with_det.json"))],
+        session_snapshot_path=snapshot_path,
+    )
+    qtbot.addWidget(restored_view)
+
+    model = restored_view.run_selector._run_list_model
+    qtbot.waitUntil(
+        lambda: (
+            model.rowCount() == 1
+            and model.data(model.index(0), RunListModel.BOOKMARK_ROLE)
+        ),
+        timeout=2000,
+    )
+    qtbot.wait(200)
+    assert model.rowCount() == 1
+
+    plot_display = restored_view.plot_display
+    assert plot_display._1d_x_axis_names[subuid] == "motor"
+    assert plot_display._1d_y_axis_names[subuid] == {"det"}
+    assert (plot_display._data_aggregator.get_data(subuid, "det") == data).all()
+
+    # NOTE: Custom signals are computed again from their expressions.
+    qtbot.waitUntil(
+        lambda: plot_display._data_aggregator.get_data(subuid, "double") is not None,
+        timeout=2000,
+    )
+    assert plot_display._data_aggregator._custom_signals_map[subuid] == {
+        "double": "det * 2"
+    }
+    assert (plot_display._data_aggregator.get_data(subuid, "double") == data * 2).all()
+    assert "double" in restored_view.signal_selector._signals[subuid]
+
+    restored_view.close()
+
+
+def test_session_snapshot_max_runs(test_data_path, tmp_path, qtbot):
+    snapshot_path = tmp_path / "session"
+
+    live_view = SophysLiveView(
+        [
+            JSONDataSource(str(test_data_path / "scan_with_det.json")),
+            JSONDataSource(str(test_data_path / "scan_with_rand.json")),
+            JSONDataSource(str(test_data_path / "count_with_rand.json")),
+        ],
+        session_snapshot_path=snapshot_path,
+        session_snapshot_max_runs=1,
+    )
+    qtbot.addWidget(live_view)
+
+    model = live_view.run_selector._run_list_model
+    qtbot.waitUntil(
+        lambda: (
+            model.rowCount() == 3
+            and not any(
+                model.data(model.index(row), RunListModel.LOADING_ROLE)
+                for row in range(3)
+            )
+        ),
+        timeout=2000,
+    )
+    subuids = [
+        model.data(model.index(row), RunListModel.SUBUID_ROLE) for row in range(3)
+    ]
+    model.setData(model.index(0), True, RunListModel.BOOKMARK_ROLE)
+
+    live_view.close()
+
+    # NOTE: Only the last run is kept, besides the bookmarked ones.
+    restored = [run.subuid for run in load_session_snapshot(snapshot_path)]
+    assert restored == [subuids[0], subuids[2]]
@@ -1,8 +1,17 @@
+import threading
+
+import numpy as np
 import pytest
 from silx.gui.plot import Plot1D
 from silx.gui.plot.actions import PlotAction
 
-from sophys_live_view.widgets.plot_actions import DerivativeAction
+from sophys_live_view.widgets.plot_actions import (
+    DerivativeAction,
+    PeakAnalysisAction,
+    analyze_peak,
+    compute_derivative,
+    extend_derivative,
+)
 
 
 @pytest.fixture
@@ -48,3 +57,177 @@ def test_derivative_dynamic(derivative_action: PlotAction, base_1d_plot: Plot1D,
 
     base_1d_plot.addCurve([6, 7, 8], [36, 49, 64], legend="square")
     qtbot.waitUntil(lambda: len(base_1d_plot.getAllCurves()) == 2, timeout=1000)
+
+
+@pytest.mark.parametrize("smoothing_window", [0, 5, 11])
+def test_derivative_incremental(smoothing_window):
+    rng = np.random.default_rng(0)
+    x = np.cumsum(rng.uniform(0.5, 1.5, 200))
+    y = np.sin(x / 10) + rng.normal(0, 0.05, 200)
+
+    derivative = compute_derivative(x[:50], y[:50], smoothing_window)
+    for length in (51, 53, 60, 120, 200):
+        derivative = extend_derivative(
+            x[:length], y[:length], derivative, smoothing_window
+        )
+        np.testing.assert_allclose(
+            derivative, compute_derivative(x[:length], y[:length], smoothing_window)
+        )
+
+
+def test_derivative_data_versions(
+    derivative_action: PlotAction, base_1d_plot: Plot1D, qtbot
+):
+    x = np.arange(20, dtype=float)
+
+    def add_curve(y, version, generation):
+        base_1d_plot.addCurve(
+            x[: len(y)],
+            y,
+            legend="curve",
+            info={"data_version": version, "data_generation": generation},
+        )
+
+    def derivative():
+        return base_1d_plot.getCurve("Derivative of curve").getYData()
+
+    add_curve(x[:10] ** 2, 1, 1)
+    derivative_action.trigger()
+    qtbot.waitUntil(lambda: len(base_1d_plot.getAllCurves()) == 2, timeout=1000)
+
+    # NOTE: Appended points, with the same generation, extend the derivative.
+    add_curve(x**2, 2, 1)
+    qtbot.waitUntil(lambda: len(derivative()) == 20, timeout=1000)
+    np.testing.assert_allclose(derivative(), compute_derivative(x, x**2, 0))
+
+    # NOTE: A new generation means the data changed as a whole.
+    add_curve(x**3, 3, 2)
+    qtbot.waitUntil(
+        lambda: np.allclose(derivative(), compute_derivative(x, x**3, 0)),
+        timeout=1000,
+    )
+
+
+def test_derivative_background(base_1d_plot: Plot1D, qtbot):
+    derivative_action = DerivativeAction(
+        base_1d_plot, base_1d_plot, background_threshold=10
+    )
+
+    x = np.arange(100, dtype=float)
+    base_1d_plot.addCurve(x, x**2, legend="square")
+
+    derivative_action.trigger()
+    qtbot.waitUntil(lambda: len(base_1d_plot.getAllCurves()) == 2, timeout=1000)
+
+    new_curve = base_1d_plot.getCurve("Derivative of square")
+    np.testing.assert_allclose(new_curve.getYData(), 2 * x)
+
+    derivative_action.set_smoothing_window(5)
+    qtbot.waitUntil(
+        lambda: base_1d_plot.getCurve("Derivative of square").getYData()[0] != 0,
+        timeout=1000,
+    )
+
+
+def test_analyze_peak():
+    x = np.linspace(-10, 10, 2001)
+    sigma = 1.5
+    y = 3 + 10 * np.exp(-((x - 2) ** 2) / (2 * sigma**2))
+
+    analysis = analyze_peak(x, y)
+    assert analysis.peak == pytest.approx(2)
+    assert analysis.peak_value == pytest.approx(13)
+    assert analysis.fwhm == pytest.approx(2 * np.sqrt(2 * np.log(2)) * sigma, rel=1e-4)
+    assert analysis.centroid == pytest.approx(2, abs=1e-3)
+    assert abs(analysis.edge - 2) == pytest.approx(sigma, abs=0.01)
+
+    # NOTE: Reversed scans must give the same results.
+    assert analyze_peak(x[::-1], y[::-1]) == analysis
+
+    assert analyze_peak([1, 2], [1, 2]) is None
+
+
+def test_peak_analysis(base_1d_plot: Plot1D, qtbot):
+    peak_action = PeakAnalysisAction(base_1d_plot, base_1d_plot, debounce_interval=0)
+
+    x = np.linspace(0, 10, 101)
+    base_1d_plot.addCurve(x, np.exp(-((x - 4) ** 2)), legend="gauss")
+
+    peak_action.trigger()
+    qtbot.waitUntil(lambda: base_1d_plot._getMarker("Peak of gauss") is not None)
+    assert peak_action.get_analysis("gauss").peak == pytest.approx(4)
+    first_analysis = peak_action.get_analysis("gauss")
+
+    # NOTE: Re-adding the same data version keeps the previous analysis.
+    base_1d_plot.clear()
+    base_1d_plot.addCurve(
+        x, np.exp(-((x - 4) ** 2)), legend="gauss", info={"data_version": 1}
+    )
+    qtbot.waitUntil(lambda: peak_action.get_analysis("gauss") is not first_analysis)
+    second_analysis = peak_action.get_analysis("gauss")
+
+    base_1d_plot.clear()
+    base_1d_plot.addCurve(
+        x, np.exp(-((x - 6) ** 2)), legend="gauss", info={"data_version": 1}
+    )
+    qtbot.waitUntil(lambda: base_1d_plot._getMarker("Peak of gauss") is not None)
+    assert peak_action.get_analysis("gauss") is second_analysis
+
+    base_1d_plot.addCurve(
+        x, np.exp(-((x - 6) ** 2)), legend="gauss", info={"data_version": 2}
+    )
+    qtbot.waitUntil(lambda: peak_action.get_analysis("gauss").peak == pytest.approx(6))
+
+    peak_action.trigger()
+    assert base_1d_plot._getMarker("Peak of gauss") is None
+
+
+def test_derivative_background_updates(base_1d_plot: Plot1D, qtbot, monkeypatch):
+    derivative_action = DerivativeAction(
+        base_1d_plot, base_1d_plot, background_threshold=10
+    )
+
+    computed_lengths = []
+    release = threading.Event()
+
+    def blocking_compute_derivative(x, y, smoothing_window=0):
+        if threading.current_thread() is not threading.main_thread():
+            computed_lengths.append(len(x))
+            release.wait(timeout=5)
+        return compute_derivative(x, y, smoothing_window)
+
+    monkeypatch.setattr(
+        "sophys_live_view.widgets.plot_actions.compute_derivative",
+        blocking_compute_derivative,
+    )
+
+    x = np.arange(100, dtype=float)
+    base_1d_plot.addCurve(
+        x, x**2, legend="square", info={"data_version": 0, "data_generation": 0}
+    )
+    derivative_action.trigger()
+
+    # NOTE: Refreshes while the computation runs don't start other computations.
+    for version in range(1, 6):
+        x = np.arange(100 + version, dtype=float)
+        base_1d_plot.addCurve(
+            x,
+            x**2,
+            legend="square",
+            info={"data_version": version, "data_generation": 0},
+        )
+    qtbot.waitUntil(lambda: len(computed_lengths) == 1, timeout=1000)
+
+    # NOTE: Once it finishes, its result is extended with the appended points.
+    release.set()
+    qtbot.waitUntil(
+        lambda: (
+            base_1d_plot.getCurve("Derivative of square") is not None
+            and len(base_1d_plot.getCurve("Derivative of square").getYData()) == 105
+        ),
+        timeout=1000,
+    )
+    np.testing.assert_allclose(
+        base_1d_plot.getCurve("Derivative of square").getYData(), 2 * x
+    )
+    assert computed_lengths == [100]
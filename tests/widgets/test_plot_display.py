@@ -1,7 +1,12 @@
+import numpy as np
 import pytest
 from qtpy.QtCore import QObject, Signal
+from silx.gui.plot.PlotWindow import Plot2D
 
-from sophys_live_view.widgets.plot_display import PlotDisplay
+from sophys_live_view.utils.data_source_manager import DataSourceManager
+from sophys_live_view.utils.dtype_policy import DtypePolicy
+from sophys_live_view.utils.json_data_source import JSONDataSource
+from sophys_live_view.widgets.plot_display import DataAggregator, PlotDisplay
 
 
 class MockSignals(QObject):
@@ -11,6 +16,13 @@ class MockSignals(QObject):
     custom_signal_added = Signal(str, str, str)
 
 
+class MockDataSignals(QObject):
+    new_data_stream = Signal(str, str, str, set, dict, set, list, dict)
+    new_data_received = Signal(str, str, dict, dict)
+    data_stream_closed = Signal(str, str)
+    loading_status = Signal(str, str, float)
+
+
 @pytest.fixture
 def signals_mocker():
     return MockSignals()
@@ -43,6 +55,23 @@ def test_plot_change_tab(display, qtbot):
     assert "1D" in blocker.args[0], blocker.args
 
 
+def test_plot_lazy_2d_tabs(display, qtbot):
+    assert not isinstance(display._plots.widget(1), Plot2D)
+    assert not isinstance(display._plots.widget(2), Plot2D)
+
+    with qtbot.waitSignal(display.plot_tab_changed, timeout=1000) as blocker:
+        display._plots.setCurrentIndex(2)
+    assert blocker.args == ["2D - Grid"]
+    assert display._plots.currentIndex() == 2
+    assert isinstance(display._plots.widget(2), Plot2D)
+    assert not isinstance(display._plots.widget(1), Plot2D)
+
+    grid_plot = display._plots.widget(2)
+    display._plots.setCurrentIndex(0)
+    display._plots.setCurrentIndex(2)
+    assert display._plots.widget(2) is grid_plot
+
+
 def test_plot_get_data(data_source_manager, display, qtbot):
     data_aggr = display._data_aggregator
     with qtbot.waitSignals([data_aggr.new_data_received] * 4, timeout=1000):
@@ -93,7 +122,10 @@ def test_plot_add_custom_signal(data_source_manager, display, signals_mocker, qt
     det2_data = data_aggr.get_data(uids_and_names[1][0], "det2")
     custom_data = data_aggr.get_data(uids_and_names[1][0], "test")
 
-    assert all(custom_data[i] == det2_data[i] - det_data[i] for i in range(custom_data.shape[0]))
+    assert all(
+        custom_data[i] == det2_data[i] - det_data[i]
+        for i in range(custom_data.shape[0])
+    )
 
 
 # FIXME: Figure out why this test hangs when running with the other plot display tests,
@@ -125,3 +157,329 @@ def test_plot_add_custom_signal(data_source_manager, display, signals_mocker, qt
 #     display.show()
 #     qtbot.waitExposed(display, timeout=1000)
 #     qtbot.waitUntil(finished_building_plot, timeout=1000)
+
+
+def test_plot_statistics(data_source_manager, display, qtbot):
+    uids_and_names = []
+
+    data_source_manager.new_data_stream.connect(
+        lambda uid, subuid, display_name, *_: uids_and_names.append(
+            (subuid, display_name)
+        )
+    )
+
+    data_aggr = display._data_aggregator
+    with qtbot.waitSignals([data_aggr.new_data_received] * 4, timeout=1000):
+        data_source_manager.start()
+
+    uid = uids_and_names[1][0]
+    statistics = data_aggr.get_statistics(uid, "det")
+    assert statistics.count == 6
+    assert statistics.max == 9
+    assert statistics.argmax == 4
+    assert statistics.mean == pytest.approx(sum([2, 1, 3, 5, 9, 6]) / 6)
+
+    statistics = data_aggr.get_statistics(uid, "det2", "timestamp")
+    assert statistics.center_of_mass == pytest.approx(
+        sum(t * v for t, v in zip([1, 2, 3, 4, 5, 6], [9, 8, 7, 1, 2, 3], strict=True))
+        / sum([9, 8, 7, 1, 2, 3])
+    )
+
+
+def test_plot_reference_comparison(data_source_manager, display, signals_mocker, qtbot):
+    uids_and_names = []
+
+    data_source_manager.new_data_stream.connect(
+        lambda uid, subuid, display_name, *_: uids_and_names.append(
+            (subuid, display_name)
+        )
+    )
+
+    data_aggr = display._data_aggregator
+    with qtbot.waitSignals([data_aggr.new_data_received] * 4, timeout=1000):
+        data_source_manager.start()
+
+    signals_mocker.selected_streams_changed.emit(uids_and_names)
+    signals_mocker.selected_signals_changed_1d.emit("timestamp", {"det"})
+
+    display.show()
+    qtbot.waitExposed(display, timeout=1000)
+    qtbot.waitUntil(
+        lambda: len(display._plots.widget(0).getAllCurves()) == 2, timeout=1000
+    )
+
+    reference_uid, compared_uid = uids_and_names[0][0], uids_and_names[1][0]
+    display._reference_run_combo.setCurrentIndex(
+        display._reference_run_combo.findData(reference_uid)
+    )
+
+    def get_compared_curve(mode):
+        return display._plots.widget(0).getCurve(
+            f"det - ghi   ({compared_uid}) [{mode}]"
+        )
+
+    qtbot.waitUntil(lambda: get_compared_curve("difference") is not None, timeout=1000)
+    assert len(display._plots.widget(0).getAllCurves()) == 1
+    np.testing.assert_allclose(
+        get_compared_curve("difference").getYData(), [1, -1, 0, 0, 3, -1]
+    )
+
+    display._comparison_mode_combo.setCurrentText("Ratio")
+    qtbot.waitUntil(lambda: get_compared_curve("ratio") is not None, timeout=1000)
+    np.testing.assert_allclose(
+        get_compared_curve("ratio").getYData(), [2, 1 / 2, 1, 1, 9 / 6, 6 / 7]
+    )
+
+
+def test_plot_many_runs(data_source_manager, display, signals_mocker, qtbot):
+    uids_and_names = []
+
+    data_source_manager.new_data_stream.connect(
+        lambda uid, subuid, display_name, *_: uids_and_names.append(
+            (subuid, display_name)
+        )
+    )
+
+    data_aggr = display._data_aggregator
+    with qtbot.waitSignals([data_aggr.new_data_received] * 4, timeout=1000):
+        data_source_manager.start()
+
+    display._many_runs_threshold = 1
+    signals_mocker.selected_streams_changed.emit(uids_and_names)
+    signals_mocker.selected_signals_changed_1d.emit("timestamp", {"det"})
+
+    display.show()
+    qtbot.waitExposed(display, timeout=1000)
+
+    plot = display._plots.widget(0)
+    qtbot.waitUntil(lambda: plot.getImage("det - 2 runs") is not None, timeout=1000)
+    assert len(plot.getAllCurves()) == 0
+    assert plot.getImage("det - 2 runs").getData(copy=False).shape[0] == 2
+
+    display._many_runs_mode_combo.setCurrentText("Density")
+    qtbot.waitUntil(
+        lambda: plot.getImage("det - 2 runs").getData(copy=False).shape[0] == 256,
+        timeout=1000,
+    )
+
+    # NOTE: Only a single detector is shown, and runs without it are left out.
+    signals_mocker.selected_signals_changed_1d.emit("timestamp", {"det", "det2"})
+    qtbot.waitUntil(lambda: "1 other signals" in plot.getGraphTitle(), timeout=1000)
+    assert [image.getName() for image in plot.getAllImages()] == ["det - 2 runs"]
+
+    signals_mocker.selected_signals_changed_1d.emit("timestamp", {"det2"})
+    qtbot.waitUntil(lambda: plot.getImage("det2 - 1 runs") is not None, timeout=1000)
+    assert [image.getName() for image in plot.getAllImages()] == ["det2 - 1 runs"]
+    assert "1 runs without 'det2'" in plot.getGraphTitle()
+
+    display._many_runs_threshold = 50
+    display.update_plots()
+    qtbot.waitUntil(lambda: len(plot.getAllCurves()) == 1, timeout=1000)
+    assert len(plot.getAllImages()) == 0
+    assert plot.getGraphTitle() == ""
+
+
+def test_aggregator_storage_dtypes():
+    signals = MockDataSignals()
+    data_aggr = DataAggregator(
+        signals.new_data_stream,
+        signals.new_data_received,
+        DtypePolicy(float32_detectors=True),
+    )
+
+    metadata = {
+        "detectors": ["counts"],
+        "shape": [2, 2],
+        "data_keys": {
+            "counts": {"dtype": "integer", "shape": []},
+            "motor": {"dtype": "number", "shape": [], "precision": 3},
+            "det": {"dtype": "number", "shape": [], "precision": 3},
+            "seq_num": {"dtype": "integer", "shape": []},
+        },
+    }
+    signals.new_data_stream.emit(
+        "",
+        "uid",
+        "grid",
+        {"counts", "motor", "det", "seq_num"},
+        {},
+        {"counts", "det"},
+        ["motor"],
+        metadata,
+    )
+    for seq_num, position in enumerate([(0, 0), (0, 1), (1, 0)], start=1):
+        signals.new_data_received.emit(
+            "",
+            "uid",
+            {
+                "counts": np.array([seq_num * 10]),
+                "motor": np.array([seq_num * 0.5]),
+                "det": np.array([seq_num * 0.25]),
+                "seq_num": np.array([seq_num]),
+            },
+            {"counts": {"position": position}},
+        )
+
+    assert data_aggr.get_data("uid", "seq_num").dtype == np.int64
+    assert data_aggr.get_data("uid", "motor").dtype == np.float64
+    assert data_aggr.get_data("uid", "det").dtype == np.float32
+
+    counts = data_aggr.get_data("uid", "counts")
+    assert counts.dtype == np.int64
+    np.testing.assert_array_equal(
+        data_aggr.get_validity_mask("uid", "counts"), [[True, True], [True, False]]
+    )
+    np.testing.assert_array_equal(
+        data_aggr.get_data("uid", "counts", force_1d=True), [10, 20, 30]
+    )
+
+
+def test_aggregator_ingestion_priority(qtbot):
+    signals = MockDataSignals()
+    data_aggr = DataAggregator(
+        signals.new_data_stream,
+        signals.new_data_received,
+        stream_closed_signal=signals.data_stream_closed,
+        loading_status_signal=signals.loading_status,
+    )
+
+    signals.loading_status.emit("history", "Loading...", 50.0)
+    for subuid in ("old", "selected", "live"):
+        uid = "history" if subuid != "live" else "kafka"
+        signals.new_data_stream.emit(uid, subuid, subuid, {"det"}, {}, set(), [], {})
+        for value in range(3):
+            signals.new_data_received.emit(
+                uid, subuid, {"det": np.array([value, value + 1])}, {}
+            )
+    data_aggr.set_selected_runs({"selected"})
+
+    assert data_aggr.queue_depths() == {"selected": 0, "live": 3, "deferred": 3}
+
+    received = []
+    data_aggr.new_data_received.connect(received.append)
+    qtbot.waitUntil(lambda: sum(data_aggr.queue_depths().values()) == 0)
+
+    # NOTE: Live updates are ingested one by one, deferred ones coalesced into one.
+    assert received == ["live"] * 3 + ["old"]
+    np.testing.assert_array_equal(data_aggr.get_data("old", "det"), [0, 1, 1, 2, 2, 3])
+    np.testing.assert_array_equal(data_aggr.get_data("live", "det"), [0, 1, 1, 2, 2, 3])
+
+
+def test_aggregator_cross_run_custom_signal(qtbot):
+    signals = MockDataSignals()
+    data_aggr = DataAggregator(signals.new_data_stream, signals.new_data_received)
+
+    for subuid in ("a", "b", "live"):
+        signals.new_data_stream.emit(
+            "", subuid, f"scan {subuid}", {"x", "det"}, {}, {"det"}, ["x"], {}
+        )
+    for subuid in ("a", "b"):
+        signals.new_data_received.emit(
+            "",
+            subuid,
+            {"x": np.array([0, 1, 2, 3]), "det": np.array([1, 2, 3, 4]) * len(subuid)},
+            {},
+        )
+
+    data_aggr.add_custom_signal("a", "average", "mean(runs[-3:].det)")
+    np.testing.assert_allclose(data_aggr.get_data("a", "average"), [1, 2, 3, 4])
+
+    # NOTE: Data of another run updates the custom signal, aligned over its motor.
+    received = []
+    data_aggr.new_data_received.connect(received.append)
+    signals.new_data_received.emit(
+        "", "live", {"x": np.array([0, 1.5]), "det": np.array([4, 10])}, {}
+    )
+    qtbot.waitUntil(lambda: "a" in received)
+    np.testing.assert_allclose(data_aggr.get_data("a", "average"), [2, 4, 3, 4])
+
+
+def test_plot_binned_scatter(data_source_manager, display, signals_mocker, qtbot):
+    uids_and_names = []
+
+    data_source_manager.new_data_stream.connect(
+        lambda uid, subuid, display_name, *_: uids_and_names.append(
+            (subuid, display_name)
+        )
+    )
+
+    data_aggr = display._data_aggregator
+    with qtbot.waitSignals([data_aggr.new_data_received] * 4, timeout=1000):
+        data_source_manager.start()
+
+    display._plots.setCurrentIndex(1)
+    display._binned_scatter_action.setChecked(True)
+    signals_mocker.selected_streams_changed.emit(uids_and_names[1:])
+    signals_mocker.selected_signals_changed_2d.emit("timestamp", "det", {"det2"})
+
+    display.show()
+    qtbot.waitExposed(display, timeout=1000)
+
+    plot_widget = display._plots.widget(1)
+    qtbot.waitUntil(lambda: len(plot_widget.getAllImages()) == 1, timeout=1000)
+
+    # NOTE: Zooming in is kept across updates, and re-bins the visible region.
+    plot_widget.getXAxis().setLimits(1, 2)
+    plot_widget.getYAxis().setLimits(1, 2)
+    qtbot.waitUntil(lambda: len(display._zoomed_binned_scatters) == 1, timeout=1000)
+
+    display.update_plots()
+    qtbot.wait(200)
+    assert plot_widget.getXAxis().getLimits() == (1, 2)
+
+
+def test_plot_grid_in_place(test_data_path, signals_mocker, qtbot):
+    manager = DataSourceManager()
+    manager.add_data_source(JSONDataSource(str(test_data_path / "grid_with_det.json")))
+
+    display = PlotDisplay(
+        manager,
+        signals_mocker.selected_streams_changed,
+        signals_mocker.selected_signals_changed_1d,
+        signals_mocker.selected_signals_changed_2d,
+        signals_mocker.custom_signal_added,
+    )
+    qtbot.addWidget(display)
+
+    uids_and_names = []
+    manager.new_data_stream.connect(
+        lambda uid, subuid, display_name, *_: uids_and_names.append(
+            (subuid, display_name)
+        )
+    )
+
+    data_aggr = display._data_aggregator
+    with qtbot.waitSignal(manager.data_stream_closed, timeout=2000):
+        manager.start()
+    qtbot.waitUntil(lambda: sum(data_aggr.queue_depths().values()) == 0)
+    uid = uids_and_names[0][0]
+
+    # NOTE: Everything changed on the first call, and nothing changed since then.
+    assert data_aggr.take_dirty_rows(uid, "det4") is None
+    assert len(data_aggr.take_dirty_rows(uid, "det4")) == 0
+
+    display._plots.setCurrentIndex(2)
+    signals_mocker.selected_streams_changed.emit(uids_and_names)
+    signals_mocker.selected_signals_changed_2d.emit("motor1", "motor2", {"det4"})
+
+    display.show()
+    qtbot.waitExposed(display, timeout=1000)
+
+    plot_widget = display._plots.widget(2)
+    qtbot.waitUntil(lambda: len(plot_widget.getAllImages()) == 1, timeout=1000)
+    image = plot_widget.getAllImages()[0]
+    assert not np.isnan(image.getData(copy=False)).any()
+
+    colormap_range = image.getColormap().getVRange()
+    assert colormap_range == (
+        np.nanmin(data_aggr.get_data(uid, "det4")),
+        np.nanmax(data_aggr.get_data(uid, "det4")),
+    )
+
+    plot_widget.getXAxis().setLimits(0, 0.5)
+    display.update_plots()
+    qtbot.wait(200)
+    assert plot_widget.getAllImages()[0] is image
+    assert plot_widget.getXAxis().getLimits() == (0, 0.5)
+
+    manager.stop()
@@ -29,7 +29,7 @@ def test_run_selector_select_one(selector, data_source_manager, qtbot):
         data_source_manager.start()
 
     with qtbot.waitSignal(selector.selected_streams_changed, timeout=1000) as blocker:
-        index = selector._run_list_model.index(1)
+        index = selector._run_filter_model.index(1, 0)
         selector._run_list_view.setCurrentIndex(index)
     assert len(blocker.args[0]) == 1, blocker.args[0]
     assert blocker.args[0][0][1] == "ghi", blocker.args[0]
@@ -42,7 +42,7 @@ def test_run_selector_select_multiple(selector, data_source_manager, qtbot):
     selection_model = selector._run_list_view.selectionModel()
 
     def select(row: int, flag: QItemSelectionModel.SelectionFlag):
-        selection_model.select(selector._run_list_model.index(row), flag)
+        selection_model.select(selector._run_filter_model.index(row, 0), flag)
 
     with qtbot.waitSignal(selector.selected_streams_changed, timeout=1000):
         select(0, QItemSelectionModel.SelectionFlag.SelectCurrent)
@@ -66,3 +66,101 @@ def test_run_selector_bookmark(selector, data_source_manager, qtbot):
     assert selector._run_list_model.data(index, RunListModel.BOOKMARK_ROLE)
     selector.toggle_bookmark(index)
     assert not selector._run_list_model.data(index, RunListModel.BOOKMARK_ROLE)
+
+
+def test_run_selector_filter(selector, data_source_manager, qtbot):
+    with qtbot.waitSignals([data_source_manager.new_data_stream] * 2, timeout=1000):
+        data_source_manager.start()
+
+    assert selector._run_filter_model.rowCount() == 2
+
+    selector._run_filter_line.setText("signal:det2")
+    assert selector._run_filter_model.rowCount() == 1
+    assert selector._run_filter_model.index(0, 0).data() == "ghi"
+
+    selector._run_filter_line.setText("stream_name:abc signal:det")
+    assert selector._run_filter_model.rowCount() == 1
+    assert selector._run_filter_model.index(0, 0).data() == "abc"
+
+    selector._run_filter_line.setText("signal:nothing")
+    assert selector._run_filter_model.rowCount() == 0
+
+    selector._run_filter_line.clear()
+    assert selector._run_filter_model.rowCount() == 2
+
+
+def test_run_list_model_close_stream(qtbot):
+    model = RunListModel()
+    for i in range(3):
+        model.add_stream("source", f"run{i}", f"run {i}")
+
+    model.close_stream("source", "run1")
+
+    loading = [model.data(model.index(i), RunListModel.LOADING_ROLE) for i in range(3)]
+    assert loading == [True, False, True]
+
+
+def test_run_list_model_batch_insertion(qtbot):
+    model = RunListModel()
+    inserted_ranges = []
+    model.rowsInserted.connect(
+        lambda parent, first, last: inserted_ranges.append((first, last))
+    )
+
+    model.set_batch_insertion(True)
+    for i in range(5):
+        assert model.add_stream("source", f"run{i}", f"run {i}") == i
+    model.close_stream("source", "run3")
+
+    assert model.rowCount() == 0
+    assert model.total_run_count() == 5
+    assert model.row_of("source", "run3") == 3
+
+    model.set_batch_insertion(False)
+
+    assert inserted_ranges == [(0, 4)]
+    assert model.rowCount() == 5
+    assert not model.data(model.index(3), RunListModel.LOADING_ROLE)
+    assert model.data(model.index(4), RunListModel.LOADING_ROLE)
+
+
+def test_run_selector_export(selector, data_source_manager, qtbot, monkeypatch):
+    with qtbot.waitSignals([data_source_manager.new_data_stream] * 2, timeout=1000):
+        data_source_manager.start()
+    assert not selector._export_button.isEnabled()
+
+    selection_model = selector._run_list_view.selectionModel()
+    for row in (1, 0):
+        selection_model.select(
+            selector._run_filter_model.index(row, 0),
+            QItemSelectionModel.SelectionFlag.Select,
+        )
+    assert selector._export_button.isEnabled()
+
+    monkeypatch.setattr(
+        "sophys_live_view.widgets.run_selector.QFileDialog.getSaveFileName",
+        lambda **_: ("/tmp/export", "NumPy (*.npz)"),
+    )
+    with qtbot.waitSignal(selector.export_requested, timeout=1000) as blocker:
+        selector._export_button.click()
+
+    subuids, file_path = blocker.args
+    assert subuids == [
+        selector._run_list_model.data(
+            selector._run_list_model.index(row), RunListModel.SUBUID_ROLE
+        )
+        for row in (0, 1)
+    ]
+    assert file_path == "/tmp/export.npz"
+
+    # NOTE: Changing the selection while exporting doesn't allow another export.
+    selector.show_export_status("Exporting runs...", 10.0)
+    assert not selector._export_button.isEnabled()
+    selection_model.select(
+        selector._run_filter_model.index(1, 0),
+        QItemSelectionModel.SelectionFlag.Deselect,
+    )
+    assert not selector._export_button.isEnabled()
+
+    selector.show_export_status("Exporting runs...", 100.0)
+    assert selector._export_button.isEnabled()
@@ -1,13 +1,26 @@
 import pytest
-from qtpy.QtCore import QObject, Signal
+from qtpy.QtCore import QObject, Qt, Signal
+from qtpy.QtWidgets import QDialog
 
-from sophys_live_view.widgets.signal_selector import SignalSelector
+from sophys_live_view.widgets.signal_selector import (
+    SignalSelectionModel,
+    SignalSelector,
+)
 
 
 class MockSignals(QObject):
     selected_streams_changed = Signal(list)
 
 
+def check_signal(table, row: int, column: int, state: bool = True):
+    model = table._model
+    model.setData(
+        model.index(row, column),
+        Qt.CheckState.Checked if state else Qt.CheckState.Unchecked,
+        Qt.ItemDataRole.CheckStateRole,
+    )
+
+
 @pytest.fixture
 def signals_mocker():
     return MockSignals()
@@ -63,7 +76,7 @@ def test_change_signals_1d(data_source_manager, selector, signals_mocker, qtbot)
     with qtbot.waitSignal(
         selector.selected_signals_changed_1d, timeout=1000
     ) as blocker:
-        selector._1d_signal_selection_table._row_widgets[1][2].click()
+        check_signal(selector._1d_signal_selection_table, 1, 2)
 
     assert blocker.args[0] == "timestamp", blocker.args
     assert "det" in blocker.args[1], blocker.args
@@ -93,7 +106,7 @@ def test_maintain_signals_between_runs_1d(
     with qtbot.waitSignal(
         selector.selected_signals_changed_1d, timeout=1000
     ) as blocker:
-        selector._1d_signal_selection_table._row_widgets[1][2].click()
+        check_signal(selector._1d_signal_selection_table, 1, 2)
 
     assert blocker.args[0] == "timestamp", blocker.args
     assert "det" in blocker.args[1], blocker.args
@@ -125,3 +138,186 @@ def test_add_custom_signal(data_source_manager, selector, qtbot):
 
     assert "test" in selector.uids_with_signal
     assert uids_and_names[0][0] in selector.uids_with_signal["test"]
+
+
+def test_add_custom_signal_many_runs(
+    data_source_manager, selector, signals_mocker, qtbot, monkeypatch
+):
+    uids_and_names = []
+
+    data_source_manager.new_data_stream.connect(
+        lambda uid, subuid, display_name, *_: uids_and_names.append(
+            (subuid, display_name)
+        )
+    )
+    with qtbot.waitSignals([data_source_manager.new_data_stream] * 2, timeout=1000):
+        data_source_manager.start()
+    with qtbot.waitSignal(selector.selected_signals_changed_1d, timeout=1000):
+        signals_mocker.selected_streams_changed.emit(uids_and_names)
+
+    expression = "det2 * 2"
+    errors = []
+    reloads = []
+    added = []
+    monkeypatch.setattr(
+        "sophys_live_view.widgets.signal_selector.QDialog.exec",
+        lambda _: QDialog.DialogCode.Accepted,
+    )
+    monkeypatch.setattr(
+        "sophys_live_view.widgets.signal_selector.CustomSignalCreator.get_custom_signal_parameters",
+        lambda _: ("test", expression),
+    )
+    monkeypatch.setattr(
+        "sophys_live_view.widgets.signal_selector.QMessageBox.critical",
+        lambda *args: errors.append(args),
+    )
+    monkeypatch.setattr(selector, "reload", lambda: reloads.append(True))
+    selector.custom_signal_added.connect(lambda uid, *_: added.append(uid))
+
+    # NOTE: Validated against each run, and only one of them has `det2`.
+    selector._custom_signal_button_clicked()
+    assert len(errors) == 1
+    assert added == []
+
+    expression = "det * 2"
+    selector._custom_signal_button_clicked()
+    assert len(errors) == 1
+    assert sorted(added) == sorted(uid for uid, _ in uids_and_names)
+    assert len(reloads) == 1
+
+
+def test_filter_signals(data_source_manager, selector, signals_mocker, qtbot):
+    uids_and_names = []
+
+    data_source_manager.new_data_stream.connect(
+        lambda uid, subuid, display_name, *_: uids_and_names.append(
+            (subuid, display_name)
+        )
+    )
+    with qtbot.waitSignals([data_source_manager.new_data_stream] * 2, timeout=1000):
+        data_source_manager.start()
+
+    with qtbot.waitSignal(selector.selected_signals_changed_1d, timeout=1000):
+        signals_mocker.selected_streams_changed.emit(uids_and_names)
+
+    table = selector._1d_signal_selection_table
+    assert table._filter_model.rowCount() == 3
+
+    table._filter_line.setText("DET")
+    assert table._filter_model.rowCount() == 2
+
+    table._filter_line.setText("det2")
+    assert table._filter_model.rowCount() == 1
+    assert table._filter_model.index(0, 0).data() == "det2"
+
+    # NOTE: Filtering doesn't change the current selection.
+    assert table._model.checked_signals(1) == {"det", "det2"}
+
+
+def test_exclusive_signals_2d(data_source_manager, selector, signals_mocker, qtbot):
+    uids_and_names = []
+
+    data_source_manager.new_data_stream.connect(
+        lambda uid, subuid, display_name, *_: uids_and_names.append(
+            (subuid, display_name)
+        )
+    )
+    with qtbot.waitSignals([data_source_manager.new_data_stream] * 2, timeout=1000):
+        data_source_manager.start()
+
+    signals_mocker.selected_streams_changed.emit(uids_and_names[1:2])
+    selector._change_tab("2D - Grid")
+
+    table = selector._2d_signal_selection_table
+    with qtbot.waitSignal(
+        selector.selected_signals_changed_2d, timeout=1000
+    ) as blocker:
+        check_signal(table, 0, 3)
+    assert blocker.args[2] == {"det"}, blocker.args
+
+    with qtbot.waitSignal(
+        selector.selected_signals_changed_2d, timeout=1000
+    ) as blocker:
+        check_signal(table, 1, 3)
+    assert blocker.args[2] == {"det2"}, blocker.args
+    assert table._model.checked_signals(2) == {"det2"}
+
+    # NOTE: Exclusive axes can't be unchecked directly.
+    check_signal(table, 1, 3, False)
+    assert table._model.checked_signals(2) == {"det2"}
+
+
+def test_incremental_configuration(
+    data_source_manager, selector, signals_mocker, qtbot
+):
+    uids_and_names = []
+
+    data_source_manager.new_data_stream.connect(
+        lambda uid, subuid, display_name, *_: uids_and_names.append(
+            (subuid, display_name)
+        )
+    )
+    with qtbot.waitSignals([data_source_manager.new_data_stream] * 2, timeout=1000):
+        data_source_manager.start()
+
+    table_1d = selector._1d_signal_selection_table
+    table_2d = selector._2d_signal_selection_table
+
+    with qtbot.waitSignal(selector.selected_signals_changed_1d, timeout=1000):
+        signals_mocker.selected_streams_changed.emit(uids_and_names[:1])
+    assert table_1d._model.signals() == ["det", "timestamp"]
+
+    # NOTE: The 2D table is only configured when it becomes visible.
+    assert table_2d._model.signals() == []
+    assert table_2d.is_outdated()
+
+    reset_count = []
+    inserted_rows = []
+    table_1d._model.modelReset.connect(lambda: reset_count.append(1))
+    table_1d._model.rowsInserted.connect(
+        lambda parent, first, last: inserted_rows.append((first, last))
+    )
+
+    with qtbot.waitSignal(
+        selector.selected_signals_changed_1d, timeout=1000
+    ) as blocker:
+        signals_mocker.selected_streams_changed.emit(uids_and_names[1:2])
+    assert table_1d._model.signals() == ["det", "det2", "timestamp"]
+    assert inserted_rows == [(1, 1)]
+    assert len(reset_count) == 0
+    assert blocker.args[1] == {"det"}, blocker.args
+
+    # NOTE: Same signals, so nothing changes, but the selection is still sent.
+    with qtbot.waitSignal(
+        selector.selected_signals_changed_1d, timeout=1000
+    ) as blocker:
+        signals_mocker.selected_streams_changed.emit(uids_and_names[1:2])
+    assert inserted_rows == [(1, 1)]
+    assert blocker.args[1] == {"det"}, blocker.args
+
+    with qtbot.waitSignal(selector.selected_signals_changed_2d, timeout=1000):
+        selector._change_tab("2D - Scatter")
+    assert table_2d._model.signals() == ["det", "det2", "timestamp"]
+    assert not table_2d.is_outdated()
+
+
+def test_restore_checked_signals(qtbot):
+    model = SignalSelectionModel(["X", "Y"], [True, False])
+    model.update_signals(["a", "common", "x"], {})
+    model.set_checked_signals(0, {"x"})
+    model.set_checked_signals(1, {"a", "common"})
+
+    model.update_signals(["b", "common", "y"], {})
+    assert model.checked_signals(0) == set()
+    assert model.checked_signals(1) == {"common"}
+    model.set_checked_signals(0, {"y"})
+    model.set_checked_signals(1, {"b", "common"})
+
+    # NOTE: Going back to the first signals checks them as they were.
+    model.update_signals(["a", "common", "x"], {})
+    assert model.checked_signals(0) == {"x"}
+    assert model.checked_signals(1) == {"a", "common"}
+
+    model.update_signals(["b", "common", "x", "y"], {})
+    assert model.checked_signals(0) == {"x"}
+    assert model.checked_signals(1) == {"b", "common"}